@@ -6,12 +6,81 @@ Desenvolvido para a Imersão Lura (Alura + Google Gemini)
 """
 
 import os
-import google.generativeai as genai
-from IPython.display import display, Markdown
+import asyncio
+
+from assincrono import executar_sincrono, iterar_sincrono
+from backend_modelo import BackendGemini
+from cliente_modelo import ClienteModelo
+from cache_respostas import chave_cache, resumo_textos
+from cache_semantico import depende_do_historico
+from contexto import SeletorContexto
+from instrumentacao import INSTRUMENTACAO_DESATIVADA, sessao_atual
+from integracao import ESTRATEGIAS_INTEGRACAO, INTEGRACAO_EXTRATIVA, INTEGRACAO_MODELO, integrar_extrativo
+from perfil import ExtratorPerfil
+from resumo import ResumidorConversas
+from roteador import CorrespondenciaNomes, RoteadorLocal, interpretar_roteamento
+from sessoes import SESSAO_PADRAO, GerenciadorSessoes
+
+# Tipos de evento produzidos durante um turno: trechos da resposta final e avisos de andamento
+RESPOSTA = "resposta"
+PROGRESSO = "progresso"
+
+# Marca o fim dos trechos de uma resposta especulativa
+_FIM = object()
+
+# Resposta dada quando nenhum especialista registrado foi indicado para a mensagem
+RESPOSTA_SEM_ESPECIALISTA = """
+            Peço desculpas, mas não consegui identificar claramente qual especialista poderia melhor
+            responder à sua solicitação. Poderia fornecer mais detalhes sobre sua questão agrícola?
+            """
+
+
+class _Especulacao:
+    """
+    Resposta de um especialista iniciada antes do fim do roteamento.
+    
+    Os trechos são recolhidos em segundo plano; se o roteamento confirmar o especialista,
+    eles são entregues (inclusive os que chegarem depois), e caso contrário a tarefa é cancelada.
+    """
+    
+    def __init__(self, nome, gerador):
+        self.nome = nome
+        self.recebidas = []
+        self._fila = asyncio.Queue()
+        self.tarefa = asyncio.create_task(self._consumir(gerador))
+    
+    async def _consumir(self, gerador):
+        try:
+            async for parte in gerador:
+                self.recebidas.append(parte)
+                self._fila.put_nowait(parte)
+        finally:
+            self._fila.put_nowait(_FIM)
+    
+    async def partes(self):
+        """Entrega os trechos à medida que chegam e propaga um eventual erro do especialista."""
+        while (parte := await self._fila.get()) is not _FIM:
+            yield parte
+        await self.tarefa
+    
+    async def texto(self):
+        """Aguarda a resposta completa."""
+        await self.tarefa
+        return "".join(self.recebidas)
+    
+    def cancelar(self):
+        if self.tarefa.done():
+            # Um erro do especialista descartado não interessa a ninguém
+            if not self.tarefa.cancelled():
+                self.tarefa.exception()
+        else:
+            self.tarefa.cancel()
 
 # Configuração da API Gemini (a chave será fornecida pelo usuário)
 def configurar_gemini(api_key):
     """Configura a API Gemini com a chave fornecida."""
+    import google.generativeai as genai
+
     genai.configure(api_key=api_key)
     return genai.GenerativeModel('gemini-pro')
 
@@ -22,16 +91,153 @@ class AgenteGerente:
     e direcionar para o especialista mais adequado.
     """
     
-    def __init__(self, api_key):
-        """Inicializa o Agente Gerente com a chave da API Gemini."""
-        self.modelo = configurar_gemini(api_key)
+    def __init__(self, api_key=None, limiar_confianca=0.5, modo_concorrente=True, max_paralelo=9, timeout_especialista=60,
+                 sessoes=None, backend=None):
+        """
+        Inicializa o Agente Gerente com a chave da API Gemini.
+        
+        Args:
+            api_key: Chave da API Gemini fornecida pelo usuário
+            limiar_confianca: Confiança mínima do roteador local para dispensar a consulta
+                ao modelo na análise de intenção (use 1.0 para sempre consultar o modelo)
+            modo_concorrente: Consulta vários especialistas ao mesmo tempo em vez de um por vez
+            max_paralelo: Número máximo de especialistas consultados simultaneamente
+            timeout_especialista: Tempo máximo, em segundos, de espera pela resposta de cada especialista
+            sessoes: GerenciadorSessoes que guarda as conversas (por padrão, um em memória)
+            backend: BackendModelo consultado pelo gerente (por padrão, o Gemini com `api_key`,
+                protegido por um ClienteModelo)
+        """
+        self.modelo = backend if backend is not None else ClienteModelo(BackendGemini(api_key))
         self.especialistas = {}
-        self.historico = []
-        self.definir_personalidade()
+        self.sessoes = sessoes if sessoes is not None else GerenciadorSessoes()
+        self.roteador = RoteadorLocal()
+        self.nomes_especialistas = CorrespondenciaNomes()
+        self.limiar_confianca = limiar_confianca
+        self.modo_concorrente = modo_concorrente
+        self.max_paralelo = max_paralelo
+        self.timeout_especialista = timeout_especialista
+        self.cache = None
+        self.itens_contexto_cache = 2
+        self.cache_semantico = None
+        self.seletor_contexto = None
+        self.resumidor = None
+        self.extrator_perfil = None
+        self.instrumentacao = INSTRUMENTACAO_DESATIVADA
+        self.estrategia_integracao = INTEGRACAO_MODELO
+        self.limite_integracao_local = 4000
+        self.limiar_sobreposicao = 0.25
+        self.especulacao = False
+        self.confianca_especulacao = 0.2
+        self.contadores_especulacao = {"iniciadas": 0, "aproveitadas": 0, "descartadas": 0}
+        self.contadores_roteamento = {"turnos": 0, "roteamentos_modelo": 0, "respostas_estruturadas": 0,
+                                      "nomes_aproximados": 0, "nomes_descartados": 0, "sem_especialista": 0,
+                                      "perguntas_repetidas": 0}
+        self.descricoes = {}
+        self._textos_atualizados = False
+        self._montando_textos = False
+        # Textos atribuídos diretamente (fora de definir_*), que prevalecem sobre os montados
+        self._textos_definidos = {}
         
+    @property
+    def historico(self):
+        """Histórico da sessão padrão, usada quando nenhum `sessao_id` é informado."""
+        return self.sessoes.obter(SESSAO_PADRAO).historico
+    
+    @historico.setter
+    def historico(self, historico):
+        self.sessoes.obter(SESSAO_PADRAO).historico = historico
+    
+    @property
+    def personalidade(self):
+        """Personalidade do Agente Gerente, com a lista dos especialistas registrados."""
+        self._atualizar_textos()
+        return self._personalidade
+    
+    @property
+    def instrucao_roteamento(self):
+        """Instrução de sistema da análise de intenção."""
+        self._atualizar_textos()
+        return self._instrucao_roteamento
+    
+    @property
+    def instrucao_integracao(self):
+        """Instrução de sistema da integração das respostas de vários especialistas."""
+        self._atualizar_textos()
+        return self._instrucao_integracao
+    
+    @property
+    def saudacao(self):
+        """Apresentação enviada na primeira mensagem de cada conversa."""
+        self._atualizar_textos()
+        return self._saudacao
+    
+    @personalidade.setter
+    def personalidade(self, personalidade):
+        self._definir_texto("personalidade", personalidade)
+    
+    @instrucao_roteamento.setter
+    def instrucao_roteamento(self, instrucao):
+        self._definir_texto("instrucao_roteamento", instrucao)
+    
+    @instrucao_integracao.setter
+    def instrucao_integracao(self, instrucao):
+        self._definir_texto("instrucao_integracao", instrucao)
+    
+    @saudacao.setter
+    def saudacao(self, saudacao):
+        self._definir_texto("saudacao", saudacao)
+    
+    def _definir_texto(self, nome, texto):
+        """
+        Guarda um texto atribuído a uma das propriedades acima.
+        
+        Dentro de definir_* (inclusive nas versões das subclasses), o texto é o próprio
+        texto montado. Fora deles, passa a prevalecer sobre o montado, mesmo depois de novos
+        registros; uma nova personalidade faz também as instruções, que a incluem, serem
+        remontadas.
+        """
+        setattr(self, f"_{nome}", texto)
+        if not self._montando_textos:
+            self._textos_definidos[nome] = texto
+            if nome == "personalidade":
+                self._textos_atualizados = False
+    
+    def _atualizar_textos(self):
+        """
+        Remonta a personalidade, as instruções de sistema e a saudação se os especialistas mudaram.
+        
+        Os textos dependem apenas dos especialistas registrados: são montados na primeira
+        consulta após um registro e reaproveitados em todos os turnos seguintes (e, por
+        serem os mesmos textos, também pelo cache de contexto do backend).
+        """
+        if self._textos_atualizados:
+            return
+        definidos = self._textos_definidos
+        self._montando_textos = True
+        try:
+            self.definir_personalidade()
+            self._personalidade = definidos.get("personalidade", self._personalidade)
+            self.definir_instrucoes_sistema()
+            self.definir_saudacao()
+        finally:
+            self._montando_textos = False
+        for nome, texto in definidos.items():
+            setattr(self, f"_{nome}", texto)
+        self._textos_atualizados = True
+    
+    def _lista_especialistas(self, formato, recuo=8):
+        """
+        Uma linha por especialista registrado, na ordem de registro.
+        
+        Args:
+            formato: Função (nome, descrição) -> texto da linha
+            recuo: Espaços antes de cada linha a partir da segunda (a primeira segue o texto)
+        """
+        return f"\n{' ' * recuo}".join(formato(nome, self.descricoes.get(nome, "")) for nome in self.especialistas)
+    
     def definir_personalidade(self):
         """Define a personalidade e comportamento do Agente Gerente."""
-        self.personalidade = """
+        self._personalidade = f"""
         Você é o Gerente do AgriSmart, um sistema multiagente de consultoria agrícola.
         
         Seu papel é:
@@ -41,132 +247,657 @@ class AgenteGerente:
         4. Coordenar a comunicação entre os especialistas quando necessário
         5. Apresentar as respostas de forma clara e profissional
         
-        Você tem acesso a quatro especialistas:
-        - Especialista em Culturas: conhecimento sobre culturas como milho, mandioca, café e banana
-        - Meteorologista: análise e previsão de condições climáticas para agricultura
-        - Especialista em Pragas e Doenças: identificação e gestão de pragas e doenças agrícolas
-        - Especialista em Irrigação: otimização de recursos hídricos e sistemas de irrigação
+        Você tem acesso aos seguintes especialistas:
+        {self._lista_especialistas(lambda nome, descricao: f"- {nome}: {descricao}" if descricao else f"- {nome}")}
         
         Mantenha um tom profissional, cordial e prestativo. Sempre apresente-se como Gerente do AgriSmart
         no início da conversa e explique brevemente como pode ajudar.
         """
-    
-    def registrar_especialista(self, nome, especialista):
-        """Registra um agente especialista no sistema."""
+
+    def definir_instrucoes_sistema(self):
+        """
+        Monta as partes fixas dos prompts de roteamento e de integração.
+
+        Elas são enviadas ao backend como instrução de sistema, registrada uma única vez
+        por modelo; a cada chamada segue apenas a solicitação (e as respostas a integrar).
+        """
+        self._instrucao_roteamento = f"""
+        {self._personalidade}
+
+        Analise a seguinte solicitação de um usuário e determine qual especialista ou especialistas
+        devem responder. Retorne apenas um objeto JSON, sem nenhum outro texto, no formato
+        {{"especialistas": ["Nome do especialista", ...]}}, com os nomes exatamente como na lista abaixo,
+        do mais ao menos relevante.
+
+        Especialistas disponíveis:
+        {self._lista_especialistas(lambda nome, descricao: f"- {nome}")}
+        """
+        self._instrucao_integracao = f"""
+        {self._personalidade}
+
+        Integre as respostas dos especialistas em uma única resposta coerente e abrangente.
+        Mantenha as informações técnicas importantes de cada especialista, mas evite repetições.
+        Organize a resposta de forma lógica e fluida, como se fosse uma única análise completa.
+        """
+
+    def definir_saudacao(self):
+        """Define a apresentação do Gerente, com as áreas dos especialistas registrados."""
+        def area(nome, descricao):
+            texto = descricao or nome
+            return f"• {texto[:1].upper()}{texto[1:]}"
+        
+        self._saudacao = f"""
+            Olá! Sou o Gerente do AgriSmart, seu sistema de consultoria agrícola inteligente.
+            
+            Estou aqui para conectá-lo com nossos especialistas em:
+            {self._lista_especialistas(area, recuo=12)}
+            
+            Como posso ajudá-lo hoje?
+            """
+
+    def registrar_especialista(self, nome, especialista, perfil=None, palavras_chave="", apelidos=(),
+                               descricao=""):
+        """
+        Registra um agente especialista no sistema.
+        
+        Args:
+            nome: Nome com que o especialista é apresentado e escolhido no roteamento
+            especialista: O agente especialista
+            perfil: Texto usado no roteamento local (padrão: a personalidade do especialista)
+            palavras_chave: Termos adicionais que os usuários empregam para este especialista
+            apelidos: Outras formas de escrever o nome, aceitas na resposta de roteamento do modelo
+            descricao: Resumo da área do especialista, usado nas instruções do gerente e na saudação
+        """
         self.especialistas[nome] = especialista
+        self.descricoes[nome] = descricao
+        # A personalidade, as instruções e a saudação serão remontadas com o novo especialista
+        self._textos_atualizados = False
+        self.nomes_especialistas.adicionar(nome, apelidos)
+        # Sem perfil, a personalidade só é lida quando o índice de roteamento for montado
+        self.roteador.indexar(nome, perfil if perfil is not None else (lambda: especialista.personalidade),
+                              palavras_chave)
+        if self.cache is not None and hasattr(especialista, "configurar_cache"):
+            especialista.configurar_cache(self.cache, self.itens_contexto_cache)
+        if hasattr(especialista, "configurar_instrumentacao"):
+            especialista.configurar_instrumentacao(self.instrumentacao, nome)
+        if self.seletor_contexto is not None and hasattr(especialista, "configurar_contexto"):
+            especialista.configurar_contexto(self.seletor_contexto, nome)
         print(f"Especialista '{nome}' registrado com sucesso.")
     
-    def analisar_intencao(self, mensagem):
+    def configurar_cache(self, cache, itens_contexto=2):
         """
-        Analisa a intenção do usuário para determinar qual especialista deve responder.
-        Retorna o nome do especialista mais adequado ou uma lista de especialistas.
+        Ativa um cache de respostas para o gerente e todos os especialistas registrados.
+        
+        Args:
+            cache: Um CacheRespostas (por exemplo CacheMemoria ou CacheSQLite), ou None para desativar
+            itens_contexto: Quantos itens anteriores do histórico compõem a chave das respostas
+                dos especialistas (0 reaproveita a resposta independentemente da conversa)
         """
-        prompt = f"""
-        {self.personalidade}
+        self.cache = cache
+        self.itens_contexto_cache = itens_contexto
+        for especialista in self.especialistas.values():
+            if hasattr(especialista, "configurar_cache"):
+                especialista.configurar_cache(cache, itens_contexto)
+    
+    def configurar_cache_semantico(self, cache_semantico):
+        """
+        Ativa o cache semântico, que responde perguntas parecidas com outras já
+        respondidas sem consultar especialistas.
         
-        Analise a seguinte solicitação de um usuário e determine qual especialista ou especialistas 
-        devem responder. Retorne apenas o nome do especialista ou uma lista de nomes separados por vírgula.
+        As respostas só são reaproveitadas entre conversas com o mesmo perfil da
+        propriedade, e as perguntas que dependem da conversa anterior ("E quanto
+        custa?") não são buscadas nem guardadas.
         
-        Especialistas disponíveis:
-        - Especialista em Culturas
-        - Meteorologista
-        - Especialista em Pragas e Doenças
-        - Especialista em Irrigação
+        Args:
+            cache_semantico: Um CacheSemantico, ou None para desativar
+        """
+        self.cache_semantico = cache_semantico
+    
+    def configurar_instrumentacao(self, instrumentacao):
+        """
+        Ativa a medição das etapas de cada turno (roteamento, especialistas, integração)
+        no gerente e em todos os especialistas registrados.
+        
+        Args:
+            instrumentacao: Uma Instrumentacao com os destinos das medições, ou None para desativar
+        """
+        self.instrumentacao = instrumentacao or INSTRUMENTACAO_DESATIVADA
+        for nome, especialista in self.especialistas.items():
+            if hasattr(especialista, "configurar_instrumentacao"):
+                especialista.configurar_instrumentacao(self.instrumentacao, nome)
+        if self.resumidor is not None:
+            self.resumidor.instrumentacao = self.instrumentacao
+    
+    def configurar_contexto(self, ativo=True, orcamento_tokens=1500, limiar_relevancia=0.5, orcamentos=None):
+        """
+        Faz com que cada especialista receba só as partes da conversa relevantes para ele.
+        
+        As mensagens do usuário são sempre incluídas; das respostas anteriores, entram as do
+        próprio especialista, as dos especialistas relacionados e as de conteúdo relevante
+        segundo o roteador local, dentro de um orçamento de tokens por especialista.
         
+        Args:
+            ativo: Liga ou desliga a seleção (desligada, todos recebem a conversa inteira)
+            orcamento_tokens: Tokens de histórico de cada especialista
+            limiar_relevancia: Relevância mínima (0 a 1) das respostas de outros especialistas
+            orcamentos: Orçamentos próprios de alguns especialistas (nome -> tokens)
+        """
+        self.seletor_contexto = SeletorContexto(self.roteador, orcamento_tokens, limiar_relevancia,
+                                                orcamentos=orcamentos) if ativo else None
+        for nome, especialista in self.especialistas.items():
+            if hasattr(especialista, "configurar_contexto"):
+                especialista.configurar_contexto(self.seletor_contexto, nome)
+    
+    def configurar_resumo(self, ativo=True, itens_recentes=8, min_itens=16, modelo=None):
+        """
+        Ativa o resumo das conversas longas em segundo plano.
+        
+        Uma thread própria compacta os turnos antigos de cada conversa nas observações já
+        tratadas e completa o perfil da propriedade (cultura, área, solo, região, água);
+        os especialistas passam a receber esse resumo seguido só dos turnos recentes. O
+        resumo nunca atrasa um turno: ele é agendado ao fim do turno e instalado quando
+        fica pronto. Chamadas seguintes reconfiguram a mesma thread; desligar o resumo a
+        encerra.
+        
+        Args:
+            ativo: Liga ou desliga o resumo
+            itens_recentes: Itens finais de cada conversa que nunca são resumidos
+            min_itens: Itens antigos ainda não resumidos que disparam um novo resumo
+            modelo: BackendModelo usado no resumo (padrão: o modelo do gerente)
+        """
+        modelo = modelo if modelo is not None else self.modelo
+        if not ativo:
+            if self.resumidor is not None:
+                self.resumidor.encerrar()
+            self.resumidor = None
+        elif self.resumidor is None:
+            self.resumidor = ResumidorConversas(modelo, itens_recentes, min_itens, instrumentacao=self.instrumentacao)
+        else:
+            self.resumidor.modelo = modelo
+            self.resumidor.itens_recentes = itens_recentes
+            self.resumidor.min_itens = min_itens
+    
+    def configurar_perfil(self, ativo=True, culturas=None):
+        """
+        Ativa o perfil da propriedade de cada conversa, preenchido sem chamar o modelo.
+        
+        Cada mensagem do usuário passa por um extrator local (expressões regulares e
+        vocabulário fixo) que reconhece a cultura, a área, o solo e o pH, a região, a
+        irrigação e a água. O perfil fica na sessão (e na persistência) e abre o histórico
+        entregue aos especialistas, que não precisam deduzir esses dados da conversa a cada
+        pergunta: com ele, a janela de mensagens recentes desse histórico é reduzida
+        (Historico.FRACAO_JANELA_COM_PERFIL).
+        
+        Args:
+            ativo: Liga ou desliga a extração (os perfis já preenchidos continuam nos prompts)
+            culturas: Culturas reconhecidas e as suas variedades (padrão: as do especialista em culturas)
+        """
+        self.extrator_perfil = ExtratorPerfil(culturas) if ativo else None
+    
+    def configurar_integracao(self, estrategia, limite_caracteres=4000, limiar_sobreposicao=0.25):
+        """
+        Escolhe como as respostas de vários especialistas são integradas.
+        
+        Args:
+            estrategia: "modelo" (uma chamada extra ao modelo, o padrão), "extrativa" (junção
+                local das respostas, sem repetições) ou "adaptativa" (junção local, exceto
+                quando as respostas são longas ou repetitivas demais para serem apenas juntadas)
+            limite_caracteres: Na adaptativa, tamanho total das respostas a partir do qual o modelo integra
+            limiar_sobreposicao: Na adaptativa, fração de parágrafos repetidos a partir da qual o modelo integra
+        """
+        if estrategia not in ESTRATEGIAS_INTEGRACAO:
+            raise ValueError(f"Estratégia de integração desconhecida: {estrategia}")
+        self.estrategia_integracao = estrategia
+        self.limite_integracao_local = limite_caracteres
+        self.limiar_sobreposicao = limiar_sobreposicao
+    
+    def configurar_especulacao(self, ativa=True, confianca_minima=0.2):
+        """
+        Ativa a execução especulativa do especialista mais provável.
+        
+        Quando a confiança do roteador local não basta para dispensar o modelo, mas chega a
+        `confianca_minima`, o especialista que ele indica começa a responder enquanto o
+        modelo decide o roteamento. Se o roteamento o confirmar, a resposta já está adiantada;
+        caso contrário, ela é cancelada e descartada.
+        
+        Args:
+            ativa: Liga ou desliga a especulação
+            confianca_minima: Confiança mínima do roteador local para especular
+        """
+        self.especulacao = ativa
+        self.confianca_especulacao = confianca_minima
+    
+    def estatisticas_especulacao(self):
+        """Retorna quantas especulações foram iniciadas, aproveitadas e descartadas."""
+        contadores = self.contadores_especulacao
+        iniciadas = contadores["iniciadas"]
+        return dict(contadores, taxa_aproveitamento=contadores["aproveitadas"] / iniciadas if iniciadas else 0.0)
+    
+    def estatisticas_roteamento(self):
+        """
+        Retorna os contadores da análise de intenção e as taxas derivadas deles.
+
+        `taxa_sem_especialista` é a fração dos turnos em que nenhum especialista registrado
+        foi indicado (e o usuário recebeu o pedido de mais detalhes); `taxa_repeticao` é a
+        fração dos turnos que repetem a pergunta logo depois desse pedido; `taxa_aproximados`
+        é a fração dos roteamentos pelo modelo com algum nome reconhecido só de forma aproximada.
+        """
+        contadores = self.contadores_roteamento
+        turnos = contadores["turnos"]
+        pelo_modelo = contadores["roteamentos_modelo"]
+        return dict(contadores,
+                    taxa_sem_especialista=contadores["sem_especialista"] / turnos if turnos else 0.0,
+                    taxa_repeticao=contadores["perguntas_repetidas"] / turnos if turnos else 0.0,
+                    taxa_aproximados=contadores["nomes_aproximados"] / pelo_modelo if pelo_modelo else 0.0)
+    
+    def estatisticas_cache(self):
+        """Retorna os contadores de acertos e falhas dos caches de respostas."""
+        estatisticas = self.cache.estatisticas() if self.cache is not None else {}
+        if self.cache_semantico is not None:
+            estatisticas = dict(estatisticas, semantico=self.cache_semantico.estatisticas())
+        return estatisticas
+    
+    async def analisar_intencao_async(self, mensagem):
+        """
+        Analisa a intenção do usuário para determinar qual especialista deve responder.
+        Retorna o nome do especialista mais adequado ou uma lista de especialistas.
+        
+        O roteador local é consultado primeiro; o modelo Gemini só é chamado quando
+        a confiança do roteador fica abaixo de `limiar_confianca`.
+        """
+        return await self._analisar_intencao(mensagem, self.roteador.rotear(mensagem))
+    
+    async def _analisar_intencao(self, mensagem, resultado):
+        """Decide o roteamento a partir do `resultado` do roteador local, consultando o modelo se preciso."""
+        with self.instrumentacao.medir("roteamento", "AgenteGerente") as medicao:
+            if resultado.especialistas and resultado.confianca >= self.limiar_confianca:
+                medicao.anotar("local")
+                return resultado.especialistas
+            medicao.anotar("modelo")
+            return await self._analisar_intencao_llm_async(mensagem)
+    
+    def analisar_intencao(self, mensagem):
+        """Versão síncrona de `analisar_intencao_async`."""
+        return executar_sincrono(self.analisar_intencao_async(mensagem))
+    
+    def _analisar_intencao_llm(self, mensagem):
+        """Versão síncrona de `_analisar_intencao_llm_async`."""
+        return executar_sincrono(self._analisar_intencao_llm_async(mensagem))
+    
+    async def _analisar_intencao_llm_async(self, mensagem):
+        """
+        Analisa a intenção do usuário consultando o modelo Gemini.
+
+        A resposta é pedida em JSON, mas também é aceita em texto livre; os nomes são
+        comparados com os especialistas registrados de forma tolerante a acentos,
+        artigos, marcadores e pequenas diferenças de grafia.
+        """
+        prompt = f"""
         Solicitação do usuário: "{mensagem}"
         
         Especialista(s) mais adequado(s):
         """
         
-        resposta = self.modelo.generate_content(prompt)
-        especialistas_indicados = resposta.text.strip()
+        with self.instrumentacao.medir("roteamento_modelo", "AgenteGerente") as medicao:
+            medicao.registrar_prompt(prompt)
+            especialistas_indicados = (await self.modelo.gerar(prompt, medicao, self.instrucao_roteamento)).strip()
+            medicao.registrar_resposta(especialistas_indicados)
         
         # Processa a resposta para extrair os nomes dos especialistas
-        if ',' in especialistas_indicados:
-            return [esp.strip() for esp in especialistas_indicados.split(',')]
-        else:
-            return [especialistas_indicados]
+        interpretacao = interpretar_roteamento(especialistas_indicados, self.nomes_especialistas)
+        contadores = self.contadores_roteamento
+        contadores["roteamentos_modelo"] += 1
+        contadores["respostas_estruturadas"] += interpretacao["estruturada"]
+        contadores["nomes_aproximados"] += interpretacao["aproximados"] > 0
+        contadores["nomes_descartados"] += len(interpretacao["descartados"])
+        return interpretacao["especialistas"]
+    
+    def processar_mensagem(self, mensagem, sessao_id=SESSAO_PADRAO):
+        """Versão síncrona de `processar_mensagem_async`."""
+        return executar_sincrono(self.processar_mensagem_async(mensagem, sessao_id))
     
-    def processar_mensagem(self, mensagem):
+    async def processar_mensagem_async(self, mensagem, sessao_id=SESSAO_PADRAO, especialistas=None):
         """
         Processa a mensagem do usuário, identifica os especialistas adequados
         e coordena a resposta.
+        
+        Args:
+            mensagem: A pergunta ou solicitação do usuário
+            sessao_id: Identificador da conversa; cada sessão tem o seu próprio histórico,
+                enquanto os especialistas e o modelo são compartilhados entre todas
+            especialistas: Especialistas já escolhidos para a mensagem (como no processamento
+                em lote); dispensa a análise de intenção e a saudação da primeira mensagem
+        """
+        partes = []
+        async for tipo, texto in self._eventos_turno(mensagem, sessao_id, transmitir=False,
+                                                     especialistas=especialistas):
+            if tipo == RESPOSTA:
+                partes.append(texto)
+        return "".join(partes)
+    
+    async def processar_mensagem_stream_async(self, mensagem, sessao_id=SESSAO_PADRAO):
+        """
+        Processa a mensagem do usuário entregando a resposta em partes.
+        
+        Com um único especialista, os trechos da resposta chegam à medida que o modelo
+        os gera. Com vários, um aviso é emitido quando cada especialista conclui a sua
+        análise e, em seguida, a resposta integrada é transmitida em partes.
+        
+        Yields:
+            Trechos de texto (Markdown) a serem exibidos em sequência
+        """
+        async for tipo, texto in self._eventos_turno(mensagem, sessao_id, transmitir=True):
+            yield texto
+    
+    def processar_mensagem_stream(self, mensagem, sessao_id=SESSAO_PADRAO):
+        """Versão síncrona de `processar_mensagem_stream_async` (um gerador comum)."""
+        return iterar_sincrono(self.processar_mensagem_stream_async(mensagem, sessao_id))
+    
+    async def _eventos_turno(self, mensagem, sessao_id, transmitir, especialistas=None):
+        """Obtém a sessão e processa o turno, um de cada vez por conversa."""
+        sessao = self.sessoes.obter(sessao_id)
+        # A sessão é redefinida a cada retomada: no modo síncrono de streaming, cada trecho
+        # é obtido em uma tarefa (e portanto em um contexto) diferente
+        sessao_atual.set(sessao_id)
+        async with sessao.trava:
+            with self.instrumentacao.medir("turno", "AgenteGerente") as medicao:
+                async for tipo, texto in self._processar(mensagem, sessao.historico, transmitir, especialistas):
+                    if tipo == RESPOSTA:
+                        medicao.registrar_resposta(texto)
+                    yield tipo, texto
+                    sessao_atual.set(sessao_id)
+            if self.resumidor is not None:
+                self.resumidor.acompanhar(sessao.historico)
+    
+    async def _processar(self, mensagem, historico, transmitir, especialistas=None):
         """
+        Processa um turno da conversa cujo histórico é `historico`.
+        
+        Gera pares (tipo, texto): os trechos do tipo RESPOSTA, concatenados, formam a
+        resposta final; os do tipo PROGRESSO só são produzidos quando `transmitir` é verdadeiro.
+        Com `especialistas`, o roteamento já feito pelo chamador é usado diretamente.
+        """
+        # Uma mensagem logo após o pedido de mais detalhes é a mesma pergunta feita de novo
+        if historico and historico[-1].get("conteúdo") == RESPOSTA_SEM_ESPECIALISTA:
+            self.contadores_roteamento["perguntas_repetidas"] += 1
+        
         # Adiciona a mensagem ao histórico
-        self.historico.append({"papel": "usuário", "conteúdo": mensagem})
+        historico.append({"papel": "usuário", "conteúdo": mensagem})
+        if self.extrator_perfil is not None:
+            self.extrator_perfil.atualizar(historico.perfil, mensagem)
         
         # Se for a primeira mensagem, apresenta-se
-        if len(self.historico) == 1:
-            saudacao = """
-            Olá! Sou o Gerente do AgriSmart, seu sistema de consultoria agrícola inteligente.
-            
-            Estou aqui para conectá-lo com nossos especialistas em:
-            • Culturas (milho, mandioca, café, banana)
-            • Meteorologia e previsões climáticas
-            • Gestão de pragas e doenças
-            • Irrigação e recursos hídricos
-            
-            Como posso ajudá-lo hoje?
-            """
-            self.historico.append({"papel": "sistema", "conteúdo": saudacao})
-            return saudacao
+        if len(historico) == 1 and especialistas is None:
+            saudacao = self.saudacao
+            historico.append({"papel": "sistema", "conteúdo": saudacao})
+            yield RESPOSTA, saudacao
+            return
+        
+        # Reaproveita a resposta de uma pergunta equivalente já respondida
+        cache_semantico = self.cache_semantico
+        if cache_semantico is not None and depende_do_historico(mensagem):
+            cache_semantico = None
+        contexto_cache = historico.perfil.texto
+        if cache_semantico is not None:
+            with self.instrumentacao.medir("cache_semantico", "AgenteGerente") as medicao:
+                resposta = cache_semantico.buscar(mensagem, contexto_cache)
+                medicao.registrar_cache(resposta is not None)
+            if resposta is not None:
+                historico.append({"papel": "sistema", "conteúdo": resposta})
+                yield RESPOSTA, resposta
+                return
         
         # Analisa a intenção e identifica os especialistas adequados
-        especialistas_indicados = self.analisar_intencao(mensagem)
+        self.contadores_roteamento["turnos"] += 1
+        especulacao = None
+        if especialistas is not None:
+            especialistas_indicados = especialistas
+        else:
+            especialistas_indicados, especulacao = await self._rotear_especulando(mensagem, historico, transmitir)
         
         # Verifica se os especialistas existem no sistema
         especialistas_disponiveis = [esp for esp in especialistas_indicados if esp in self.especialistas]
         
+        if especulacao is not None:
+            if especulacao.nome in especialistas_disponiveis:
+                self.contadores_especulacao["aproveitadas"] += 1
+            else:
+                especulacao.cancelar()
+                self.contadores_especulacao["descartadas"] += 1
+                especulacao = None
+        
         if not especialistas_disponiveis:
-            resposta = """
-            Peço desculpas, mas não consegui identificar claramente qual especialista poderia melhor
-            responder à sua solicitação. Poderia fornecer mais detalhes sobre sua questão agrícola?
-            """
-            self.historico.append({"papel": "sistema", "conteúdo": resposta})
-            return resposta
+            self.contadores_roteamento["sem_especialista"] += 1
+            resposta = RESPOSTA_SEM_ESPECIALISTA
+            historico.append({"papel": "sistema", "conteúdo": resposta})
+            yield RESPOSTA, resposta
+            return
         
         # Caso seja apenas um especialista
         if len(especialistas_disponiveis) == 1:
-            especialista = self.especialistas[especialistas_disponiveis[0]]
-            resposta = especialista.responder(mensagem, self.historico)
-            self.historico.append({"papel": "especialista", "nome": especialistas_disponiveis[0], "conteúdo": resposta})
-            return f"[Consultando {especialistas_disponiveis[0]}]\n\n{resposta}"
+            nome_esp = especialistas_disponiveis[0]
+            cabecalho = f"[Consultando {nome_esp}]\n\n"
+            yield RESPOSTA, cabecalho
+            partes = []
+            if especulacao is not None:
+                gerador = especulacao.partes()
+            else:
+                gerador = self._responder_especialista_em_partes(nome_esp, mensagem, historico, transmitir)
+            async for parte in gerador:
+                partes.append(parte)
+                yield RESPOSTA, parte
+            resposta = "".join(partes)
+            historico.append({"papel": "especialista", "nome": nome_esp, "conteúdo": resposta})
+            if cache_semantico is not None:
+                cache_semantico.guardar(mensagem, cabecalho + resposta, contexto_cache)
+            return
         
         # Caso sejam múltiplos especialistas
+        if transmitir:
+            yield PROGRESSO, f"_Consultando {', '.join(especialistas_disponiveis)}..._\n\n"
+        recebidas = {}
+        async for nome_esp, resp in self._consultar_especialistas(mensagem, especialistas_disponiveis, historico,
+                                                                  especulacao):
+            recebidas[nome_esp] = resp
+            if transmitir:
+                situacao = "concluiu a análise" if resp is not None else "não respondeu"
+                yield PROGRESSO, f"> {nome_esp} {situacao}.\n\n"
+        resultados = [(nome_esp, recebidas[nome_esp]) for nome_esp in especialistas_disponiveis]
+        
+        # Os registros entram no histórico na ordem indicada pelo roteamento,
+        # independentemente da ordem em que as respostas chegaram
         respostas = []
-        for nome_esp in especialistas_disponiveis:
-            especialista = self.especialistas[nome_esp]
-            resp = especialista.responder(mensagem, self.historico)
+        consultados = []
+        for nome_esp, resp in resultados:
+            if resp is None:
+                continue
             respostas.append(f"[{nome_esp}]:\n{resp}")
-            self.historico.append({"papel": "especialista", "nome": nome_esp, "conteúdo": resp})
+            consultados.append(nome_esp)
+            historico.append({"papel": "especialista", "nome": nome_esp, "conteúdo": resp})
         
-        # Integra as respostas dos especialistas
-        resposta_integrada = self.integrar_respostas(mensagem, especialistas_disponiveis, respostas)
-        self.historico.append({"papel": "sistema", "conteúdo": resposta_integrada})
+        if not respostas:
+            resposta = """
+            Peço desculpas, mas nossos especialistas não conseguiram responder a tempo.
+            Poderia repetir sua solicitação em instantes?
+            """
+            historico.append({"papel": "sistema", "conteúdo": resposta})
+            yield RESPOSTA, resposta
+            return
         
-        return resposta_integrada
+        # Integra as respostas dos especialistas
+        partes = []
+        async for parte in self._integrar(mensagem, consultados, respostas, transmitir):
+            partes.append(parte)
+            yield RESPOSTA, parte
+        resposta_integrada = "".join(partes)
+        sem_resposta = [nome for nome, resp in resultados if resp is None]
+        if sem_resposta:
+            aviso = f"\n\n(Não foi possível obter a análise de: {', '.join(sem_resposta)})"
+            resposta_integrada += aviso
+            yield RESPOSTA, aviso
+        elif cache_semantico is not None:
+            cache_semantico.guardar(mensagem, resposta_integrada, contexto_cache)
+        historico.append({"papel": "sistema", "conteúdo": resposta_integrada})
     
-    def integrar_respostas(self, mensagem, especialistas, respostas):
+    async def _rotear_especulando(self, mensagem, historico, transmitir):
         """
-        Integra as respostas de múltiplos especialistas em uma resposta coerente.
+        Faz o roteamento e, com a especulação ativa, adianta a resposta do especialista
+        mais provável enquanto o modelo decide.
+        
+        Returns:
+            A lista de especialistas indicados e a _Especulacao em andamento (ou None)
         """
-        prompt = f"""
-        {self.personalidade}
+        resultado = self.roteador.rotear(mensagem)
+        if (not self.especulacao or not resultado.especialistas
+                or not self.confianca_especulacao <= resultado.confianca < self.limiar_confianca
+                or resultado.especialistas[0] not in self.especialistas):
+            return await self._analisar_intencao(mensagem, resultado), None
         
-        Você recebeu respostas de múltiplos especialistas para a seguinte solicitação do usuário:
-        "{mensagem}"
+        nome = resultado.especialistas[0]
+        especulacao = _Especulacao(nome, self._responder_especialista_em_partes(nome, mensagem, historico, transmitir))
+        self.contadores_especulacao["iniciadas"] += 1
+        try:
+            return await self._analisar_intencao(mensagem, resultado), especulacao
+        except BaseException:
+            especulacao.cancelar()
+            raise
+    
+    async def _consultar_especialistas(self, mensagem, nomes, historico, especulacao=None):
+        """
+        Consulta vários especialistas e gera pares (nome, resposta) à medida que cada
+        um termina.
         
-        Respostas dos especialistas:
-        {"".join(respostas)}
+        No modo concorrente as consultas são disparadas juntas (no máximo `max_paralelo`
+        ao mesmo tempo), de modo que o tempo total se aproxima do especialista mais lento
+        e não da soma de todos. A resposta de um especialista que falha ou ultrapassa
+        `timeout_especialista` é None, e os demais resultados são aproveitados normalmente.
+        A resposta já iniciada por uma `especulacao` é aproveitada em vez de uma nova consulta.
+        """
+        # Todos os especialistas recebem o mesmo contexto, sem as respostas dos colegas deste turno
+        # (os registros só são acrescentados ao histórico depois que todos terminam)
+        limite = asyncio.Semaphore(self.max_paralelo if self.modo_concorrente else 1)
         
-        Integre essas respostas em uma única resposta coerente e abrangente.
-        Mantenha as informações técnicas importantes de cada especialista, mas evite repetições.
-        Organize a resposta de forma lógica e fluida, como se fosse uma única análise completa.
+        async def consultar(nome):
+            async with limite:
+                if especulacao is not None and nome == especulacao.nome:
+                    consulta = especulacao.texto()
+                else:
+                    consulta = self._responder_especialista(nome, mensagem, historico)
+                try:
+                    return nome, await asyncio.wait_for(consulta, self.timeout_especialista)
+                except asyncio.TimeoutError:
+                    print(f"Especialista '{nome}' não respondeu em {self.timeout_especialista}s.")
+                except Exception as erro:
+                    print(f"Especialista '{nome}' falhou: {erro}")
+                return nome, None
+        
+        for proxima in asyncio.as_completed([consultar(nome) for nome in nomes]):
+            yield await proxima
+    
+    async def _responder_especialista(self, nome, mensagem, historico):
+        """Consulta um especialista pela API assíncrona (ou em uma thread, se ele só tiver `responder`)."""
+        especialista = self.especialistas[nome]
+        if hasattr(especialista, "responder_async"):
+            return await especialista.responder_async(mensagem, historico)
+        return await asyncio.to_thread(especialista.responder, mensagem, historico)
+    
+    async def _responder_especialista_em_partes(self, nome, mensagem, historico, transmitir):
+        """Gera a resposta de um especialista em partes quando `transmitir` e ele oferecer streaming."""
+        especialista = self.especialistas[nome]
+        if transmitir and hasattr(especialista, "responder_stream_async"):
+            async for parte in especialista.responder_stream_async(mensagem, historico):
+                yield parte
+        else:
+            yield await self._responder_especialista(nome, mensagem, historico)
+    
+    def integrar_respostas(self, mensagem, especialistas, respostas):
+        """Versão síncrona de `integrar_respostas_async`."""
+        return executar_sincrono(self.integrar_respostas_async(mensagem, especialistas, respostas))
+    
+    async def integrar_respostas_async(self, mensagem, especialistas, respostas):
+        """
+        Integra as respostas de múltiplos especialistas em uma resposta coerente.
+        """
+        partes = []
+        async for parte in self._integrar(mensagem, especialistas, respostas, transmitir=False):
+            partes.append(parte)
+        return "".join(partes)
+    
+    async def _integrar(self, mensagem, especialistas, respostas, transmitir):
         """
+        Gera a resposta integrada em um ou mais trechos.
         
-        resposta = self.modelo.generate_content(prompt)
-        return f"Com base na análise de nossos especialistas ({', '.join(especialistas)}), posso informar que:\n\n{resposta.text}"
+        Conforme a `estrategia_integracao`, as respostas são juntadas localmente ou
+        integradas pelo modelo, consultando antes o cache.
+        """
+        cabecalho = f"Com base na análise de nossos especialistas ({', '.join(especialistas)}), posso informar que:\n\n"
+        with self.instrumentacao.medir("integracao", "AgenteGerente") as medicao:
+            if self.estrategia_integracao != INTEGRACAO_MODELO:
+                # As respostas chegam no formato "[nome]:\n<texto>"
+                extrativa = integrar_extrativo(
+                    [(nome, resposta.removeprefix(f"[{nome}]:\n")) for nome, resposta in zip(especialistas, respostas)])
+                if (self.estrategia_integracao == INTEGRACAO_EXTRATIVA
+                        or (extrativa.caracteres < self.limite_integracao_local
+                            and extrativa.sobreposicao < self.limiar_sobreposicao)):
+                    medicao.anotar("extrativa")
+                    texto = cabecalho + extrativa.texto
+                    medicao.registrar_resposta(texto)
+                    yield texto
+                    return
+            medicao.anotar("modelo")
+            
+            chave = None
+            if self.cache is not None:
+                chave = chave_cache("AgenteGerente", mensagem, resumo_textos(respostas))
+                resposta_guardada = self.cache.obter(chave)
+                medicao.registrar_cache(resposta_guardada is not None)
+                if resposta_guardada is not None:
+                    medicao.registrar_resposta(resposta_guardada)
+                    yield resposta_guardada
+                    return
+            
+            prompt = f"""
+            Você recebeu respostas de múltiplos especialistas para a seguinte solicitação do usuário:
+            "{mensagem}"
+            
+            Respostas dos especialistas:
+            {"".join(respostas)}
+            """
+            medicao.registrar_prompt(prompt)
+            
+            partes = [cabecalho]
+            yield cabecalho
+            if transmitir:
+                async for parte in self.modelo.gerar_stream(prompt, medicao, self.instrucao_integracao):
+                    partes.append(parte)
+                    yield parte
+            else:
+                resposta = await self.modelo.gerar(prompt, medicao, self.instrucao_integracao)
+                partes.append(resposta)
+                yield resposta
+            texto = "".join(partes)
+            medicao.registrar_resposta(texto)
+            if chave is not None:
+                self.cache.guardar(chave, texto)
     
     def exibir_resposta(self, resposta):
-        """Exibe a resposta formatada no notebook."""
-        display(Markdown(resposta))
+        """
+        Exibe a resposta formatada no notebook.
+        
+        Aceita um texto ou um iterável de trechos (como o retornado por
+        `processar_mensagem_stream`); neste caso a célula é atualizada a cada trecho
+        e o texto completo é retornado ao final.
+        """
+        # O IPython só é necessário para exibir respostas em notebooks
+        from IPython.display import display, Markdown
+        
+        if isinstance(resposta, str):
+            display(Markdown(resposta))
+            return resposta
+        
+        texto = ""
+        saida = display(Markdown(texto), display_id=True)
+        for parte in resposta:
+            texto += parte
+            saida.update(Markdown(texto))
+        return texto
@@ -6,71 +6,63 @@ Desenvolvido para a Imersão Lura (Alura + Google Gemini)
 """
 
 import os
-import google.generativeai as genai
-from IPython.display import display, Markdown
 
 # Importação dos módulos dos agentes
 from agente_gerente import AgenteGerente
-from especialista_culturas import EspecialistaCulturas
-from meteorologista import Meteorologista
-from especialista_pragas import EspecialistaPragas
-from especialista_irrigacao import EspecialistaIrrigacao
-from especialista_financeiro import EspecialistaFinanceiro
-from especialista_visualizacao import EspecialistaVisualizacao
-from especialista_solo import EspecialistaSolo
-from especialista_fertilizacao import EspecialistaFertilizacao
-from especialista_sustentabilidade import EspecialistaSustentabilidade
+from backend_modelo import BackendGemini
+from cliente_modelo import ClienteModelo
+from especialista_base import EspecialistaAdiado
+from especialista_generico import EspecialistaGenerico, carregar_catalogo
 
-def iniciar_agrismart(api_key):
+def iniciar_agrismart(api_key=None, backend=None, catalogo=None, limites=None, persistencia=None):
     """
     Inicializa o sistema AgriSmart com todos os agentes.
     
+    Os especialistas vêm do catálogo `especialistas.json` e são registrados sem serem
+    criados: o índice de roteamento é montado diretamente a partir do catálogo, cada
+    especialista é criado apenas quando o gerente precisa dele, e o SDK do Gemini só é
+    importado na primeira consulta ao modelo.
+    
     Args:
         api_key: Chave da API Gemini fornecida pelo usuário
+        backend: BackendModelo compartilhado por todos os agentes (por padrão, o Gemini);
+            use um BackendFalso para testar o sistema sem rede
+        catalogo: Caminho de um catálogo de especialistas alternativo
+        limites: Opções do ClienteModelo compartilhado pelos agentes, como
+            `requisicoes_por_minuto`, `tokens_por_minuto` e `max_tentativas`
+        persistencia: Arquivo SQLite onde as conversas são gravadas, para retomá-las
+            depois de reiniciar o kernel ou o processo (None mantém as conversas só em memória)
         
     Returns:
         O agente gerente inicializado com todos os especialistas registrados
     """
+    # Configura o modelo usado pelo gerente e pelos especialistas, protegido por um único
+    # cliente com limite de taxa, novas tentativas e disjuntor
+    modelo = backend if backend is not None else BackendGemini(api_key)
+    if not isinstance(modelo, ClienteModelo):
+        modelo = ClienteModelo(modelo, **(limites or {}))
+    
     # Inicializa o agente gerente
-    gerente = AgenteGerente(api_key)
-    
-    # Configura o modelo Gemini para os especialistas
-    modelo = genai.GenerativeModel('gemini-pro')
-    
-    # Inicializa e registra os especialistas
-    especialista_culturas = EspecialistaCulturas(modelo)
-    meteorologista = Meteorologista(modelo)
-    especialista_pragas = EspecialistaPragas(modelo)
-    especialista_irrigacao = EspecialistaIrrigacao(modelo)
-    especialista_financeiro = EspecialistaFinanceiro(modelo)
-    especialista_visualizacao = EspecialistaVisualizacao(modelo)
-    especialista_solo = EspecialistaSolo(modelo)
-    especialista_fertilizacao = EspecialistaFertilizacao(modelo)
-    especialista_sustentabilidade = EspecialistaSustentabilidade(modelo)
-    
-    # Registra os especialistas no gerente
-    gerente.registrar_especialista("Especialista em Culturas", especialista_culturas)
-    gerente.registrar_especialista("Meteorologista", meteorologista)
-    gerente.registrar_especialista("Especialista em Pragas e Doenças", especialista_pragas)
-    gerente.registrar_especialista("Especialista em Irrigação", especialista_irrigacao)
-    gerente.registrar_especialista("Especialista Financeiro", especialista_financeiro)
-    gerente.registrar_especialista("Especialista em Design e Visualização", especialista_visualizacao)
-    gerente.registrar_especialista("Especialista em Análise de Solo", especialista_solo)
-    gerente.registrar_especialista("Especialista em Fertilização", especialista_fertilizacao)
-    gerente.registrar_especialista("Especialista em Sustentabilidade", especialista_sustentabilidade)
+    sessoes = None
+    if persistencia is not None:
+        from persistencia import PersistenciaSQLite
+        from sessoes import GerenciadorSessoes
+
+        sessoes = GerenciadorSessoes(persistencia=PersistenciaSQLite(persistencia))
+    gerente = AgenteGerente(api_key, backend=modelo, sessoes=sessoes)
+    
+    # Registra os especialistas do catálogo no gerente
+    definicoes = carregar_catalogo(catalogo)
+    for nome, definicao in definicoes.items():
+        gerente.registrar_especialista(nome, EspecialistaAdiado(EspecialistaGenerico, modelo, definicao),
+                                       perfil=definicao.personalidade, palavras_chave=definicao.palavras_chave,
+                                       descricao=definicao.descricao)
     
     print("Sistema AgriSmart inicializado com sucesso!")
     print("Agentes registrados:")
     print("- Agente Gerente")
-    print("- Especialista em Culturas")
-    print("- Meteorologista")
-    print("- Especialista em Pragas e Doenças")
-    print("- Especialista em Irrigação")
-    print("- Especialista Financeiro")
-    print("- Especialista em Design e Visualização")
-    print("- Especialista em Análise de Solo")
-    print("- Especialista em Fertilização")
-    print("- Especialista em Sustentabilidade")
+    for nome in definicoes:
+        print(f"- {nome}")
     
     return gerente
 
@@ -158,18 +150,12 @@ def exemplo_uso():
     
     ## Personalização
     
-    Você pode personalizar os agentes especialistas modificando seus arquivos de definição:
-    - `especialista_culturas.py`
-    - `meteorologista.py`
-    - `especialista_pragas.py`
-    - `especialista_irrigacao.py`
-    - `especialista_financeiro.py`
-    - `especialista_visualizacao.py`
-    - `especialista_solo.py`
-    - `especialista_fertilizacao.py`
-    - `especialista_sustentabilidade.py`
-    
-    Para adicionar novos especialistas, crie um novo arquivo seguindo o mesmo padrão e registre-o no `agente_gerente`.
+    Os agentes especialistas são definidos no catálogo `especialistas.json`: cada entrada tem
+    o nome do especialista, a sua personalidade, as instruções de resposta e palavras-chave
+    usadas no roteamento.
+    
+    Para adicionar um novo especialista, acrescente uma entrada ao catálogo; ele é registrado
+    automaticamente por `iniciar_agrismart`.
     """
     
     return markdown_exemplo
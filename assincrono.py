@@ -0,0 +1,82 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Execução assíncrona - Permite usar a API assíncrona dos agentes a partir de código síncrono
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import asyncio
+import threading
+
+_loop = None
+_trava = threading.Lock()
+
+
+def _obter_loop():
+    """Retorna o loop de eventos compartilhado, criando-o em uma thread dedicada na primeira chamada."""
+    global _loop
+    with _trava:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agrismart-loop", daemon=True).start()
+    return _loop
+
+
+def executar_sincrono(corrotina):
+    """
+    Executa uma corrotina e aguarda o seu resultado de forma bloqueante.
+
+    As corrotinas rodam sempre no mesmo loop de eventos, mantido em uma thread própria.
+    Assim os métodos síncronos funcionam tanto em scripts quanto em notebooks (onde já
+    existe um loop em execução) e os clientes assíncronos do modelo permanecem ligados
+    a um único loop.
+
+    Args:
+        corrotina: A corrotina a ser executada
+
+    Returns:
+        O valor retornado pela corrotina
+    """
+    loop = _verificar_fora_do_loop(corrotina.close)
+    return asyncio.run_coroutine_threadsafe(corrotina, loop).result()
+
+
+def iterar_sincrono(gerador):
+    """
+    Percorre um gerador assíncrono a partir de código síncrono.
+
+    Cada item é obtido no loop compartilhado e entregue assim que fica pronto, o que
+    permite consumir respostas em fluxo (streaming) com um simples `for`.
+
+    Args:
+        gerador: O gerador assíncrono a ser percorrido
+
+    Yields:
+        Os itens produzidos pelo gerador
+    """
+    loop = _verificar_fora_do_loop(lambda: None)
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(_proximo(gerador), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(gerador.aclose(), loop).result()
+
+
+async def _proximo(gerador):
+    return await gerador.__anext__()
+
+
+def _verificar_fora_do_loop(liberar):
+    """Retorna o loop compartilhado, recusando chamadas bloqueantes feitas de dentro dele."""
+    loop = _obter_loop()
+    try:
+        em_execucao = asyncio.get_running_loop()
+    except RuntimeError:
+        em_execucao = None
+    if em_execucao is loop:
+        liberar()
+        raise RuntimeError("Métodos síncronos não podem ser chamados dentro do loop do AgriSmart; use a versão *_async.")
+    return loop
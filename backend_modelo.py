@@ -0,0 +1,379 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Backend do Modelo - Interface comum para o modelo de linguagem usado pelos agentes
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import asyncio
+import concurrent.futures
+import datetime
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+
+# Vocabulário usado pelo backend falso para compor respostas plausíveis
+PALAVRAS_FALSAS = (
+    "solo", "plantio", "colheita", "irrigação", "adubação", "manejo", "cultivar", "safra",
+    "umidade", "chuva", "praga", "controle", "nutrientes", "produtividade", "hectare", "custo",
+    "recomenda-se", "observar", "período", "semanas", "aplicação", "monitoramento", "folhas",
+    "raízes", "clima", "temperatura", "região", "técnico", "análise", "resultado",
+)
+
+
+class ErroBackend(Exception):
+    """Erro ao obter uma resposta do modelo."""
+
+
+class BackendModelo:
+    """
+    Interface do modelo de linguagem consultado pelos agentes.
+
+    Um backend recebe o prompt pronto e devolve o texto gerado, de uma vez (`gerar`)
+    ou em trechos (`gerar_stream`). Os agentes dependem apenas desta interface, de modo
+    que o Gemini pode ser trocado por outro modelo ou por um backend simulado.
+
+    O texto fixo de cada agente (a sua persona) é passado à parte, em `instrucao_sistema`,
+    para que o backend possa registrá-lo uma única vez e enviar a cada chamada apenas a
+    parte variável. Backends sem esse recurso simplesmente o colocam antes do prompt.
+    """
+
+    async def gerar(self, prompt, uso=None, instrucao_sistema=None):
+        """
+        Gera a resposta completa para o prompt.
+
+        Args:
+            prompt: O texto enviado ao modelo
+            uso: Medição opcional (ver instrumentacao.Medicao) em que o backend registra
+                os tokens consumidos e o que deixou de ser reenviado
+            instrucao_sistema: Texto fixo do agente que antecede o prompt
+
+        Returns:
+            O texto gerado
+        """
+        raise NotImplementedError
+
+    async def gerar_stream(self, prompt, uso=None, instrucao_sistema=None):
+        """Gera a resposta em trechos; por padrão, um único trecho com a resposta completa."""
+        yield await self.gerar(prompt, uso, instrucao_sistema)
+
+    @staticmethod
+    def _prefixar(prompt, instrucao_sistema):
+        """Junta a instrução de sistema ao prompt, para modelos que não a aceitam separadamente."""
+        return f"{instrucao_sistema}\n\n{prompt}" if instrucao_sistema else prompt
+
+
+class BackendGemini(BackendModelo):
+    """
+    Backend que consulta o Google Gemini pela API assíncrona do `google.generativeai`.
+
+    O SDK só é importado (e o modelo criado) na primeira chamada, o que mantém rápida
+    a inicialização de processos que talvez nem cheguem a consultar o modelo.
+
+    Para cada instrução de sistema distinta é criado, uma única vez, um modelo próprio.
+    Com `cache_contexto=True` a instrução é guardada no cache de contexto da API
+    (CachedContent), e as chamadas seguintes não a reenviam nem pagam por ela o preço
+    cheio dos tokens de entrada; se a API recusar o cache (por exemplo, porque o texto
+    tem menos tokens que o mínimo exigido), a instrução vai como `system_instruction`.
+    Chamadas simultâneas com uma instrução nova esperam pela mesma criação, de modo que
+    cada instrução ocupa uma única entrada (paga) no cache de contexto.
+
+    O modelo padrão aceita instrução de sistema e cache de contexto; com os modelos de
+    MODELOS_SEM_INSTRUCAO (como "gemini-pro"), a instrução volta a ir inteira em cada prompt.
+    """
+
+    # Modelos que não aceitam instrução de sistema; nestes ela é colocada antes do prompt
+    MODELOS_SEM_INSTRUCAO = ("gemini-pro", "gemini-1.0-pro")
+
+    # Modelo usado quando nenhum é informado (versão fixa, exigida pelo cache de contexto)
+    MODELO_PADRAO = "gemini-1.5-flash-002"
+
+    def __init__(self, api_key=None, nome_modelo=MODELO_PADRAO, modelo=None, cache_contexto=True, ttl_cache=3600):
+        """
+        Args:
+            api_key: Chave da API Gemini (None se a API já estiver configurada)
+            nome_modelo: Nome do modelo Gemini a ser usado
+            modelo: Um `genai.GenerativeModel` já criado, usado no lugar de `nome_modelo`
+            cache_contexto: Tenta guardar as instruções de sistema no cache de contexto da API
+            ttl_cache: Validade, em segundos, de cada instrução no cache de contexto
+        """
+        self.api_key = api_key
+        self.nome_modelo = getattr(modelo, "model_name", None) or nome_modelo
+        self.cache_contexto = cache_contexto
+        self.ttl_cache = ttl_cache
+        self._modelo = modelo
+        self._sdk = None
+        self._modelos = {}
+        # Criações em andamento, por instrução (concurrent.futures.Future: servem a qualquer loop)
+        self._criacoes = {}
+        self._trava = threading.Lock()
+
+    def _obter_sdk(self):
+        """Importa e configura o SDK do Gemini na primeira vez que ele é necessário."""
+        if self._sdk is None:
+            import google.generativeai as genai
+
+            if self.api_key:
+                genai.configure(api_key=self.api_key)
+            self._sdk = genai
+        return self._sdk
+
+    @property
+    def modelo(self):
+        """O `genai.GenerativeModel` consultado, criado no primeiro uso."""
+        if self._modelo is None:
+            self._modelo = self._obter_sdk().GenerativeModel(self.nome_modelo)
+        return self._modelo
+
+    @property
+    def aceita_instrucao_sistema(self):
+        return self.nome_modelo.rsplit("/", 1)[-1] not in self.MODELOS_SEM_INSTRUCAO
+
+    async def _preparar(self, prompt, instrucao_sistema):
+        """Retorna o modelo a consultar, o prompt a enviar e se a instrução está no cache de contexto."""
+        if not instrucao_sistema:
+            return self.modelo, prompt, False
+        if not self.aceita_instrucao_sistema:
+            return self.modelo, self._prefixar(prompt, instrucao_sistema), False
+
+        entrada = self._modelos.get(instrucao_sistema)
+        if entrada is None or entrada[2] < time.monotonic():
+            entrada = await self._obter_modelo(instrucao_sistema)
+        return entrada[0], prompt, entrada[1]
+
+    async def _obter_modelo(self, instrucao_sistema):
+        """Cria o modelo de uma instrução de sistema, ou espera pela criação que já estiver em andamento."""
+        with self._trava:
+            entrada = self._modelos.get(instrucao_sistema)
+            if entrada is not None and entrada[2] >= time.monotonic():
+                return entrada
+            futuro = self._criacoes.get(instrucao_sistema)
+            if futuro is not None:
+                criar = False
+            else:
+                criar = True
+                futuro = self._criacoes[instrucao_sistema] = concurrent.futures.Future()
+        if not criar:
+            return await asyncio.wrap_future(futuro)
+        try:
+            # A criação do cache de contexto é uma chamada bloqueante ao serviço
+            entrada = await asyncio.to_thread(self._criar_modelo, instrucao_sistema)
+            self._modelos[instrucao_sistema] = entrada
+            futuro.set_result(entrada)
+            return entrada
+        except BaseException as erro:
+            futuro.set_exception(erro)
+            raise
+        finally:
+            with self._trava:
+                self._criacoes.pop(instrucao_sistema, None)
+
+    def _criar_modelo(self, instrucao_sistema):
+        """Cria o modelo de uma instrução de sistema: (modelo, em_cache, validade)."""
+        genai = self._obter_sdk()
+        if self.cache_contexto:
+            try:
+                conteudo = genai.caching.CachedContent.create(
+                    model=self.nome_modelo, system_instruction=instrucao_sistema,
+                    ttl=datetime.timedelta(seconds=self.ttl_cache),
+                )
+                # Renova um pouco antes de expirar
+                return genai.GenerativeModel.from_cached_content(conteudo), True, time.monotonic() + 0.9 * self.ttl_cache
+            except Exception:
+                pass
+        return genai.GenerativeModel(self.nome_modelo, system_instruction=instrucao_sistema), False, math.inf
+
+    async def gerar(self, prompt, uso=None, instrucao_sistema=None):
+        modelo, prompt, em_cache = await self._preparar(prompt, instrucao_sistema)
+        resposta = await modelo.generate_content_async(prompt)
+        self._registrar_uso(resposta, uso, instrucao_sistema if em_cache else None)
+        return resposta.text
+
+    async def gerar_stream(self, prompt, uso=None, instrucao_sistema=None):
+        modelo, prompt, em_cache = await self._preparar(prompt, instrucao_sistema)
+        pedaco = None
+        async for pedaco in await modelo.generate_content_async(prompt, stream=True):
+            yield pedaco.text
+        # No streaming, a contagem de tokens acompanha o último trecho
+        self._registrar_uso(pedaco, uso, instrucao_sistema if em_cache else None)
+
+    @staticmethod
+    def _registrar_uso(resposta, uso, instrucao_em_cache):
+        if uso is None:
+            return
+        metadados = getattr(resposta, "usage_metadata", None)
+        if metadados is not None:
+            uso.registrar_uso(getattr(metadados, "prompt_token_count", 0),
+                              getattr(metadados, "candidates_token_count", 0),
+                              getattr(metadados, "cached_content_token_count", 0))
+        if instrucao_em_cache:
+            uso.registrar_economia(len(instrucao_em_cache.encode("utf-8")))
+
+
+class BackendFalso(BackendModelo):
+    """
+    Backend local e determinístico, para testes de carga sem rede.
+
+    O tempo até o primeiro trecho segue a distribuição escolhida e o restante da
+    resposta é entregue à taxa de `tokens_por_segundo`. As respostas, as latências e
+    as falhas injetadas dependem apenas da `semente`, do prompt e de quantas vezes o
+    mesmo prompt já foi recebido, e não da ordem em que as chamadas concorrentes são
+    atendidas; assim duas execuções do mesmo teste se comportam igual.
+    """
+
+    DISTRIBUICOES = ("fixa", "uniforme", "exponencial", "lognormal")
+
+    def __init__(self, latencia=0.5, distribuicao="lognormal", dispersao=0.5, tokens_por_segundo=60.0,
+                 tokens_resposta=(120, 400), tokens_por_trecho=8, taxa_falhas=0.0, taxa_travamentos=0.0,
+                 tempo_travamento=120.0, semente=0, responder=None, cache_contexto=True):
+        """
+        Args:
+            latencia: Tempo típico (mediana), em segundos, até o primeiro trecho da resposta
+            distribuicao: "fixa", "uniforme" (de 0 a 2x a latência), "exponencial" ou "lognormal"
+            dispersao: Desvio padrão do logaritmo da latência na distribuição lognormal
+            tokens_por_segundo: Velocidade de geração depois do primeiro trecho (0 para instantâneo)
+            tokens_resposta: Faixa (mínimo, máximo) da quantidade de tokens de cada resposta
+            tokens_por_trecho: Quantidade de tokens em cada trecho de `gerar_stream`
+            taxa_falhas: Fração das chamadas que terminam com ErroBackend
+            taxa_travamentos: Fração das chamadas que só respondem após `tempo_travamento` segundos
+            tempo_travamento: Duração, em segundos, de uma chamada travada
+            semente: Semente dos sorteios
+            responder: Função opcional prompt -> texto que substitui o texto gerado (quando
+                ela retorna None, o texto é gerado normalmente)
+            cache_contexto: Simula o cache de contexto: cada instrução de sistema só é
+                contabilizada como enviada na primeira chamada que a usa
+        """
+        if distribuicao not in self.DISTRIBUICOES:
+            raise ValueError(f"Distribuição de latência desconhecida: {distribuicao}")
+        self.latencia = latencia
+        self.distribuicao = distribuicao
+        self.dispersao = dispersao
+        self.tokens_por_segundo = tokens_por_segundo
+        self.tokens_resposta = tokens_resposta
+        self.tokens_por_trecho = tokens_por_trecho
+        self.taxa_falhas = taxa_falhas
+        self.taxa_travamentos = taxa_travamentos
+        self.tempo_travamento = tempo_travamento
+        self.semente = semente
+        self.responder = responder
+        self.cache_contexto = cache_contexto
+        self._instrucoes_registradas = set()
+        self._ocorrencias = Counter()
+        self.chamadas = 0
+        self.falhas = 0
+        self.travamentos = 0
+        self.bytes_prompt = 0
+        self.bytes_economizados = 0
+        self.tokens_economizados = 0
+        self.tokens_gerados = 0
+        self.em_andamento = 0
+        self.max_simultaneas = 0
+
+    def _sorteador(self, prompt):
+        """Gerador de números aleatórios próprio desta chamada."""
+        assinatura = zlib.crc32(prompt.encode("utf-8"))
+        ocorrencia = self._ocorrencias[assinatura]
+        self._ocorrencias[assinatura] += 1
+        return random.Random(f"{self.semente}:{assinatura}:{ocorrencia}")
+
+    def _sortear_latencia(self, sorteador):
+        if self.distribuicao == "fixa":
+            return self.latencia
+        if self.distribuicao == "uniforme":
+            return sorteador.uniform(0, 2 * self.latencia)
+        if self.distribuicao == "exponencial":
+            return sorteador.expovariate(1 / self.latencia) if self.latencia else 0.0
+        return sorteador.lognormvariate(math.log(self.latencia), self.dispersao) if self.latencia else 0.0
+
+    def _texto(self, prompt, sorteador):
+        texto = self.responder(prompt) if self.responder is not None else None
+        if texto is not None:
+            return texto.split(" ")
+        quantidade = sorteador.randint(*self.tokens_resposta)
+        return [sorteador.choice(PALAVRAS_FALSAS) for _ in range(quantidade)]
+
+    async def gerar(self, prompt, uso=None, instrucao_sistema=None):
+        partes = []
+        async for parte in self.gerar_stream(prompt, uso, instrucao_sistema):
+            partes.append(parte)
+        return "".join(partes)
+
+    def _contabilizar_envio(self, prompt, instrucao_sistema, uso):
+        """
+        Soma os bytes enviados, descontando as instruções de sistema já registradas.
+
+        Returns:
+            True se a instrução de sistema já estava no cache de contexto simulado
+        """
+        enviados = len(prompt.encode("utf-8"))
+        if instrucao_sistema:
+            tamanho = len(instrucao_sistema.encode("utf-8"))
+            if self.cache_contexto and instrucao_sistema in self._instrucoes_registradas:
+                self.bytes_economizados += tamanho
+                self.tokens_economizados += len(instrucao_sistema) // 4
+                if uso is not None:
+                    uso.registrar_economia(tamanho)
+                self.bytes_prompt += enviados
+                return True
+            self._instrucoes_registradas.add(instrucao_sistema)
+            enviados += tamanho
+        self.bytes_prompt += enviados
+        return False
+
+    async def gerar_stream(self, prompt, uso=None, instrucao_sistema=None):
+        # Os sorteios dependem do texto completo, com ou sem cache de contexto
+        texto = self._prefixar(prompt, instrucao_sistema)
+        sorteador = self._sorteador(texto)
+        self.chamadas += 1
+        em_cache = self._contabilizar_envio(prompt, instrucao_sistema, uso)
+        self.em_andamento += 1
+        self.max_simultaneas = max(self.max_simultaneas, self.em_andamento)
+        try:
+            sorteio = sorteador.random()
+            espera = self._sortear_latencia(sorteador)
+            if sorteio < self.taxa_travamentos:
+                self.travamentos += 1
+                espera = self.tempo_travamento
+            await asyncio.sleep(espera)
+            if sorteio >= 1 - self.taxa_falhas:
+                self.falhas += 1
+                raise ErroBackend("Falha simulada pelo backend falso")
+
+            palavras = self._texto(texto, sorteador)
+            self.tokens_gerados += len(palavras)
+            if uso is not None:
+                # Estimativa de cerca de 4 caracteres por token para o prompt
+                uso.registrar_uso(len(texto) // 4, len(palavras), len(instrucao_sistema) // 4 if em_cache else 0)
+            for inicio in range(0, len(palavras), self.tokens_por_trecho):
+                trecho = palavras[inicio:inicio + self.tokens_por_trecho]
+                if inicio:
+                    if self.tokens_por_segundo:
+                        await asyncio.sleep(len(trecho) / self.tokens_por_segundo)
+                    yield " " + " ".join(trecho)
+                else:
+                    yield " ".join(trecho)
+        finally:
+            self.em_andamento -= 1
+
+    def estatisticas(self):
+        """Retorna os contadores de chamadas, falhas, volume de prompts e simultaneidade."""
+        return {
+            "chamadas": self.chamadas,
+            "falhas": self.falhas,
+            "travamentos": self.travamentos,
+            "bytes_prompt": self.bytes_prompt,
+            "bytes_economizados": self.bytes_economizados,
+            "tokens_economizados": self.tokens_economizados,
+            "tokens_gerados": self.tokens_gerados,
+            "max_simultaneas": self.max_simultaneas,
+        }
+
+
+def como_backend(modelo):
+    """Retorna `modelo` como BackendModelo, adaptando um `genai.GenerativeModel` se necessário."""
+    if modelo is None or isinstance(modelo, BackendModelo):
+        return modelo
+    return BackendGemini(modelo=modelo)
@@ -0,0 +1,118 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark do cache semântico - Latência de busca e memória do índice vetorial
+
+Uso:
+    python benchmarks/benchmark_cache_semantico.py
+    python benchmarks/benchmark_cache_semantico.py --tamanhos 10000 100000 --consultas 500
+
+Para não gastar minutos gerando embeddings, o índice é preenchido com vetores
+agrupados em torno dos embeddings de perguntas reais (com ruído), o que preserva
+a estrutura em grupos que o modo IVF explora.
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_semantico import EmbeddingLocal, IndiceVetorial
+
+MODELOS_PERGUNTA = [
+    "Qual a melhor época para plantar {cultura}?",
+    "Como controlar {praga} no {cultura}?",
+    "Qual o custo de produção de {cultura} por hectare?",
+    "Quanta água o {cultura} precisa em época de seca?",
+    "Qual adubo usar no {cultura} com deficiência de {nutriente}?",
+    "Como a geada afeta o {cultura}?",
+]
+CULTURAS = ["milho", "mandioca", "café", "banana", "feijão", "soja", "cana", "arroz"]
+PRAGAS = ["lagarta", "broca", "ferrugem", "cigarrinha", "pulgão"]
+NUTRIENTES = ["nitrogênio", "fósforo", "potássio", "boro", "zinco"]
+
+
+def gerar_perguntas():
+    """Gera perguntas combinando modelos, culturas, pragas e nutrientes."""
+    perguntas = set()
+    for modelo, cultura, praga, nutriente in itertools.product(MODELOS_PERGUNTA, CULTURAS, PRAGAS, NUTRIENTES):
+        perguntas.add(modelo.format(cultura=cultura, praga=praga, nutriente=nutriente))
+    return sorted(perguntas)
+
+
+def gerar_vetores(centros, quantidade, ruido, gerador):
+    """Gera vetores normalizados ao redor dos centros."""
+    escolhidos = centros[gerador.integers(0, len(centros), quantidade)]
+    vetores = escolhidos + gerador.normal(0, ruido, escolhidos.shape).astype(np.float32)
+    return vetores / np.linalg.norm(vetores, axis=1, keepdims=True)
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir(indice, consultas, referencia=None, tolerancia=0.01):
+    """
+    Mede a latência de busca e, se houver referência (similaridades exatas do índice
+    plano), a revocação@1: fração das buscas cujo vizinho encontrado tem similaridade
+    a menos de `tolerancia` da melhor possível.
+    """
+    latencias = []
+    acertos = 0
+    for i, consulta in enumerate(consultas):
+        inicio = time.perf_counter()
+        resultado = indice.buscar(consulta, k=1)
+        latencias.append((time.perf_counter() - inicio) * 1e6)
+        if referencia is not None and resultado and resultado[0][1] >= referencia[i] - tolerancia:
+            acertos += 1
+    return latencias, (acertos / len(consultas) if referencia is not None else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--ruido", type=float, default=0.02)
+    args = parser.parse_args()
+
+    embedding = EmbeddingLocal()
+    perguntas = gerar_perguntas()
+    inicio = time.perf_counter()
+    centros = np.stack([embedding(p) for p in perguntas])
+    por_embedding = (time.perf_counter() - inicio) / len(perguntas) * 1e6
+    print(f"Embedding local: {por_embedding:.1f} µs por pergunta ({len(perguntas)} perguntas distintas)\n")
+
+    gerador = np.random.default_rng(42)
+    print(f"{'itens':>9} {'modo':<10} {'memória MB':>11} {'construção s':>13} {'p50 µs':>9} {'p99 µs':>9} {'revocação@1':>12}")
+    for tamanho in args.tamanhos:
+        vetores = gerar_vetores(centros, tamanho, args.ruido, gerador)
+        consultas = gerar_vetores(centros, args.consultas, args.ruido, gerador)
+        referencia = None
+        for modo, quantizar in [("plano", False), ("plano", True), ("ivf", False), ("ivf", True)]:
+            num_listas = max(16, int(np.sqrt(tamanho)))
+            indice = IndiceVetorial(embedding.dimensao, modo=modo, quantizar=quantizar, num_listas=num_listas,
+                                    num_sondas=max(4, num_listas // 16))
+            inicio = time.perf_counter()
+            for bloco in range(0, tamanho, 100_000):
+                indice.adicionar(vetores[bloco:bloco + 100_000])
+            construcao = time.perf_counter() - inicio
+
+            latencias, revocacao = medir(indice, consultas, referencia)
+            if referencia is None:
+                referencia = [indice.buscar(c, k=1)[0][1] for c in consultas]
+                revocacao = 1.0
+            nome = f"{modo}{'-int8' if quantizar else ''}"
+            print(f"{tamanho:>9} {nome:<10} {indice.memoria_bytes() / 2**20:>11.1f} {construcao:>13.2f} "
+                  f"{percentil(latencias, 50):>9.0f} {percentil(latencias, 99):>9.0f} {revocacao:>12.2%}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark da seleção de contexto - Histórico completo x histórico relevante por especialista
+
+Uso:
+    python benchmarks/benchmark_contexto.py
+    python benchmarks/benchmark_contexto.py --conversas 50 --turnos 30 --orcamento 1000
+
+As conversas são montadas com as perguntas rotuladas do benchmark de roteamento: cada
+pergunta é respondida pelos especialistas esperados, com textos tirados das frases do
+catálogo do próprio especialista (como em benchmark_historico), e as respostas de
+vários especialistas são gravadas separadamente. A cada turno, o histórico entregue a
+cada especialista consultado é montado das duas formas e são comparados:
+
+- o tamanho do histórico no prompt (caracteres);
+- a retenção: das mensagens do usuário e das respostas do próprio especialista que
+  aparecem por inteiro no histórico completo, a fração que continua por inteiro no
+  histórico selecionado (uma aproximação da qualidade preservada);
+- o tempo de montagem do histórico (e, para o selecionado, o de uma nova montagem
+  para o mesmo especialista sem mudança na conversa, como ao repetir uma chamada).
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_roteamento import PERGUNTAS_ROTULADAS
+from contexto import SeletorContexto
+from especialista_generico import carregar_catalogo
+from historico import Historico
+from roteador import RoteadorLocal
+
+
+def frases_por_especialista():
+    """Frases da personalidade e das instruções de cada especialista do catálogo."""
+    frases = {}
+    for nome, definicao in carregar_catalogo().items():
+        texto = f"{definicao.personalidade}\n{definicao.instrucoes}"
+        frases[nome] = [frase.strip() for frase in re.split(r"(?<=[.:;])\s+|\n", texto) if len(frase.strip()) > 20]
+    return frases
+
+
+def gerar_conversas(quantidade, turnos, semente):
+    """Gera as conversas como listas de (pergunta, [(especialista, resposta), ...])."""
+    sorteador = random.Random(semente)
+    frases = frases_por_especialista()
+    conversas = []
+    for _ in range(quantidade):
+        conversa = []
+        for _ in range(turnos):
+            pergunta, esperados = sorteador.choice(PERGUNTAS_ROTULADAS)
+            respostas = [(nome, " ".join(sorteador.sample(frases[nome], min(len(frases[nome]), sorteador.randint(6, 14)))))
+                         for nome in esperados[:3]]
+            conversa.append((pergunta, respostas))
+        conversas.append(conversa)
+    return conversas
+
+
+def retencao(completo, selecionado, historico, nome):
+    """Fração das linhas do usuário e do especialista presentes no completo que continuam no selecionado."""
+    presentes = mantidas = 0
+    for item in historico:
+        if item["papel"] == "usuário" or item.get("nome") == nome:
+            linha = item["conteúdo"]
+            if linha in completo:
+                presentes += 1
+                mantidas += linha in selecionado
+    return mantidas / presentes if presentes else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversas", type=int, default=20)
+    parser.add_argument("--turnos", type=int, default=20)
+    parser.add_argument("--orcamento", type=int, default=1500, help="Tokens de histórico por especialista")
+    parser.add_argument("--limiar", type=float, default=0.5, help="Relevância mínima das respostas de outros especialistas")
+    parser.add_argument("--janela", type=int, default=6000, help="Janela, em caracteres, do histórico completo")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    roteador = RoteadorLocal()
+    for nome, definicao in carregar_catalogo().items():
+        roteador.indexar(nome, definicao.personalidade, definicao.palavras_chave)
+    seletor = SeletorContexto(roteador, args.orcamento, args.limiar)
+
+    tamanhos_completo, tamanhos_selecionado, retencoes = [], [], []
+    tempos_completo, tempos_selecionado, tempos_repetido = [], [], []
+    for conversa in gerar_conversas(args.conversas, args.turnos, args.semente):
+        historico = Historico()
+        for pergunta, respostas in conversa:
+            historico.append({"papel": "usuário", "conteúdo": pergunta})
+            for nome, _ in respostas:
+                inicio = time.perf_counter()
+                completo = historico.transcricao(args.janela)
+                tempos_completo.append(time.perf_counter() - inicio)
+                inicio = time.perf_counter()
+                selecionado = seletor.transcricao(nome, historico, args.janela)
+                tempos_selecionado.append(time.perf_counter() - inicio)
+                inicio = time.perf_counter()
+                seletor.transcricao(nome, historico, args.janela)
+                tempos_repetido.append(time.perf_counter() - inicio)
+                tamanhos_completo.append(len(completo))
+                tamanhos_selecionado.append(len(selecionado))
+                retencoes.append(retencao(completo, selecionado, historico, nome))
+            for nome, resposta in respostas:
+                historico.append({"papel": "especialista", "nome": nome, "conteúdo": resposta})
+
+    reducao = 1 - sum(tamanhos_selecionado) / sum(tamanhos_completo)
+    resultado = {
+        "consultas": len(tamanhos_completo),
+        "caracteres_historico": {
+            "completo": statistics.mean(tamanhos_completo),
+            "selecionado": statistics.mean(tamanhos_selecionado),
+        },
+        "reducao_prompt": reducao,
+        "retencao_usuario_e_proprio": statistics.mean(retencoes),
+        "montagem_us": {
+            "completo": statistics.mean(tempos_completo) * 1e6,
+            "selecionado": statistics.mean(tempos_selecionado) * 1e6,
+            "selecionado_repetido": statistics.mean(tempos_repetido) * 1e6,
+        },
+        "seletor": seletor.estatisticas,
+    }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark do histórico - Memória por 1.000 turnos: lista de dicionários x Historico
+
+Uso:
+    python benchmarks/benchmark_historico.py
+    python benchmarks/benchmark_historico.py --turnos 5000 --sessoes 20
+
+Cada turno é uma pergunta do usuário seguida da resposta de um especialista, com
+textos montados a partir das frases do catálogo de especialistas (português real, e
+não o vocabulário reduzido do BackendFalso, que se compactaria bem demais). A memória
+é medida com o tracemalloc enquanto as conversas são construídas, e o tempo de obter
+a transcrição de uma conversa é medido para um especialista que ainda não a tinha em
+memória (o caso em que a lista precisa ser percorrida inteira).
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from especialista_generico import carregar_catalogo
+from historico import Historico, TranscricaoIncremental
+
+
+def frases_catalogo():
+    """Frases das personalidades e instruções do catálogo, usadas como texto das mensagens."""
+    frases = []
+    for definicao in carregar_catalogo().values():
+        texto = f"{definicao.personalidade}\n{definicao.instrucoes}"
+        frases.extend(frase.strip() for frase in re.split(r"(?<=[.:;])\s+|\n", texto) if len(frase.strip()) > 20)
+    return frases
+
+
+def gerar_turnos(quantidade, semente):
+    """Gera os turnos como (pergunta, nome do especialista, partes da resposta)."""
+    sorteador = random.Random(semente)
+    frases = frases_catalogo()
+    nomes = list(carregar_catalogo())
+    turnos = []
+    for _ in range(quantidade):
+        pergunta = sorteador.choice(frases)
+        resposta = sorteador.sample(frases, sorteador.randint(8, 20))
+        turnos.append((pergunta, sorteador.choice(nomes), resposta))
+    return turnos
+
+
+def construir(turnos, sessoes, fabrica):
+    """Distribui os turnos entre as conversas, criando textos novos como chegariam do modelo."""
+    conversas = [fabrica() for _ in range(sessoes)]
+    for indice, (pergunta, nome, resposta) in enumerate(turnos):
+        conversa = conversas[indice % sessoes]
+        conversa.append({"papel": "usuário", "conteúdo": "".join(pergunta)})
+        conversa.append({"papel": "especialista", "nome": "".join(nome), "conteúdo": " ".join(resposta)})
+    return conversas
+
+
+def medir_memoria(turnos, sessoes, fabrica):
+    """Memória retida pelas conversas construídas com `fabrica`, em bytes."""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    conversas = construir(turnos, sessoes, fabrica)
+    gc.collect()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return depois - antes, conversas
+
+
+def medir_transcricao_fria(conversas, repeticoes=20):
+    """Tempo médio (ms) para obter a transcrição de cada conversa sem nada pré-renderizado."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for conversa in conversas:
+            transcricao = TranscricaoIncremental()
+            transcricao.atualizar(conversa)
+    return (time.perf_counter() - inicio) / (repeticoes * len(conversas)) * 1000
+
+
+def medir_transcricao_mantida(conversas, repeticoes=20):
+    """Tempo médio (ms) para obter a transcrição mantida pelo próprio Historico."""
+    for conversa in conversas:
+        conversa.transcricao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for conversa in conversas:
+            conversa.transcricao()
+    return (time.perf_counter() - inicio) / (repeticoes * len(conversas)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turnos", type=int, default=1000)
+    parser.add_argument("--sessoes", type=int, default=10, help="Conversas entre as quais os turnos são distribuídos")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    turnos = gerar_turnos(args.turnos, args.semente)
+    escala = 1000 / args.turnos
+    bytes_lista, listas = medir_memoria(turnos, args.sessoes, list)
+    bytes_historico, historicos = medir_memoria(turnos, args.sessoes, Historico)
+
+    resultado = {
+        "turnos": args.turnos,
+        "sessoes": args.sessoes,
+        "bytes_por_1000_turnos": {
+            "lista_dicionarios": bytes_lista * escala,
+            "historico": bytes_historico * escala,
+        },
+        "reducao_memoria": 1 - bytes_historico / bytes_lista,
+        "transcricao_ms": {
+            "lista_sem_cache": medir_transcricao_fria(listas),
+            "historico_mantida": medir_transcricao_mantida(historicos),
+        },
+    }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
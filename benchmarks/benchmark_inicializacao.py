@@ -0,0 +1,107 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark da inicialização - Tempo de partida a frio de `iniciar_agrismart`
+
+Uso:
+    python benchmarks/benchmark_inicializacao.py
+    python benchmarks/benchmark_inicializacao.py --revisao HEAD~1   # compara com outra versão
+
+Cada medição roda em um interpretador novo, para que nenhum módulo já esteja em
+memória. São medidos o tempo de importação de `agrismart`, o de `iniciar_agrismart`
+e o do primeiro roteamento, além de quais dependências pesadas e quantos
+especialistas já foram carregados em cada ponto. Com `--revisao`, a mesma medição é
+feita em uma cópia da versão indicada (extraída com `git archive`).
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script executado em cada interpretador novo; imprime as medições em JSON
+MEDICAO = r"""
+import contextlib, io, json, sys, time
+
+def carregados():
+    return {
+        "google.generativeai": "google.generativeai" in sys.modules,
+        "IPython": "IPython" in sys.modules,
+        "especialistas": sum(1 for nome in sys.modules if nome.startswith("especialista_") and nome not in ("especialista_base", "especialista_generico") or nome == "meteorologista"),
+    }
+
+resultado = {}
+inicio = time.perf_counter()
+import agrismart
+resultado["importacao_ms"] = (time.perf_counter() - inicio) * 1000
+resultado["apos_importacao"] = carregados()
+
+inicio = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    gerente = agrismart.iniciar_agrismart("chave-de-teste")
+resultado["inicializacao_ms"] = (time.perf_counter() - inicio) * 1000
+resultado["apos_inicializacao"] = carregados()
+
+if hasattr(gerente, "roteador"):
+    inicio = time.perf_counter()
+    gerente.roteador.rotear("Qual a melhor época para plantar mandioca?")
+    resultado["primeiro_roteamento_ms"] = (time.perf_counter() - inicio) * 1000
+    resultado["apos_roteamento"] = carregados()
+print(json.dumps(resultado))
+"""
+
+
+def medir(diretorio, repeticoes):
+    """Executa a medição `repeticoes` vezes em interpretadores novos dentro de `diretorio`."""
+    medicoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", MEDICAO], cwd=diretorio, capture_output=True, text=True,
+                               check=True, env=dict(os.environ, PYTHONPATH=os.pathsep.join(
+                                   [diretorio, os.environ.get("PYTHONPATH", "")])))
+        medicoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    resumo = {}
+    for chave, valor in medicoes[0].items():
+        if chave.endswith("_ms"):
+            resumo[chave] = statistics.median(medicao[chave] for medicao in medicoes)
+        else:
+            resumo[chave] = valor
+    return resumo
+
+
+def extrair_revisao(revisao, destino):
+    """Extrai os arquivos de uma revisão do git em `destino`."""
+    arquivo = subprocess.run(["git", "archive", "--format=tar", revisao], cwd=RAIZ, capture_output=True,
+                             check=True).stdout
+    subprocess.run(["tar", "-x", "-C", destino], input=arquivo, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--revisao", help="Revisão do git usada como referência (por exemplo HEAD~1)")
+    args = parser.parse_args()
+
+    resultado = {"atual": medir(RAIZ, args.repeticoes)}
+    if args.revisao:
+        with tempfile.TemporaryDirectory() as destino:
+            extrair_revisao(args.revisao, destino)
+            resultado[args.revisao] = medir(destino, args.repeticoes)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    if args.revisao:
+        print()
+        for etapa in ("importacao_ms", "inicializacao_ms", "primeiro_roteamento_ms"):
+            atual, referencia = resultado["atual"].get(etapa), resultado[args.revisao].get(etapa)
+            if atual is not None and referencia is not None:
+                print(f"{etapa:<24} {referencia:>9.1f} -> {atual:>9.1f} ms ({referencia / atual:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark da orquestração - Conversas completas contra um backend simulado
+
+Uso:
+    python benchmarks/benchmark_orquestracao.py
+    python benchmarks/benchmark_orquestracao.py --conversas 500 --simultaneas 50 --saida atual.json
+    python benchmarks/benchmark_orquestracao.py --saida atual.json --comparar anterior.json
+    python benchmarks/benchmark_orquestracao.py --integracao modelo extrativa adaptativa
+
+As conversas de agricultores partem das perguntas de `agrismart.exemplo_uso` e são
+reproduzidas contra o BackendFalso, sem rede. O resultado (vazão, latência por turno,
+bytes de prompt por turno, bytes e tokens de instrução de sistema poupados por conversa
+graças ao cache de contexto, CPU e memória por sessão) é emitido em JSON para que
+versões diferentes possam ser comparadas; `--sem-cache-contexto` mede o mesmo cenário
+reenviando as instruções de sistema em todas as chamadas. Com mais de uma estratégia em
+`--integracao`, o cenário é repetido para cada uma e a latência e a economia de tokens
+de cada estratégia são comparadas com as da primeira. `--selecionar-contexto` entrega
+a cada especialista só as partes da conversa relevantes para ele, e `--resumir` troca
+os turnos antigos das conversas longas por um resumo feito em segundo plano.
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agrismart
+from assincrono import executar_sincrono
+from backend_modelo import BackendFalso
+from instrumentacao import Instrumentacao, SinkMemoria
+from integracao import ESTRATEGIAS_INTEGRACAO
+
+# Perguntas de continuação, que dependem do contexto da conversa
+CONTINUACOES = [
+    "E para o milho, muda alguma coisa?",
+    "Quanto isso custa por hectare?",
+    "Pode detalhar melhor a primeira recomendação?",
+    "E se chover muito na próxima semana?",
+    "Isso vale também para a mandioca?",
+    "Qual o prazo ideal para fazer isso?",
+]
+
+# Métricas em que um valor maior é melhor (nas demais, menor é melhor)
+MAIOR_MELHOR = {"vazao_turnos_s"}
+
+# Métricas repetidas para cada estratégia de integração
+METRICAS_INTEGRACAO = ("latencia_p50_ms", "latencia_p95_ms", "chamadas_modelo_por_turno", "bytes_prompt_por_turno",
+                       "tokens_modelo_por_turno")
+
+
+def perguntas_exemplo():
+    """Extrai as perguntas usadas em `agrismart.exemplo_uso`."""
+    return re.findall(r'processar_mensagem\("([^"]+)"\)', inspect.getsource(agrismart.exemplo_uso))
+
+
+def gerar_conversas(quantidade, turnos, semente):
+    """
+    Monta conversas de vários turnos: uma saudação seguida de perguntas do exemplo,
+    intercaladas com perguntas de continuação.
+    """
+    sorteador = random.Random(semente)
+    perguntas = perguntas_exemplo()
+    saudacao, perguntas = perguntas[0], perguntas[1:]
+    conversas = []
+    for _ in range(quantidade):
+        conversa = [saudacao]
+        while len(conversa) < turnos:
+            if len(conversa) > 1 and sorteador.random() < 0.3:
+                conversa.append(sorteador.choice(CONTINUACOES))
+            else:
+                conversa.append(sorteador.choice(perguntas))
+        conversas.append(conversa)
+    return conversas
+
+
+def responder_roteamento(prompt):
+    """Responde às consultas de análise de intenção com um especialista válido."""
+    if "Especialista(s) mais adequado(s)" in prompt:
+        return "Especialista em Culturas"
+    return None
+
+
+def responder_simulado(prompt):
+    """Responde ao roteamento e aos pedidos de resumo no formato que o sistema espera."""
+    if "Novas interações:" in prompt:
+        return json.dumps({"cultura": "café", "area": "10 hectares", "ph_solo": "5,2", "regiao": "sul de Minas",
+                           "agua": "poço", "observacoes": ["Irrigação por gotejamento recomendada"]},
+                          ensure_ascii=False)
+    return responder_roteamento(prompt)
+
+
+def percentil(valores, p):
+    """Retorna o percentil p (0-100) de uma lista de valores."""
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def criar_backend(args, latencia=None):
+    return BackendFalso(latencia=args.latencia if latencia is None else latencia, distribuicao=args.distribuicao,
+                        tokens_por_segundo=args.tokens_por_segundo, taxa_falhas=args.taxa_falhas,
+                        semente=args.semente, responder=responder_simulado,
+                        cache_contexto=not args.sem_cache_contexto)
+
+
+def iniciar_silencioso(backend):
+    """Inicializa o sistema sem as mensagens de registro no terminal."""
+    saida = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        return agrismart.iniciar_agrismart(backend=backend)
+    finally:
+        sys.stdout.close()
+        sys.stdout = saida
+
+
+async def reproduzir(gerente, conversas, simultaneas):
+    """Reproduz as conversas, no máximo `simultaneas` ao mesmo tempo, e retorna as latências por turno."""
+    limite = asyncio.Semaphore(simultaneas)
+    latencias = []
+
+    async def conversar(indice, conversa):
+        async with limite:
+            for mensagem in conversa:
+                inicio = time.perf_counter()
+                await gerente.processar_mensagem_async(mensagem, f"sessao-{indice}")
+                latencias.append(time.perf_counter() - inicio)
+
+    await asyncio.gather(*(conversar(indice, conversa) for indice, conversa in enumerate(conversas)))
+    return latencias
+
+
+def medir_desempenho(args, conversas, integracao=None):
+    """Mede vazão, latência, CPU e bytes de prompt com o backend simulado."""
+    backend = criar_backend(args)
+    gerente = iniciar_silencioso(backend)
+    gerente.configurar_integracao(integracao or args.integracao[0])
+    gerente.limiar_confianca = args.limiar_confianca
+    gerente.configurar_especulacao(args.especular)
+    gerente.configurar_contexto(args.selecionar_contexto)
+    gerente.configurar_resumo(args.resumir)
+    medicoes = SinkMemoria()
+    if args.instrumentar:
+        gerente.configurar_instrumentacao(Instrumentacao(medicoes))
+    inicio, cpu_inicio = time.perf_counter(), time.process_time()
+    latencias = executar_sincrono(reproduzir(gerente, conversas, args.simultaneas))
+    duracao, cpu = time.perf_counter() - inicio, time.process_time() - cpu_inicio
+
+    turnos = len(latencias)
+    estatisticas = backend.estatisticas()
+    resultados = {
+        "turnos": turnos,
+        "duracao_s": duracao,
+        "vazao_turnos_s": turnos / duracao,
+        "latencia_p50_ms": percentil(latencias, 50) * 1000,
+        "latencia_p95_ms": percentil(latencias, 95) * 1000,
+        "latencia_p99_ms": percentil(latencias, 99) * 1000,
+        "chamadas_modelo_por_turno": estatisticas["chamadas"] / turnos,
+        "bytes_prompt_por_turno": estatisticas["bytes_prompt"] / turnos,
+        # Tokens de entrada (estimados em 4 bytes por token) e de saída
+        "tokens_modelo_por_turno": (estatisticas["bytes_prompt"] / 4 + estatisticas["tokens_gerados"]) / turnos,
+        "bytes_economizados_por_conversa": estatisticas["bytes_economizados"] / len(conversas),
+        "tokens_economizados_por_conversa": estatisticas["tokens_economizados"] / len(conversas),
+        "falhas_modelo": estatisticas["falhas"],
+        "novas_tentativas_modelo": gerente.modelo.estatisticas_cliente()["novas_tentativas"],
+        "max_chamadas_simultaneas": estatisticas["max_simultaneas"],
+        "especulacoes_aproveitadas": gerente.estatisticas_especulacao()["aproveitadas"],
+        "especulacoes_descartadas": gerente.estatisticas_especulacao()["descartadas"],
+        "taxa_sem_especialista": gerente.estatisticas_roteamento()["taxa_sem_especialista"],
+        "taxa_repeticao": gerente.estatisticas_roteamento()["taxa_repeticao"],
+        "cpu_ms_por_turno": cpu / turnos * 1000,
+        "cpu_ms_por_sessao": cpu / len(conversas) * 1000,
+    }
+    if args.instrumentar:
+        resultados["etapas"] = medicoes.resumo()
+    return resultados
+
+
+def medir_memoria(args, conversas):
+    """
+    Mede a memória retida por sessão ao final das conversas.
+
+    Roda separadamente e sem latência simulada, porque o tracemalloc deixa a execução
+    mais lenta e distorceria as medidas de tempo.
+    """
+    gerente = iniciar_silencioso(criar_backend(args, latencia=0))
+    gerente.configurar_integracao(args.integracao[0])
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    executar_sincrono(reproduzir(gerente, conversas, args.simultaneas))
+    gc.collect()
+    depois, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "memoria_bytes_por_sessao": (depois - antes) / len(conversas),
+        "memoria_pico_bytes": pico - antes,
+        "historico_bytes_estimados_por_sessao": gerente.sessoes.estatisticas()["bytes_estimados"] / len(conversas),
+    }
+
+
+def comparar_integracao(args, conversas, resultados):
+    """Repete a medição com as demais estratégias de integração e compara com a primeira."""
+    base = resultados
+    comparacao = {args.integracao[0]: {nome: base[nome] for nome in METRICAS_INTEGRACAO}}
+    for estrategia in args.integracao[1:]:
+        medidas = medir_desempenho(args, conversas, estrategia)
+        dados = {nome: medidas[nome] for nome in METRICAS_INTEGRACAO}
+        dados["economia_tokens"] = 1 - medidas["tokens_modelo_por_turno"] / base["tokens_modelo_por_turno"]
+        dados["reducao_latencia_p95"] = 1 - medidas["latencia_p95_ms"] / base["latencia_p95_ms"]
+        comparacao[estrategia] = dados
+    return comparacao
+
+
+def comparar(atual, anterior):
+    """Imprime a variação percentual de cada métrica em relação a um resultado anterior."""
+    print(f"{'métrica':<40} {'anterior':>12} {'atual':>12} {'variação':>10}")
+    for nome, valor in atual["resultados"].items():
+        base = anterior["resultados"].get(nome)
+        if not isinstance(valor, (int, float)) or not base:
+            continue
+        variacao = (valor - base) / base
+        piora = variacao < 0 if nome in MAIOR_MELHOR else variacao > 0
+        marca = " !" if piora and abs(variacao) > 0.1 else ""
+        print(f"{nome:<40} {base:>12.1f} {valor:>12.1f} {variacao:>+10.1%}{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversas", type=int, default=200)
+    parser.add_argument("--turnos", type=int, default=6, help="Turnos por conversa, incluindo a saudação")
+    parser.add_argument("--simultaneas", type=int, default=20, help="Conversas em andamento ao mesmo tempo")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latência típica do modelo simulado, em segundos")
+    parser.add_argument("--distribuicao", default="lognormal", choices=BackendFalso.DISTRIBUICOES)
+    parser.add_argument("--tokens-por-segundo", type=float, default=400.0)
+    parser.add_argument("--taxa-falhas", type=float, default=0.0)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--sem-cache-contexto", action="store_true",
+                        help="Reenvia as instruções de sistema em todas as chamadas ao modelo")
+    parser.add_argument("--integracao", nargs="+", default=["modelo"], choices=ESTRATEGIAS_INTEGRACAO,
+                        help="Estratégia de integração; com várias, compara cada uma com a primeira")
+    parser.add_argument("--limiar-confianca", type=float, default=0.5,
+                        help="Confiança do roteador local abaixo da qual o modelo decide o roteamento")
+    parser.add_argument("--especular", action="store_true",
+                        help="Adianta o especialista mais provável enquanto o modelo decide o roteamento")
+    parser.add_argument("--selecionar-contexto", action="store_true",
+                        help="Entrega a cada especialista só as partes relevantes da conversa")
+    parser.add_argument("--resumir", action="store_true",
+                        help="Resume os turnos antigos das conversas em segundo plano")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não executa a medição de memória")
+    parser.add_argument("--instrumentar", action="store_true", help="Inclui o resumo das medições por etapa e agente")
+    parser.add_argument("--saida", help="Arquivo JSON onde gravar o resultado (padrão: só imprime)")
+    parser.add_argument("--comparar", help="Resultado JSON anterior para comparação")
+    args = parser.parse_args()
+
+    conversas = gerar_conversas(args.conversas, args.turnos, args.semente)
+    resultados = medir_desempenho(args, conversas)
+    if len(args.integracao) > 1:
+        resultados["integracao"] = comparar_integracao(args, conversas, resultados)
+    if not args.sem_memoria:
+        resultados.update(medir_memoria(args, conversas))
+
+    parametros = {nome: valor for nome, valor in vars(args).items() if nome not in ("saida", "comparar")}
+    resultado = {
+        "parametros": parametros,
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "resultados": resultados,
+    }
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    print(texto)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(resultado, json.load(arquivo))
+
+
+if __name__ == "__main__":
+    main()
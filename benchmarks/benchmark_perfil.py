@@ -0,0 +1,145 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark do perfil da propriedade - Extração local dos dados e permanência deles no prompt
+
+Uso:
+    python benchmarks/benchmark_perfil.py
+    python benchmarks/benchmark_perfil.py --conversas 50 --turnos 40
+
+Mede duas coisas:
+
+- a extração: precisão e cobertura, por campo, do ExtratorPerfil sobre mensagens
+  rotuladas (inclusive perguntas genéricas, que não devem alterar o perfil), e o tempo
+  por mensagem;
+- a permanência: em conversas que começam com o usuário descrevendo a propriedade e
+  seguem com as perguntas do benchmark de roteamento (respostas montadas com as frases
+  do catálogo, como em benchmark_contexto), a fração dos turnos em que os dados da
+  propriedade ainda estão no histórico entregue aos especialistas, sem e com o perfil,
+  e o tamanho desse histórico.
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_contexto import gerar_conversas
+from historico import Historico
+from perfil import CAMPOS_PERFIL, ExtratorPerfil
+
+# Mensagens rotuladas com os campos que o extrator deve encontrar
+MENSAGENS_ROTULADAS = [
+    ("10 hectares de café, solo argiloso pH 5.2", {"cultura": "café", "area": "10 ha", "solo": "argiloso",
+                                                   "ph_solo": "5.2"}),
+    ("Olá, preciso de ajuda com minha plantação de milho.", {"cultura": "milho"}),
+    ("Qual a melhor época para plantar mandioca?", {}),
+    ("Minhas plantas de café estão com manchas amarelas nas folhas. O que pode ser?", {"cultura": "café"}),
+    ("Qual o melhor sistema de irrigação para banana em região com escassez de água?", {}),
+    ("Como a previsão de seca prolongada pode afetar minha plantação de café?", {"cultura": "café"}),
+    ("Qual o custo estimado e retorno esperado para 1 hectare de café arábica?", {}),
+    ("Meu solo tem pH 5.2 e textura argilosa. O que isso significa para o cultivo de milho?",
+     {"cultura": "milho", "solo": "argiloso", "ph_solo": "5.2"}),
+    ("Tenho um bananal no sul de Minas, irrigado por gotejamento com água de poço artesiano.",
+     {"cultura": "banana", "regiao": "sul de Minas", "irrigacao": "gotejamento", "agua": "poço artesiano"}),
+    ("Planto 25 ha de mandioca no sertão da Bahia, em sequeiro, e a água é limitada.",
+     {"cultura": "mandioca", "area": "25 ha", "regiao": "sertão, Bahia", "irrigacao": "sequeiro (sem irrigação)",
+      "agua": "escassa"}),
+    ("Nossa fazenda fica em Goiás, no cerrado, com 1.200 hectares de milho irrigados por pivô central.",
+     {"cultura": "milho", "area": "1.200 ha", "regiao": "Goiás, cerrado", "irrigacao": "pivô central"}),
+    ("O pH do solo está em torno de 6,1 e o latossolo é bem drenado.", {"ph_solo": "6,1", "solo": "latossolo"}),
+    ("Na verdade são 12,5 hectares.", {"area": "12,5 ha"}),
+    ("Cultivo café robusta em Rondônia com microaspersão e água de açude.",
+     {"cultura": "café robusta", "regiao": "Rondônia", "irrigacao": "microaspersão", "agua": "açude"}),
+    ("Quais fertilizantes devo usar para uma plantação de café com deficiência de nitrogênio?", {}),
+    ("Como controlar a broca do café em solo arenoso?", {}),
+    ("Estou planejando iniciar uma plantação de café em 10 hectares.", {"cultura": "café", "area": "10 ha"}),
+    ("Uso aspersão convencional em 3 alqueires de feijão.", {"area": "3 alqueires", "irrigacao": "aspersão"}),
+    ("Sou de Londrina, PR, e tenho café.", {"cultura": "café", "regiao": "Londrina, PR"}),
+    ("A análise deu pH em água de 5,5.", {"ph_solo": "5,5"}),
+]
+
+# Descrição da propriedade que abre as conversas simuladas e os fatos procurados no histórico
+# (cada um pode aparecer como o usuário o escreveu ou como o perfil o registra)
+DESCRICAO = "Tenho 10 hectares de café arábica no sul de Minas, solo argiloso com pH 5.2, irrigado por gotejamento."
+FATOS = (("10 hectares", "10 ha"), ("café arábica",), ("sul de Minas",), ("argiloso",), ("5.2",), ("gotejamento",))
+
+
+def medir_extracao(extrator, repeticoes):
+    """Precisão e cobertura por campo e tempo médio de extração (µs) sobre as mensagens rotuladas."""
+    acertos = {chave: [0, 0, 0] for chave, _ in CAMPOS_PERFIL}  # corretos, extraídos, esperados
+    for mensagem, esperado in MENSAGENS_ROTULADAS:
+        extraido = extrator.extrair(mensagem)
+        for chave, contagem in acertos.items():
+            contagem[0] += chave in extraido and extraido[chave] == esperado.get(chave)
+            contagem[1] += chave in extraido
+            contagem[2] += chave in esperado
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for mensagem, _ in MENSAGENS_ROTULADAS:
+            extrator.extrair(mensagem)
+    tempo = (time.perf_counter() - inicio) / (repeticoes * len(MENSAGENS_ROTULADAS)) * 1e6
+    por_campo = {chave: {"precisao": corretos / extraidos if extraidos else 1.0,
+                         "cobertura": corretos / esperados if esperados else 1.0}
+                 for chave, (corretos, extraidos, esperados) in acertos.items()}
+    total = [sum(contagem[indice] for contagem in acertos.values()) for indice in range(3)]
+    return {"precisao": total[0] / total[1], "cobertura": total[0] / total[2], "por_campo": por_campo,
+            "tempo_us": tempo}
+
+
+def medir_permanencia(extrator, conversas, janela):
+    """
+    Fração dos turnos com todos os FATOS no histórico dos especialistas e o tamanho desse histórico.
+
+    Os turnos cujas perguntas trazem dados da propriedade ("meu solo está compactado")
+    são deixados de fora, já que eles mudam o que o perfil deve conter.
+    """
+    resultados = {"sem_perfil": ([], []), "com_perfil": ([], [])}
+    for conversa in conversas:
+        historicos = {"sem_perfil": Historico(), "com_perfil": Historico()}
+        for chave, historico in historicos.items():
+            historico.append({"papel": "usuário", "conteúdo": DESCRICAO})
+            if chave == "com_perfil":
+                extrator.atualizar(historico.perfil, DESCRICAO)
+        for pergunta, respostas in conversa:
+            if extrator.extrair(pergunta):
+                continue
+            for chave, historico in historicos.items():
+                historico.append({"papel": "usuário", "conteúdo": pergunta})
+                if chave == "com_perfil":
+                    extrator.atualizar(historico.perfil, pergunta)
+                transcricao = historico.transcricao(janela)
+                presentes, tamanhos = resultados[chave]
+                presentes.append(all(any(forma in transcricao for forma in fato) for fato in FATOS))
+                tamanhos.append(len(transcricao))
+                for nome, resposta in respostas:
+                    historico.append({"papel": "especialista", "nome": nome, "conteúdo": resposta})
+    return {chave: {"turnos_com_dados": statistics.mean(presentes), "caracteres_historico": statistics.mean(tamanhos)}
+            for chave, (presentes, tamanhos) in resultados.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversas", type=int, default=20)
+    parser.add_argument("--turnos", type=int, default=20)
+    parser.add_argument("--janela", type=int, default=6000, help="Janela, em caracteres, do histórico")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    extrator = ExtratorPerfil()
+    resultado = {
+        "extracao": medir_extracao(extrator, args.repeticoes),
+        "permanencia": medir_permanencia(extrator, gerar_conversas(args.conversas, args.turnos, args.semente),
+                                         args.janela),
+    }
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark da persistência - Tempo de retomada de uma conversa x tamanho da conversa
+
+Uso:
+    python benchmarks/benchmark_persistencia.py
+    python benchmarks/benchmark_persistencia.py --tamanhos 100 1000 10000 50000
+
+Para cada tamanho, uma conversa com esse número de turnos é gravada em um banco
+SQLite temporário pela PersistenciaSQLite (como acontece durante o uso) e depois
+retomada várias vezes. O tempo de retomada é comparado com o de ler a conversa
+inteira, que é o custo de restaurar o arquivo gzip do GerenciadorSessoes sem
+persistência. Também é medido o custo de `registrar`, pago pelo turno da conversa.
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_historico import gerar_turnos
+from historico import Historico
+from persistencia import PersistenciaSQLite
+
+
+def gravar_conversa(persistencia, sessao_id, turnos):
+    """Grava a conversa pelo observador do Historico; retorna o custo médio de `registrar` (µs)."""
+    historico = Historico()
+    persistencia.acompanhar(sessao_id, historico)
+    inicio = time.perf_counter()
+    for pergunta, nome, resposta in turnos:
+        historico.append({"papel": "usuário", "conteúdo": pergunta})
+        historico.append({"papel": "especialista", "nome": nome, "conteúdo": " ".join(resposta)})
+    custo = (time.perf_counter() - inicio) / (2 * len(turnos)) * 1e6
+    persistencia.sincronizar()
+    return custo
+
+
+def medir(funcao, repeticoes):
+    """Mediana, em ms, das execuções de `funcao`."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Números de turnos das conversas medidas")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    turnos = gerar_turnos(max(args.tamanhos), args.semente)
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        persistencia = PersistenciaSQLite(os.path.join(diretorio, "conversas.sqlite"))
+        for tamanho in args.tamanhos:
+            sessao_id = f"conversa-{tamanho}"
+            registrar_us = gravar_conversa(persistencia, sessao_id, turnos[:tamanho])
+
+            def ler_inteira():
+                persistencia._conexao.execute(
+                    "SELECT papel, nome, conteudo FROM mensagens WHERE sessao = ? ORDER BY posicao",
+                    (sessao_id,)).fetchall()
+
+            historico, _ = persistencia.carregar(sessao_id)
+            resultados.append({
+                "turnos": tamanho,
+                "registrar_us": round(registrar_us, 2),
+                "retomada_ms": round(medir(lambda: persistencia.carregar(sessao_id), args.repeticoes), 3),
+                "leitura_completa_ms": round(medir(ler_inteira, args.repeticoes), 3),
+                "itens_carregados": len(historico),
+                "linhas_resumo": len(historico.resumo_anterior),
+            })
+        persistencia.fechar()
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Benchmark do roteamento - Compara o roteador local com a análise de intenção via Gemini
+
+Uso:
+    python benchmarks/benchmark_roteamento.py              # só o roteador local
+    python benchmarks/benchmark_roteamento.py --api-key X  # também compara com o modelo
+
+Avalia o especialista principal e o conjunto inteiro de especialistas escolhidos
+(conjunto exato, precisão e cobertura), em todas as perguntas e só nas que o Agente
+Gerente roteia sem o modelo (confiança a partir do limiar).
+
+Também compara a interpretação das respostas de roteamento do modelo: a divisão por
+vírgulas com comparação exata dos nomes (o comportamento anterior) e a leitura tolerante
+do JSON com correspondência aproximada dos nomes, sobre respostas reais e malformadas,
+e conta quantos nomes de especialistas que não existem são trocados por um registrado.
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roteador import CorrespondenciaNomes, RoteadorLocal, interpretar_roteamento
+
+CULTURAS = "Especialista em Culturas"
+METEOROLOGISTA = "Meteorologista"
+PRAGAS = "Especialista em Pragas e Doenças"
+IRRIGACAO = "Especialista em Irrigação"
+FINANCEIRO = "Especialista Financeiro"
+VISUALIZACAO = "Especialista em Design e Visualização"
+SOLO = "Especialista em Análise de Solo"
+FERTILIZACAO = "Especialista em Fertilização"
+SUSTENTABILIDADE = "Especialista em Sustentabilidade"
+
+# Perguntas de agricultores rotuladas com os especialistas esperados
+PERGUNTAS_ROTULADAS = [
+    ("Qual a melhor época para plantar mandioca?", [CULTURAS]),
+    ("Quais variedades de milho são indicadas para o cerrado?", [CULTURAS]),
+    ("Quanto tempo leva o ciclo da banana prata até a colheita?", [CULTURAS]),
+    ("Posso fazer consórcio de milho com feijão?", [CULTURAS]),
+    ("Como fazer o processamento pós-colheita do café arábica?", [CULTURAS]),
+    ("Como a previsão de seca prolongada pode afetar minha plantação de café?", [METEOROLOGISTA, CULTURAS]),
+    ("Vai ter geada no sul de Minas em junho?", [METEOROLOGISTA]),
+    ("As chuvas intensas previstas para a semana atrapalham a colheita?", [METEOROLOGISTA, CULTURAS]),
+    ("Como o El Niño influencia o clima da safra de verão?", [METEOROLOGISTA]),
+    ("Qual a temperatura ideal e o risco climático para o milho safrinha?", [METEOROLOGISTA, CULTURAS]),
+    ("Minhas plantas de café estão com manchas amarelas nas folhas. O que pode ser?", [PRAGAS]),
+    ("Como controlar a lagarta-do-cartucho no milho?", [PRAGAS]),
+    ("Apareceu ferrugem no cafezal, qual fungicida usar?", [PRAGAS]),
+    ("A broca do café está atacando minha lavoura, o que fazer?", [PRAGAS]),
+    ("Como fazer controle biológico de pragas na banana?", [PRAGAS]),
+    ("Qual o melhor sistema de irrigação para banana em região com escassez de água?", [IRRIGACAO]),
+    ("Gotejamento ou microaspersão para café?", [IRRIGACAO]),
+    ("Quanta água preciso para irrigar um hectare de milho?", [IRRIGACAO]),
+    ("Preciso de outorga para captar água do rio para irrigação?", [IRRIGACAO]),
+    ("Como automatizar a irrigação com sensores de umidade do solo?", [IRRIGACAO]),
+    ("Qual o custo estimado e retorno esperado para 1 hectare de café arábica?", [FINANCEIRO]),
+    ("Vale a pena pegar financiamento do Pronaf para comprar um trator?", [FINANCEIRO]),
+    ("Como calcular o lucro da safra de milho com o preço atual da saca?", [FINANCEIRO]),
+    ("Qual a margem de lucro da mandioca vendida para a farinheira?", [FINANCEIRO]),
+    ("Quais linhas de crédito existem para pequenos produtores?", [FINANCEIRO]),
+    ("Gostaria de visualizar como ficaria uma área de 5 hectares com plantação de café e sistema de irrigação por gotejamento.", [VISUALIZACAO, IRRIGACAO]),
+    ("Pode desenhar um mapa da distribuição das culturas na minha propriedade?", [VISUALIZACAO]),
+    ("Quero um gráfico com a produtividade dos últimos anos", [VISUALIZACAO]),
+    ("Como seria o layout ideal de um bananal de 2 hectares?", [VISUALIZACAO]),
+    ("Meu solo tem pH 5.2 e textura argilosa. O que isso significa para o cultivo de milho?", [SOLO]),
+    ("Como interpretar o laudo da análise de solo?", [SOLO]),
+    ("Quanto calcário preciso aplicar para corrigir a acidez?", [SOLO]),
+    ("Meu solo está compactado, como melhorar a drenagem?", [SOLO]),
+    ("Quais fertilizantes devo usar para uma plantação de café com deficiência de nitrogênio?", [FERTILIZACAO]),
+    ("Qual a dose de NPK para o plantio de milho?", [FERTILIZACAO]),
+    ("Posso usar esterco como adubo orgânico na mandioca?", [FERTILIZACAO]),
+    ("Como fazer adubação foliar com micronutrientes?", [FERTILIZACAO]),
+    ("Quais certificações orgânicas são mais valorizadas para exportação de café?", [SUSTENTABILIDADE]),
+    ("Como reduzir a pegada de carbono da fazenda?", [SUSTENTABILIDADE]),
+    ("O que preciso para conseguir o selo Rainforest Alliance?", [SUSTENTABILIDADE]),
+    ("Estou planejando iniciar uma plantação de café em 10 hectares. Preciso de orientações completas sobre variedades, clima, solo, pragas, irrigação, fertilização, custos, certificações e como visualizar o layout.",
+     [CULTURAS, METEOROLOGISTA, SOLO, PRAGAS, IRRIGACAO, FERTILIZACAO, FINANCEIRO, SUSTENTABILIDADE, VISUALIZACAO]),
+]
+
+# Respostas de roteamento na forma como o modelo costuma devolvê-las, com os nomes esperados
+RESPOSTAS_MODELO = [
+    ('{"especialistas": ["Especialista em Culturas"]}', [CULTURAS]),
+    ('{"especialistas": ["Meteorologista", "Especialista em Culturas"]}', [METEOROLOGISTA, CULTURAS]),
+    ('```json\n{"especialistas": ["Especialista em Pragas e Doenças"]}\n```', [PRAGAS]),
+    ('Resposta: {"especialistas": ["Especialista em Irrigação"]}', [IRRIGACAO]),
+    ('["Especialista Financeiro"]', [FINANCEIRO]),
+    ("Especialista em Culturas", [CULTURAS]),
+    ("Especialista em Culturas, Meteorologista", [CULTURAS, METEOROLOGISTA]),
+    ("Especialista em Culturas.", [CULTURAS]),
+    ("O Especialista em Irrigação", [IRRIGACAO]),
+    ("especialista em pragas e doenças", [PRAGAS]),
+    ("Especialista em Irrigacao", [IRRIGACAO]),
+    ("- Meteorologista\n- Especialista em Culturas", [METEOROLOGISTA, CULTURAS]),
+    ("1. Especialista em Análise de Solo\n2. Especialista em Fertilização", [SOLO, FERTILIZACAO]),
+    ("**Especialista em Sustentabilidade**", [SUSTENTABILIDADE]),
+    ("Especialista em Culturas e Meteorologista", [CULTURAS, METEOROLOGISTA]),
+    ("Especialista em Solo", [SOLO]),
+    ("Especialista em Fertilizantes", [FERTILIZACAO]),
+    ("Meteorologia", [METEOROLOGISTA]),
+    ("Especialista em Visualização", [VISUALIZACAO]),
+    ('"Especialista em Pragas e Doenças"', [PRAGAS]),
+]
+
+# Especialistas que o modelo pode inventar: nenhum deve ser trocado por um dos registrados
+NOMES_DESCONHECIDOS = [
+    "Especialista em Custos", "Especialista em Nutrição", "Especialista em Mecanização", "Especialista em Clima",
+    "Especialista em Pecuária", "Especialista em Drones", "Especialista em Genética", "Especialista em Mercado",
+    "Especialista em Logística", "Especialista em Apicultura", "Agrônomo", "Veterinário",
+]
+
+
+def interpretar_por_virgulas(texto, nomes):
+    """Interpretação anterior: divide por vírgulas e mantém só os nomes idênticos aos registrados."""
+    partes = [parte.strip() for parte in texto.strip().split(",")]
+    return [parte for parte in partes if parte in nomes]
+
+
+def comparar_interpretacao(nomes):
+    """
+    Conta, para cada interpretação, as respostas com todos os nomes corretos, as sem nenhum
+    nome e os NOMES_DESCONHECIDOS trocados por um especialista registrado.
+    """
+    correspondencia = CorrespondenciaNomes()
+    for nome in nomes:
+        correspondencia.adicionar(nome)
+    interpretacoes = {
+        "virgulas_exatas": lambda texto: interpretar_por_virgulas(texto, nomes),
+        "json_aproximada": lambda texto: interpretar_roteamento(texto, correspondencia)["especialistas"],
+    }
+    resultados = {}
+    for rotulo, interpretar in interpretacoes.items():
+        corretas = vazias = 0
+        for texto, esperados in RESPOSTAS_MODELO:
+            obtidos = interpretar(texto)
+            corretas += obtidos == esperados
+            vazias += not obtidos
+        trocados = sum(bool(interpretar(nome)) for nome in NOMES_DESCONHECIDOS)
+        resultados[rotulo] = (corretas, vazias, trocados)
+    return resultados
+
+
+def carregar_catalogo_roteamento():
+    """Lê do catálogo de especialistas os textos usados no roteamento (personalidade e palavras-chave)."""
+    from especialista_generico import carregar_catalogo
+
+    return {nome: (definicao.personalidade, definicao.palavras_chave) for nome, definicao in carregar_catalogo().items()}
+
+
+def percentil(valores, p):
+    """Retorna o percentil p (0-100) de uma lista de valores."""
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def medir_latencia(roteador, repeticoes):
+    """Mede a latência do roteamento local em microssegundos por pergunta."""
+    latencias = []
+    for _ in range(repeticoes):
+        for pergunta, _ in PERGUNTAS_ROTULADAS:
+            inicio = time.perf_counter()
+            roteador.rotear(pergunta)
+            latencias.append((time.perf_counter() - inicio) * 1e6)
+    return latencias
+
+
+def avaliar_conjunto(escolhidos, esperados):
+    """Conjunto exato (0 ou 1), precisão e cobertura dos especialistas escolhidos em relação aos esperados."""
+    escolhidos, esperados = set(escolhidos), set(esperados)
+    corretos = len(escolhidos & esperados)
+    return (escolhidos == esperados, corretos / len(escolhidos) if escolhidos else 0.0,
+            corretos / len(esperados))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"), help="Compara também com a análise de intenção via Gemini")
+    parser.add_argument("--limiar", type=float, default=0.5, help="Limiar de confiança usado pelo Agente Gerente")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    roteador = RoteadorLocal()
+    for nome, (personalidade, palavras_chave) in carregar_catalogo_roteamento().items():
+        roteador.indexar(nome, personalidade, palavras_chave)
+
+    latencias = medir_latencia(roteador, args.repeticoes)
+    print(f"Latência do roteador local ({len(latencias)} roteamentos):")
+    print(f"  média {statistics.mean(latencias):.1f} µs | p50 {percentil(latencias, 50):.1f} µs | p99 {percentil(latencias, 99):.1f} µs")
+
+    gerente = None
+    if args.api_key:
+        from agente_gerente import AgenteGerente
+        gerente = AgenteGerente(args.api_key)
+
+    acertos_principal = 0
+    dispensam_modelo = 0
+    concordancias = 0
+    conjuntos = {"todas": [], "sem_modelo": []}
+    for pergunta, esperados in PERGUNTAS_ROTULADAS:
+        resultado = roteador.rotear(pergunta)
+        principal = resultado.especialistas[0] if resultado.especialistas else None
+        acertos_principal += principal in esperados
+        local = resultado.confianca >= args.limiar
+        dispensam_modelo += local
+        avaliacao = avaliar_conjunto(resultado.especialistas, esperados)
+        conjuntos["todas"].append(avaliacao)
+        if local:
+            conjuntos["sem_modelo"].append(avaliacao)
+        linha = f"  [{resultado.confianca:.2f}] {pergunta[:60]!r} -> {resultado.especialistas}"
+
+        if gerente is not None:
+            indicados = gerente._analisar_intencao_llm(pergunta)
+            concorda = bool(set(indicados) & set(resultado.especialistas[:1]))
+            concordancias += concorda
+            linha += f" | Gemini: {indicados} {'✓' if concorda else '✗'}"
+        print(linha)
+
+    total = len(PERGUNTAS_ROTULADAS)
+    print(f"\nEspecialista principal correto: {acertos_principal}/{total} ({acertos_principal / total:.0%})")
+    print(f"Perguntas roteadas sem o modelo (confiança >= {args.limiar}): {dispensam_modelo}/{total} ({dispensam_modelo / total:.0%})")
+    for rotulo, avaliacoes in conjuntos.items():
+        if avaliacoes:
+            exatos, precisoes, coberturas = zip(*avaliacoes)
+            print(f"Conjunto de especialistas ({rotulo}): exato {sum(exatos)}/{len(avaliacoes)}"
+                  f" | precisão {statistics.mean(precisoes):.0%} | cobertura {statistics.mean(coberturas):.0%}")
+    if gerente is not None:
+        print(f"Concordância com o Gemini: {concordancias}/{total} ({concordancias / total:.0%})")
+
+    total = len(RESPOSTAS_MODELO)
+    print(f"\nInterpretação de {total} respostas de roteamento do modelo:")
+    for rotulo, (corretas, vazias, trocados) in comparar_interpretacao(set(carregar_catalogo_roteamento())).items():
+        print(f"  {rotulo}: {corretas}/{total} corretas | {vazias}/{total} sem especialista ({vazias / total:.0%})"
+              f" | {trocados}/{len(NOMES_DESCONHECIDOS)} nomes desconhecidos trocados")
+
+
+if __name__ == "__main__":
+    main()
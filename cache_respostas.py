@@ -0,0 +1,213 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Cache de Respostas - Evita chamadas repetidas ao modelo para perguntas já respondidas
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from roteador import normalizar_texto
+
+
+def normalizar_pergunta(texto):
+    """Normaliza a pergunta (minúsculas, sem acentos, pontuação ou espaços repetidos)."""
+    return " ".join(re.findall(r"[a-z0-9]+", normalizar_texto(texto)))
+
+
+def resumo_contexto(itens):
+    """Calcula um hash curto de uma lista de itens do histórico."""
+    h = hashlib.sha256()
+    for item in itens:
+        h.update(f"{item.get('papel')}|{item.get('nome', '')}|{item.get('conteúdo')}\x1e".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def resumo_textos(textos):
+    """Calcula um hash curto de uma lista de textos."""
+    h = hashlib.sha256()
+    for texto in textos:
+        h.update(texto.encode("utf-8") + b"\x1e")
+    return h.hexdigest()[:16]
+
+
+def chave_cache(agente, pergunta, contexto=""):
+    """
+    Monta a chave de cache de uma resposta.
+
+    Args:
+        agente: Nome do agente que produz a resposta
+        pergunta: A pergunta do usuário (é normalizada antes de compor a chave)
+        contexto: Hash do trecho do histórico que influencia a resposta
+    """
+    texto = f"{agente}\x1f{normalizar_pergunta(pergunta)}\x1f{contexto}"
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    """
+    Interface dos caches de respostas.
+
+    As subclasses implementam `_ler`, `_gravar` e `limpar`; os contadores de acertos
+    e falhas são mantidos aqui.
+    """
+
+    def __init__(self, max_itens=1024, ttl=None):
+        """
+        Args:
+            max_itens: Número máximo de respostas guardadas (as menos usadas recentemente saem primeiro)
+            ttl: Tempo de vida de cada resposta, em segundos (None para não expirar)
+        """
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave):
+        """Retorna a resposta guardada para a chave, ou None."""
+        valor = self._ler(chave)
+        if valor is None:
+            self.falhas += 1
+        else:
+            self.acertos += 1
+        return valor
+
+    def guardar(self, chave, valor):
+        """Guarda uma resposta no cache."""
+        self._gravar(chave, valor)
+
+    def estatisticas(self):
+        """Retorna os contadores de acertos e falhas do cache."""
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acertos": self.acertos / consultas if consultas else 0.0,
+            "itens": len(self),
+        }
+
+    def _ler(self, chave):
+        raise NotImplementedError
+
+    def _gravar(self, chave, valor):
+        raise NotImplementedError
+
+    def limpar(self):
+        """Remove todas as respostas do cache."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class CacheMemoria(CacheRespostas):
+    """Cache de respostas em memória com descarte LRU e expiração por TTL."""
+
+    def __init__(self, max_itens=1024, ttl=None):
+        super().__init__(max_itens, ttl)
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _ler(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em is not None and expira_em < time.time():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def _gravar(self, chave, valor):
+        expira_em = time.time() + self.ttl if self.ttl else None
+        with self._trava:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class CacheSQLite(CacheRespostas):
+    """
+    Cache de respostas persistido em um arquivo SQLite.
+
+    Sobrevive a reinicializações do processo. O descarte LRU usa o horário do último
+    acesso, que é indexado para que a limpeza não percorra a tabela inteira, e é
+    verificado a cada `INTERVALO_DESCARTE` gravações para não contar a tabela sempre.
+    """
+
+    INTERVALO_DESCARTE = 64
+
+    def __init__(self, caminho="agrismart_cache.sqlite", max_itens=100_000, ttl=None):
+        super().__init__(max_itens, ttl)
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self._gravacoes = 0
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado REAL NOT NULL, acessado REAL NOT NULL)"
+        )
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS respostas_acessado ON respostas (acessado)")
+
+    def _ler(self, chave):
+        agora = time.time()
+        with self._trava:
+            linha = self._conexao.execute("SELECT valor, criado FROM respostas WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            valor, criado = linha
+            if self.ttl and criado + self.ttl < agora:
+                self._conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                return None
+            self._conexao.execute("UPDATE respostas SET acessado = ? WHERE chave = ?", (agora, chave))
+            return valor
+
+    def _gravar(self, chave, valor):
+        agora = time.time()
+        with self._trava:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas (chave, valor, criado, acessado) VALUES (?, ?, ?, ?)",
+                (chave, valor, agora, agora),
+            )
+            self._gravacoes += 1
+            if self._gravacoes % self.INTERVALO_DESCARTE:
+                return
+            excesso = self._contar() - self.max_itens
+            if excesso > 0:
+                self._conexao.execute(
+                    "DELETE FROM respostas WHERE chave IN (SELECT chave FROM respostas ORDER BY acessado LIMIT ?)",
+                    (excesso,),
+                )
+
+    def _contar(self):
+        return self._conexao.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+
+    def limpar(self):
+        with self._trava:
+            self._conexao.execute("DELETE FROM respostas")
+
+    def fechar(self):
+        """Fecha a conexão com o banco de dados."""
+        with self._trava:
+            self._conexao.close()
+
+    def __len__(self):
+        with self._trava:
+            return self._contar()
@@ -0,0 +1,310 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Cache Semântico - Reaproveita respostas de perguntas parecidas (paráfrases)
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from roteador import extrair_termos, normalizar_texto
+
+# Começos e palavras que fazem a pergunta depender do que já foi dito ("E quanto custa?", "isso serve?")
+_CONTINUACAO = re.compile(r"^(?:e|mas|entao|agora|tambem|ainda|e se|e quanto|e para|e no|e na)\b")
+_REFERENCIAS = re.compile(r"\b(?:isso|isto|disso|nisso|desse|dessa|desses|dessas|nesse|nessa|esse|essa|esses|"
+                          r"essas|dele|dela|deles|delas|nele|nela|mesmo|mesma|acima|anterior)\b")
+
+
+def depende_do_historico(pergunta, minimo_termos=3):
+    """
+    Indica se a pergunta só faz sentido com a conversa anterior.
+
+    É o caso das continuações ("E quanto custa?"), das referências ao que já foi dito
+    ("isso serve para o milho?") e das perguntas com menos de `minimo_termos` termos.
+    """
+    texto = normalizar_texto(pergunta).strip()
+    return (bool(_CONTINUACAO.match(texto) or _REFERENCIAS.search(texto))
+            or len(set(extrair_termos(pergunta))) < minimo_termos)
+
+
+class EmbeddingLocal:
+    """
+    Gera embeddings de perguntas sem depender de rede.
+
+    Usa "feature hashing": os radicais das palavras e os trigramas de caracteres são
+    espalhados em um vetor de dimensão fixa, que é normalizado para que o produto
+    interno seja a similaridade do cosseno. Perguntas como "quando plantar mandioca"
+    e "época de plantio da mandioca" compartilham radicais e trigramas suficientes
+    para ficarem próximas.
+    """
+
+    def __init__(self, dimensao=256, peso_trigramas=0.2):
+        self.dimensao = dimensao
+        self.peso_trigramas = peso_trigramas
+
+    def _espalhar(self, vetor, atributo, peso):
+        h = zlib.crc32(atributo.encode("utf-8"))
+        vetor[h % self.dimensao] += peso if (h >> 31) & 1 else -peso
+
+    def __call__(self, texto):
+        """Retorna o embedding normalizado (float32) do texto."""
+        vetor = np.zeros(self.dimensao, dtype=np.float32)
+        for termo in extrair_termos(texto):
+            self._espalhar(vetor, termo, 1.0)
+        compacto = f" {' '.join(normalizar_texto(texto).split())} "
+        for i in range(len(compacto) - 2):
+            self._espalhar(vetor, compacto[i:i + 3], self.peso_trigramas)
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+
+
+class IndiceVetorial:
+    """
+    Índice de vizinhos mais próximos em NumPy.
+
+    No modo "plano" a busca é um produto matriz-vetor sobre todos os vetores. No modo
+    "ivf" os vetores são agrupados por k-means em `num_listas` listas e a busca visita
+    apenas as `num_sondas` listas mais próximas. Com `quantizar=True` os vetores são
+    guardados em int8 (um quarto da memória de float32).
+    """
+
+    # Quantidade de linhas processadas por vez, para limitar a memória temporária das buscas
+    TAMANHO_BLOCO = 65536
+
+    def __init__(self, dimensao, modo="plano", num_listas=256, num_sondas=8, quantizar=False, capacidade_inicial=1024):
+        if modo not in ("plano", "ivf"):
+            raise ValueError(f"Modo de índice desconhecido: {modo}")
+        self.dimensao = dimensao
+        self.modo = modo
+        self.num_listas = num_listas
+        self.num_sondas = num_sondas
+        self.quantizar = quantizar
+        self._vetores = np.zeros((capacidade_inicial, dimensao), dtype=np.int8 if quantizar else np.float32)
+        self._quantidade = 0
+        self._centroides = None
+        self._listas = None
+
+    def __len__(self):
+        return self._quantidade
+
+    def _codificar(self, vetores):
+        if self.quantizar:
+            return np.clip(np.rint(vetores * 127), -127, 127).astype(np.int8)
+        return vetores.astype(np.float32, copy=False)
+
+    def _similaridades(self, linhas, consulta):
+        """Produto interno entre as linhas guardadas e a consulta, processado em blocos."""
+        if not self.quantizar:
+            return linhas @ consulta
+        consulta = consulta.astype(np.float32)
+        resultado = np.empty(len(linhas), dtype=np.float32)
+        for inicio in range(0, len(linhas), self.TAMANHO_BLOCO):
+            bloco = linhas[inicio:inicio + self.TAMANHO_BLOCO]
+            resultado[inicio:inicio + len(bloco)] = bloco.astype(np.float32) @ consulta
+        return resultado / (127 * 127)
+
+    def adicionar(self, vetores):
+        """Adiciona vetores (normalizados) ao índice e retorna os seus identificadores."""
+        vetores = np.atleast_2d(vetores)
+        necessario = self._quantidade + len(vetores)
+        if necessario > len(self._vetores):
+            capacidade = max(necessario, 2 * len(self._vetores))
+            ampliado = np.zeros((capacidade, self.dimensao), dtype=self._vetores.dtype)
+            ampliado[:self._quantidade] = self._vetores[:self._quantidade]
+            self._vetores = ampliado
+        inicio = self._quantidade
+        self._vetores[inicio:necessario] = self._codificar(vetores)
+        self._quantidade = necessario
+
+        if self._centroides is not None:
+            self._distribuir(inicio, necessario)
+        elif self.modo == "ivf" and self._quantidade >= 4 * self.num_listas:
+            self.treinar()
+        return range(inicio, necessario)
+
+    def substituir(self, identificador, vetor):
+        """Troca o vetor guardado em `identificador` (usado para reaproveitar a posição de um item descartado)."""
+        if self._centroides is not None:
+            antiga = int(np.argmax(self._centroides @ self._vetores[identificador].astype(np.float32)))
+            self._listas[antiga].remove(identificador)
+        self._vetores[identificador] = self._codificar(np.atleast_2d(vetor))[0]
+        if self._centroides is not None:
+            self._distribuir(identificador, identificador + 1)
+
+    def _distribuir(self, inicio, fim):
+        """Coloca os vetores [inicio, fim) na lista IVF do centróide mais próximo."""
+        for bloco in range(inicio, fim, self.TAMANHO_BLOCO):
+            linhas = self._vetores[bloco:min(fim, bloco + self.TAMANHO_BLOCO)].astype(np.float32)
+            for deslocamento, lista in enumerate(np.argmax(linhas @ self._centroides.T, axis=1)):
+                self._listas[lista].append(bloco + deslocamento)
+
+    def treinar(self, iteracoes=10, amostra=65536, semente=0):
+        """Agrupa os vetores atuais em listas (k-means esférico) para o modo IVF."""
+        if self._quantidade < self.num_listas:
+            return
+        gerador = np.random.default_rng(semente)
+        escolhidos = gerador.choice(self._quantidade, min(amostra, self._quantidade), replace=False)
+        treino = self._vetores[escolhidos].astype(np.float32)
+        centroides = treino[gerador.choice(len(treino), self.num_listas, replace=False)].copy()
+        for _ in range(iteracoes):
+            atribuicoes = np.argmax(treino @ centroides.T, axis=1)
+            for lista in range(self.num_listas):
+                membros = treino[atribuicoes == lista]
+                if len(membros):
+                    centro = membros.sum(axis=0)
+                    centroides[lista] = centro / (np.linalg.norm(centro) or 1)
+
+        self._centroides = centroides
+        self._listas = [array("q") for _ in range(self.num_listas)]
+        self._distribuir(0, self._quantidade)
+
+    def buscar(self, vetor, k=1):
+        """
+        Procura os k vetores mais próximos.
+
+        Returns:
+            Uma lista de pares (identificador, similaridade) em ordem decrescente de similaridade
+        """
+        if self._quantidade == 0:
+            return []
+        consulta = self._codificar(vetor)
+        if self._centroides is None:
+            candidatos = None
+            similaridades = self._similaridades(self._vetores[:self._quantidade], consulta)
+        else:
+            sondadas = np.argsort(self._centroides @ vetor)[-self.num_sondas:]
+            candidatos = np.concatenate([np.frombuffer(self._listas[lista], dtype=np.int64) for lista in sondadas])
+            if len(candidatos) == 0:
+                return []
+            similaridades = self._similaridades(self._vetores[candidatos], consulta)
+
+        k = min(k, len(similaridades))
+        melhores = np.argpartition(-similaridades, k - 1)[:k]
+        melhores = melhores[np.argsort(-similaridades[melhores])]
+        identificadores = melhores if candidatos is None else candidatos[melhores]
+        return [(int(i), float(similaridades[j])) for i, j in zip(identificadores, melhores)]
+
+    def memoria_bytes(self):
+        """Memória ocupada pelos vetores e pela estrutura IVF, em bytes."""
+        total = self._vetores.nbytes
+        if self._centroides is not None:
+            total += self._centroides.nbytes + sum(lista.itemsize * len(lista) for lista in self._listas)
+        return total
+
+
+class CacheSemantico:
+    """
+    Cache de respostas para perguntas semanticamente parecidas.
+
+    Cada pergunta respondida é guardada com o seu embedding; uma nova pergunta cuja
+    similaridade com alguma já respondida seja de pelo menos `limiar` recebe a mesma
+    resposta, sem chamar o modelo. O embedding padrão é local (EmbeddingLocal), mas
+    qualquer função texto -> vetor normalizado pode ser usada.
+
+    Como embeddings de palavras aproximam perguntas que só diferem no assunto
+    ("plantar milho" e "plantar mandioca"), com `verificar_termos=True` um candidato
+    só é aceito se os seus termos incluírem todos os da nova pergunta.
+
+    Cada resposta é guardada com o `contexto` em que foi dada (por exemplo, o perfil
+    da propriedade da conversa) e só é reaproveitada no mesmo contexto. Acima de
+    `capacidade` itens, o usado há mais tempo dá lugar ao novo.
+    """
+
+    def __init__(self, limiar=0.7, funcao_embedding=None, modo="plano", quantizar=False, verificar_termos=True,
+                 capacidade=10_000, candidatos=8, **opcoes_indice):
+        """
+        Args:
+            limiar: Similaridade do cosseno mínima para reaproveitar uma resposta
+            funcao_embedding: Função que converte texto em vetor normalizado (padrão: EmbeddingLocal())
+            modo: "plano" (busca exata) ou "ivf" (busca aproximada para muitos itens)
+            quantizar: Guarda os vetores em int8
+            verificar_termos: Recusa candidatos que não contêm todos os termos da pergunta
+            capacidade: Quantidade máxima de respostas guardadas
+            candidatos: Vizinhos examinados em cada busca (os de outros contextos são ignorados)
+            opcoes_indice: Opções adicionais do IndiceVetorial (num_listas, num_sondas)
+        """
+        self.limiar = limiar
+        self.verificar_termos = verificar_termos
+        self.capacidade = capacidade
+        self.candidatos = candidatos
+        self.funcao_embedding = funcao_embedding or EmbeddingLocal()
+        dimensao = len(self.funcao_embedding("dimensao"))
+        self.indice = IndiceVetorial(dimensao, modo=modo, quantizar=quantizar, **opcoes_indice)
+        self._perguntas = []
+        self._respostas = []
+        self._contextos = []
+        # Posições no índice, da usada há mais tempo para a mais recente
+        self._uso = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartados = 0
+
+    def __len__(self):
+        return len(self._respostas)
+
+    @staticmethod
+    def _chave_contexto(contexto):
+        return hashlib.blake2b(contexto.encode("utf-8"), digest_size=8).digest() if contexto else b""
+
+    def buscar(self, pergunta, contexto=""):
+        """Retorna a resposta de uma pergunta parecida já respondida no mesmo `contexto`, ou None."""
+        vetor = self.funcao_embedding(pergunta)
+        chave = self._chave_contexto(contexto)
+        with self._trava:
+            for identificador, similaridade in self.indice.buscar(vetor, k=self.candidatos):
+                if similaridade < self.limiar:
+                    break
+                if self._contextos[identificador] != chave:
+                    continue
+                if not self.verificar_termos or self._termos_compativeis(pergunta, self._perguntas[identificador]):
+                    self.acertos += 1
+                    self._uso.move_to_end(identificador)
+                    return self._respostas[identificador]
+            self.falhas += 1
+            return None
+
+    @staticmethod
+    def _termos_compativeis(pergunta, guardada):
+        """Indica se os termos da pergunta guardada incluem todos os da nova pergunta."""
+        termos = set(extrair_termos(pergunta))
+        return bool(termos) and termos <= set(extrair_termos(guardada))
+
+    def guardar(self, pergunta, resposta, contexto=""):
+        """Guarda a resposta dada a uma pergunta no `contexto` informado."""
+        vetor = self.funcao_embedding(pergunta)
+        chave = self._chave_contexto(contexto)
+        with self._trava:
+            if len(self._respostas) >= self.capacidade:
+                # Reaproveita a posição da resposta usada há mais tempo
+                identificador, _ = self._uso.popitem(last=False)
+                self.indice.substituir(identificador, vetor)
+                self._perguntas[identificador] = pergunta
+                self._respostas[identificador] = resposta
+                self._contextos[identificador] = chave
+                self.descartados += 1
+            else:
+                identificador = self.indice.adicionar(vetor)[0]
+                self._perguntas.append(pergunta)
+                self._respostas.append(resposta)
+                self._contextos.append(chave)
+            self._uso[identificador] = None
+
+    def estatisticas(self):
+        """Retorna os contadores de acertos e falhas e o tamanho do cache."""
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acertos": self.acertos / consultas if consultas else 0.0,
+            "itens": len(self),
+            "descartados": self.descartados,
+            "memoria_indice_bytes": self.indice.memoria_bytes(),
+        }
@@ -0,0 +1,283 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Cliente do Modelo - Limite de taxa, novas tentativas e disjuntor em volta do backend
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from backend_modelo import BackendModelo, ErroBackend
+
+# Prioridades das chamadas: as de menor valor passam à frente na fila do limite de taxa
+INTERATIVA = 0
+LOTE = 10
+
+# Prioridade das chamadas feitas no contexto atual (o processamento em lote usa LOTE)
+prioridade_atual = contextvars.ContextVar("prioridade_atual", default=INTERATIVA)
+
+# Nomes das exceções transitórias da API (google.api_core.exceptions), reconhecidas sem importar o SDK
+ERROS_LIMITE = {"ResourceExhausted", "TooManyRequests"}
+ERROS_TRANSITORIOS = ERROS_LIMITE | {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded",
+                                     "GatewayTimeout", "BadGateway"}
+
+
+class ErroCircuitoAberto(ErroBackend):
+    """O modelo falhou seguidamente e as chamadas estão suspensas por algum tempo."""
+
+
+def _nomes_classes(erro):
+    return {classe.__name__ for classe in type(erro).__mro__}
+
+
+def erro_de_limite(erro):
+    """Indica se o erro é uma recusa por cota ou excesso de requisições (HTTP 429)."""
+    return bool(ERROS_LIMITE & _nomes_classes(erro)) or getattr(erro, "code", None) == 429
+
+
+def erro_transitorio(erro):
+    """Indica se vale a pena repetir a chamada que terminou com `erro`."""
+    if isinstance(erro, ErroCircuitoAberto):
+        return False
+    if isinstance(erro, (ErroBackend, asyncio.TimeoutError, ConnectionError)):
+        return True
+    return bool(ERROS_TRANSITORIOS & _nomes_classes(erro)) or getattr(erro, "code", None) in (429, 500, 502, 503, 504)
+
+
+class BaldeTokens:
+    """Balde de fichas reabastecido continuamente até `capacidade` fichas por minuto."""
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self.taxa = capacidade / 60.0
+        self.nivel = float(capacidade)
+        self._atualizado = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.nivel = min(self.capacidade, self.nivel + (agora - self._atualizado) * self.taxa)
+        self._atualizado = agora
+
+    def espera(self, quantidade):
+        """Segundos até haver `quantidade` fichas (limitada à capacidade do balde)."""
+        self._repor()
+        falta = min(quantidade, self.capacidade) - self.nivel
+        return falta / self.taxa if falta > 0 else 0.0
+
+    def consumir(self, quantidade):
+        """Retira fichas; o nível pode ficar negativo, adiando as próximas chamadas."""
+        self._repor()
+        self.nivel -= quantidade
+
+
+class ClienteModelo(BackendModelo):
+    """
+    Envolve um BackendModelo com as proteções necessárias sob carga.
+
+    - Limite de taxa por baldes de fichas de requisições e de tokens por minuto. Quem
+      espera fica em uma fila por prioridade (`prioridade_atual`), de modo que os turnos
+      interativos passam à frente do trabalho em lote. Cada recusa por cota (429) reduz
+      a taxa efetiva pela metade, e cada sucesso a recupera aos poucos.
+    - Novas tentativas para erros transitórios, com espera exponencial e aleatória
+      ("full jitter"). No streaming, só se repete a chamada que ainda não entregou trechos.
+    - Disjuntor: após `limiar_circuito` falhas seguidas, as chamadas falham de imediato
+      com ErroCircuitoAberto durante `tempo_circuito` segundos; depois disso, uma chamada
+      de teste decide se o circuito volta a fechar.
+
+    Uma única instância deve ser compartilhada pelo gerente e por todos os especialistas.
+    Ela pode ser usada de mais de um loop de eventos (como o loop de fundo das chamadas
+    síncronas e o do próprio chamador): cada loop tem a sua fila de espera, e as cotas
+    são comuns a todos.
+    """
+
+    def __init__(self, backend, requisicoes_por_minuto=None, tokens_por_minuto=None, max_tentativas=5,
+                 espera_inicial=1.0, espera_maxima=30.0, limiar_circuito=5, tempo_circuito=30.0, semente=None):
+        """
+        Args:
+            backend: O BackendModelo protegido
+            requisicoes_por_minuto: Cota de requisições por minuto (None para não limitar)
+            tokens_por_minuto: Cota de tokens (de entrada e saída) por minuto (None para não limitar)
+            max_tentativas: Número máximo de tentativas de cada chamada
+            espera_inicial: Espera máxima, em segundos, antes da segunda tentativa (dobra a cada nova)
+            espera_maxima: Teto da espera entre tentativas
+            limiar_circuito: Falhas seguidas que abrem o circuito
+            tempo_circuito: Segundos que o circuito fica aberto
+            semente: Semente do sorteio das esperas (None para aleatória)
+        """
+        self.backend = backend
+        self.requisicoes = BaldeTokens(requisicoes_por_minuto) if requisicoes_por_minuto else None
+        self.tokens = BaldeTokens(tokens_por_minuto) if tokens_por_minuto else None
+        self.max_tentativas = max_tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.limiar_circuito = limiar_circuito
+        self.tempo_circuito = tempo_circuito
+        self._sorteador = random.Random(semente)
+        self._fator = 1.0
+        self._sequencia = itertools.count()
+        # Loop de eventos -> (Condition, fila por prioridade) dos que esperam nele
+        self._filas = {}
+        self._trava_baldes = threading.Lock()
+        self._falhas_seguidas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+        self.contadores = {"chamadas": 0, "novas_tentativas": 0, "recusas_limite": 0, "falhas": 0,
+                           "rejeitadas_circuito": 0, "espera_fila_s": 0.0, "espera_novas_tentativas_s": 0.0}
+
+    def __getattr__(self, nome):
+        # Atributos próprios do backend (como `estatisticas` do BackendFalso) continuam acessíveis
+        if nome == "backend":
+            raise AttributeError(nome)
+        return getattr(self.backend, nome)
+
+    # Limite de taxa
+
+    def _ajustar_taxa(self, fator):
+        self._fator = min(1.0, max(0.1, fator))
+        for balde in (self.requisicoes, self.tokens):
+            if balde is not None:
+                balde.taxa = balde.capacidade * self._fator / 60.0
+
+    def _reservar(self, tokens):
+        """Consome as cotas de uma chamada se elas permitirem; senão, retorna a espera necessária."""
+        with self._trava_baldes:
+            espera = 0.0
+            if self.requisicoes is not None:
+                espera = self.requisicoes.espera(1)
+            if self.tokens is not None:
+                espera = max(espera, self.tokens.espera(tokens))
+            if espera <= 0:
+                if self.requisicoes is not None:
+                    self.requisicoes.consumir(1)
+                if self.tokens is not None:
+                    self.tokens.consumir(tokens)
+            return espera
+
+    def _fila_do_loop(self):
+        """A Condition e a fila de espera do loop de eventos em execução (criadas no primeiro uso nele)."""
+        loop = asyncio.get_running_loop()
+        estado = self._filas.get(loop)
+        if estado is None:
+            # Os loops já encerrados (como os de asyncio.run anteriores) não voltam a ser usados
+            self._filas = {outro: valor for outro, valor in self._filas.items() if not outro.is_closed()}
+            estado = self._filas[loop] = (asyncio.Condition(), [])
+        return estado
+
+    async def _aguardar_vez(self, tokens):
+        """Espera, na ordem de prioridade, até que as cotas permitam mais uma chamada."""
+        if self.requisicoes is None and self.tokens is None:
+            return
+        condicao, fila = self._fila_do_loop()
+        inicio = time.monotonic()
+        entrada = (prioridade_atual.get(), next(self._sequencia))
+        async with condicao:
+            heapq.heappush(fila, entrada)
+            try:
+                while True:
+                    espera = None
+                    if fila[0] is entrada:
+                        espera = self._reservar(tokens)
+                        if espera <= 0:
+                            break
+                    try:
+                        # A primeira da fila dorme até as cotas permitirem; as demais, até ela sair
+                        await asyncio.wait_for(condicao.wait(), espera)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                fila.remove(entrada)
+                heapq.heapify(fila)
+                condicao.notify_all()
+        self.contadores["espera_fila_s"] += time.monotonic() - inicio
+
+    def _debitar_resposta(self, texto):
+        # Os tokens gerados também contam para a cota (estimativa de 4 caracteres por token)
+        if self.tokens is not None:
+            with self._trava_baldes:
+                self.tokens.consumir(len(texto) // 4)
+
+    # Disjuntor
+
+    def _verificar_circuito(self):
+        if self._falhas_seguidas < self.limiar_circuito:
+            return
+        if time.monotonic() < self._aberto_ate or self._testando:
+            self.contadores["rejeitadas_circuito"] += 1
+            raise ErroCircuitoAberto("Chamadas ao modelo suspensas após falhas seguidas")
+        # Meio aberto: esta chamada testa se o modelo voltou
+        self._testando = True
+
+    def _registrar_sucesso(self):
+        self._falhas_seguidas = 0
+        self._testando = False
+        if self._fator < 1.0:
+            self._ajustar_taxa(self._fator + 0.05)
+
+    def _registrar_falha(self, erro):
+        self.contadores["falhas"] += 1
+        self._falhas_seguidas += 1
+        self._testando = False
+        if self._falhas_seguidas >= self.limiar_circuito:
+            self._aberto_ate = time.monotonic() + self.tempo_circuito
+        if erro_de_limite(erro):
+            self.contadores["recusas_limite"] += 1
+            self._ajustar_taxa(self._fator / 2)
+
+    async def _esperar_nova_tentativa(self, tentativa, uso):
+        espera = self._sorteador.uniform(0, min(self.espera_maxima, self.espera_inicial * 2 ** tentativa))
+        self.contadores["novas_tentativas"] += 1
+        self.contadores["espera_novas_tentativas_s"] += espera
+        if uso is not None:
+            uso.registrar_tentativa()
+        await asyncio.sleep(espera)
+
+    # Interface do backend
+
+    async def gerar(self, prompt, uso=None, instrucao_sistema=None):
+        partes = []
+        async for parte in self.gerar_stream(prompt, uso, instrucao_sistema, transmitir=False):
+            partes.append(parte)
+        return "".join(partes)
+
+    async def gerar_stream(self, prompt, uso=None, instrucao_sistema=None, transmitir=True):
+        tokens = (len(prompt) + len(instrucao_sistema or "")) // 4
+        self.contadores["chamadas"] += 1
+        for tentativa in range(self.max_tentativas):
+            self._verificar_circuito()
+            await self._aguardar_vez(tokens)
+            entregues = []
+            try:
+                if transmitir:
+                    async for parte in self.backend.gerar_stream(prompt, uso, instrucao_sistema):
+                        entregues.append(parte)
+                        yield parte
+                else:
+                    entregues.append(await self.backend.gerar(prompt, uso, instrucao_sistema))
+            except Exception as erro:
+                self._registrar_falha(erro)
+                if entregues or not erro_transitorio(erro) or tentativa + 1 >= self.max_tentativas:
+                    raise
+                await self._esperar_nova_tentativa(tentativa, uso)
+                continue
+            except BaseException:
+                # Cancelamento ou fechamento do gerador: a chamada de teste não chegou a um resultado
+                self._testando = False
+                raise
+            self._registrar_sucesso()
+            texto = "".join(entregues)
+            self._debitar_resposta(texto)
+            if not transmitir:
+                yield texto
+            return
+
+    def estatisticas_cliente(self):
+        """Retorna os contadores de chamadas, novas tentativas, recusas por cota e esperas."""
+        return dict(self.contadores, fator_taxa=self._fator,
+                    circuito_aberto=self._falhas_seguidas >= self.limiar_circuito
+                    and time.monotonic() < self._aberto_ate)
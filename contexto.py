@@ -0,0 +1,201 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Seleção de Contexto - Escolhe, para cada especialista, as partes relevantes da conversa
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+from collections import OrderedDict
+
+from historico import formatar_item_historico, montar_transcricao, resumir_linha
+
+
+class SeletorContexto:
+    """
+    Monta o histórico do prompt de cada especialista só com as partes da conversa que lhe interessam.
+
+    As mensagens do usuário entram sempre. As respostas do próprio especialista e dos
+    especialistas relacionados a ele (os de perfil mais parecido no índice do roteador
+    local) também; as dos demais especialistas e as respostas integradas entram quando
+    a pontuação do roteador para o seu conteúdo, relativa à do especialista mais
+    indicado, chega a `limiar_relevancia`. O restante é omitido.
+
+    Os itens escolhidos, do mais recente para o mais antigo, preenchem a janela até o
+    orçamento de tokens do especialista; os seguintes são reduzidos a uma linha de
+    resumo. O orçamento diminui (até `fracao_minima`) para os especialistas pouco
+    indicados pela mensagem atual, como os secundários de uma consulta a vários.
+
+    A pontuação de cada item é calculada uma única vez, quando ele aparece pela primeira
+    vez, e guardada para as conversas mais recentes, junto com a última transcrição
+    montada para cada especialista: enquanto a conversa não muda (como nas várias
+    montagens de prompt de um mesmo turno), ela é reaproveitada sem nova seleção. Os
+    itens cobertos pelo resumo estruturado da conversa, quando houver, são representados
+    por ele; esse resumo e o perfil da propriedade abrem a transcrição de todos os
+    especialistas, e com o perfil preenchido a janela se reduz como na transcrição
+    completa do Historico.
+    """
+
+    # Quantidade de conversas cujas pontuações são mantidas em memória
+    MAX_CONVERSAS = 128
+
+    def __init__(self, roteador, orcamento_tokens=1500, limiar_relevancia=0.5, fracao_minima=0.5,
+                 margem_relacionados=0.75, orcamentos=None, max_itens=200):
+        """
+        Args:
+            roteador: O RoteadorLocal com os especialistas registrados
+            orcamento_tokens: Tokens (cerca de 4 caracteres cada) da janela de cada especialista
+            limiar_relevancia: Relevância mínima (0 a 1) para incluir as respostas de outros especialistas
+            fracao_minima: Fração do orçamento que resta ao especialista menos indicado pela mensagem
+            margem_relacionados: Fração da maior afinidade de um especialista a partir da qual
+                outro especialista é considerado relacionado a ele
+            orcamentos: Orçamentos próprios de alguns especialistas (nome -> tokens)
+            max_itens: Quantidade máxima de itens examinados, a partir do mais recente
+        """
+        self.roteador = roteador
+        self.orcamento_tokens = orcamento_tokens
+        self.limiar_relevancia = limiar_relevancia
+        self.fracao_minima = fracao_minima
+        self.margem_relacionados = margem_relacionados
+        self.orcamentos = dict(orcamentos or {})
+        self.max_itens = max_itens
+        self._conversas = OrderedDict()
+        self._relacionados = {}
+        self.estatisticas = {"selecoes": 0, "reaproveitadas": 0, "itens_incluidos": 0, "itens_resumidos": 0,
+                             "itens_omitidos": 0, "caracteres_omitidos": 0}
+
+    def relacionados(self, nome):
+        """Especialistas cujo perfil está entre os mais parecidos com o de `nome`."""
+        afinidades = self.roteador.afinidades(nome)
+        guardado = self._relacionados.get(nome)
+        # As afinidades são recalculadas (em um novo dicionário) quando o índice do roteador muda
+        if guardado is None or guardado[0] is not afinidades:
+            maior = max(afinidades.values(), default=0.0)
+            escolhidos = frozenset(outro for outro, valor in afinidades.items()
+                                   if maior > 0 and valor >= maior * self.margem_relacionados)
+            guardado = self._relacionados[nome] = (afinidades, escolhidos)
+        return guardado[1]
+
+    def _pontuar(self, texto):
+        """Pontuações do roteador para o texto, relativas à maior delas."""
+        pontuacoes = self.roteador.pontuar(texto)
+        maior = max(pontuacoes.values(), default=0.0)
+        return {nome: valor / maior for nome, valor in pontuacoes.items()} if maior > 0 else {}
+
+    def _itens(self, historico):
+        """
+        Papel, autor, pontuações, linha de resumo e tamanho de cada item, calculados só para os novos.
+
+        Returns:
+            A lista desses itens e o dicionário das transcrições já montadas para a conversa
+        """
+        chave = id(historico)
+        entrada = self._conversas.get(chave)
+        if entrada is None or entrada[0] is not historico or len(historico) < len(entrada[1]):
+            entrada = (historico, [], {})
+            self._conversas[chave] = entrada
+            if len(self._conversas) > self.MAX_CONVERSAS:
+                self._conversas.popitem(last=False)
+        else:
+            self._conversas.move_to_end(chave)
+
+        itens = entrada[1]
+        for indice in range(len(itens), len(historico)):
+            item = historico[indice]
+            linha = formatar_item_historico(item)
+            papel = item.get("papel")
+            pontuacoes = self._pontuar(item.get("conteúdo", "")) if linha else {}
+            itens.append((papel, item.get("nome"), pontuacoes, resumir_linha(linha) if linha else "", len(linha)))
+        return itens, entrada[2]
+
+    def _relevancia(self, nome, papel, autor, pontuacoes):
+        if papel == "usuário" or autor == nome or (papel == "especialista" and autor in self.relacionados(nome)):
+            return 1.0
+        return pontuacoes.get(nome, 0.0)
+
+    def _fracao_orcamento(self, nome, itens):
+        """Fração do orçamento conforme o quanto a mensagem atual (a última do usuário) indica o especialista."""
+        for papel, _, pontuacoes, _, _ in reversed(itens):
+            if papel == "usuário":
+                if pontuacoes:
+                    return self.fracao_minima + (1 - self.fracao_minima) * pontuacoes.get(nome, 0.0)
+                break
+        # Sem termos reconhecíveis (como em "e quanto custa?"), vale o orçamento inteiro
+        return 1.0
+
+    def transcricao(self, nome, historico, janela_caracteres=6000, limite_resumo=1500):
+        """
+        Monta a transcrição do `historico` para o especialista `nome`.
+
+        Args:
+            nome: Nome do especialista no roteador
+            historico: O histórico da conversa (Historico ou lista de itens)
+            janela_caracteres: Tamanho máximo da janela definido pelo próprio especialista
+            limite_resumo: Tamanho máximo do resumo definido pelo próprio especialista
+
+        Returns:
+            O texto no mesmo formato da transcrição completa
+        """
+        itens, montadas = self._itens(historico)
+        # A transcrição só muda com a conversa, o resumo estruturado, o perfil e os relacionados
+        resumo_estruturado = getattr(historico, "resumo_estruturado", None)
+        contexto = historico.contexto_estruturado() if hasattr(historico, "contexto_estruturado") else ""
+        estado = (len(itens), resumo_estruturado, contexto, self.relacionados(nome))
+        chave = (nome, janela_caracteres, limite_resumo)
+        montada = montadas.get(chave)
+        if montada is not None and montada[0] == estado:
+            self.estatisticas["reaproveitadas"] += 1
+            return montada[1]
+
+        fracao = self._fracao_orcamento(nome, itens)
+        limite_janela = min(janela_caracteres, self.orcamentos.get(nome, self.orcamento_tokens) * 4) * fracao
+        limite_resumo *= fracao
+        if getattr(historico, "perfil", None):
+            limite_janela *= historico.FRACAO_JANELA_COM_PERFIL
+        janela, resumo = [], []
+        tamanho_janela = tamanho_resumo = 0
+        incluidos = omitidos = caracteres_omitidos = 0
+        janela_aberta = True
+        # Os itens cobertos pelo resumo estruturado da conversa não são examinados
+        primeiro = resumo_estruturado.ate if resumo_estruturado is not None else 0
+        examinados = range(len(itens) - 1, max(primeiro - 1, len(itens) - 1 - self.max_itens), -1)
+        for indice in examinados:
+            papel, autor, pontuacoes, linha_resumo, tamanho = itens[indice]
+            if not tamanho:
+                continue
+            if self._relevancia(nome, papel, autor, pontuacoes) < self.limiar_relevancia:
+                omitidos += 1
+                caracteres_omitidos += tamanho
+                continue
+            if janela_aberta:
+                # Mantém ao menos a última linha na janela, mesmo que ela sozinha exceda o limite
+                if tamanho_janela + tamanho <= limite_janela or not janela:
+                    janela.append(formatar_item_historico(historico[indice]))
+                    tamanho_janela += tamanho
+                    incluidos += 1
+                    continue
+                janela_aberta = False
+            if tamanho_resumo + len(linha_resumo) + 1 > limite_resumo:
+                break
+            resumo.append(linha_resumo)
+            tamanho_resumo += len(linha_resumo) + 1
+        else:
+            # A conversa inteira em memória foi examinada: cabe ainda o resumo dos itens anteriores a ela
+            if len(examinados) == len(itens) and resumo_estruturado is None:
+                for linha_resumo in reversed(getattr(historico, "resumo_anterior", ())):
+                    if tamanho_resumo + len(linha_resumo) + 1 > limite_resumo:
+                        break
+                    resumo.append(linha_resumo)
+                    tamanho_resumo += len(linha_resumo) + 1
+
+        estatisticas = self.estatisticas
+        estatisticas["selecoes"] += 1
+        estatisticas["itens_incluidos"] += incluidos
+        estatisticas["itens_resumidos"] += len(resumo)
+        estatisticas["itens_omitidos"] += omitidos
+        estatisticas["caracteres_omitidos"] += caracteres_omitidos
+        resumo.reverse()
+        janela.reverse()
+        texto = montar_transcricao(resumo, "".join(janela))
+        texto = f"{contexto}\n\n{texto}" if contexto else texto
+        montadas[chave] = (estado, texto)
+        return texto
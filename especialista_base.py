@@ -0,0 +1,283 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Especialista Base - Comportamento comum a todos os agentes especialistas
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import importlib
+from collections import OrderedDict
+
+from assincrono import executar_sincrono, iterar_sincrono
+from backend_modelo import como_backend
+from cache_respostas import chave_cache, resumo_contexto, resumo_textos
+# A transcrição incremental fica em historico.py; os nomes continuam disponíveis aqui por compatibilidade
+from historico import Historico, TranscricaoIncremental, formatar_item_historico, resumir_linha
+from instrumentacao import INSTRUMENTACAO_DESATIVADA
+
+
+class EspecialistaBase:
+    """
+    Classe base dos agentes especialistas do sistema AgriSmart.
+
+    As subclasses definem `definir_personalidade` e `definir_instrucoes`; a montagem
+    do prompt, a consulta ao modelo e a formatação do histórico ficam aqui.
+
+    A personalidade e as instruções, que não mudam entre perguntas, formam a instrução
+    de sistema, montada uma única vez e entregue ao backend separadamente; o prompt de
+    cada pergunta leva apenas o histórico e a mensagem.
+    """
+
+    # Quantidade de históricos (conversas) cuja transcrição é mantida em memória
+    MAX_TRANSCRICOES = 128
+
+    def __init__(self, modelo_gemini, janela_caracteres=6000, limite_resumo=1500):
+        """
+        Inicializa o especialista com o modelo Gemini.
+
+        Args:
+            modelo_gemini: O BackendModelo usado para gerar as respostas (um
+                `genai.GenerativeModel` também é aceito e adaptado automaticamente)
+            janela_caracteres: Tamanho máximo, em caracteres (cerca de 4 por token), das
+                interações recentes incluídas no prompt
+            limite_resumo: Tamanho máximo, em caracteres, do resumo das interações antigas
+        """
+        self.modelo = como_backend(modelo_gemini)
+        self.janela_caracteres = janela_caracteres
+        self.limite_resumo = limite_resumo
+        self.cache = None
+        self.itens_contexto_cache = 2
+        self.nome = type(self).__name__
+        self.instrumentacao = INSTRUMENTACAO_DESATIVADA
+        self.seletor_contexto = None
+        self._transcricoes = OrderedDict()
+        self.definir_personalidade()
+        self.definir_instrucoes()
+        self.instrucao_sistema = self.construir_instrucao_sistema()
+
+    def definir_personalidade(self):
+        """Define a personalidade e conhecimentos do especialista."""
+        raise NotImplementedError
+
+    def definir_instrucoes(self):
+        """Define as instruções de resposta acrescentadas ao final do prompt."""
+        self.instrucoes = """
+        Forneça uma resposta detalhada e especializada, considerando o contexto da conversa.
+        Se a pergunta não estiver relacionada às suas especialidades, indique quais outros
+        especialistas poderiam ajudar melhor.
+        """
+
+    def configurar_cache(self, cache, itens_contexto=2):
+        """
+        Coloca um cache de respostas na frente das chamadas ao modelo.
+
+        Args:
+            cache: Um CacheRespostas (ou None para desativar)
+            itens_contexto: Quantos itens anteriores do histórico compõem a chave do cache
+        """
+        self.cache = cache
+        self.itens_contexto_cache = itens_contexto
+
+    def configurar_instrumentacao(self, instrumentacao, nome=None):
+        """
+        Define onde as medições das respostas deste especialista são registradas.
+
+        Args:
+            instrumentacao: Uma Instrumentacao (ou None para desativar)
+            nome: Nome com que o especialista aparece nas medições (padrão: nome da classe)
+        """
+        self.instrumentacao = instrumentacao or INSTRUMENTACAO_DESATIVADA
+        if nome is not None:
+            self.nome = nome
+
+    def configurar_contexto(self, seletor, nome=None):
+        """
+        Passa a incluir no prompt apenas as partes da conversa relevantes para este especialista.
+
+        Args:
+            seletor: Um SeletorContexto (ou None para usar a conversa inteira)
+            nome: Nome do especialista no roteamento (padrão: o nome atual)
+        """
+        self.seletor_contexto = seletor
+        if nome is not None:
+            self.nome = nome
+
+    @property
+    def identificador(self):
+        """Identifica o especialista nas chaves de cache (independe do nome de registro)."""
+        return type(self).__name__
+
+    def _chave_cache(self, mensagem, historico):
+        """
+        Monta a chave de cache a partir do especialista, da pergunta e do histórico recente.
+
+        O perfil da propriedade e o resumo estruturado, que abrem o histórico do prompt,
+        também entram na chave: conversas de propriedades diferentes não compartilham respostas.
+        """
+        fim = len(historico)
+        # A pergunta atual já foi acrescentada ao histórico pelo gerente e não faz parte do contexto
+        if fim and historico[-1].get("papel") == "usuário" and historico[-1].get("conteúdo") == mensagem:
+            fim -= 1
+        inicio = max(0, fim - self.itens_contexto_cache)
+        contexto = resumo_contexto(historico[inicio:fim]) if fim > inicio else ""
+        estruturado = historico.contexto_estruturado() if hasattr(historico, "contexto_estruturado") else ""
+        if estruturado:
+            contexto = f"{contexto}\x1f{resumo_textos([estruturado])}"
+        return chave_cache(self.identificador, mensagem, contexto)
+
+    def construir_instrucao_sistema(self):
+        """Constrói a parte fixa do prompt: a personalidade seguida das instruções de resposta."""
+        return f"{self.personalidade.strip()}\n\n{self.instrucoes.strip()}"
+
+    def construir_prompt(self, mensagem, historico):
+        """Constrói a parte variável do prompt: o histórico e a mensagem atual."""
+        return "".join(("Histórico da conversa:\n", self._formatar_historico(historico),
+                        '\nPergunta do usuário: "', mensagem, '"'))
+
+    async def responder_async(self, mensagem, historico):
+        """
+        Gera uma resposta especializada.
+
+        Args:
+            mensagem: A pergunta ou solicitação do usuário
+            historico: O histórico da conversa para contexto
+
+        Returns:
+            Uma resposta dentro da especialidade do agente
+        """
+        partes = []
+        async for parte in self._gerar(mensagem, historico, transmitir=False):
+            partes.append(parte)
+        return "".join(partes)
+
+    def responder(self, mensagem, historico):
+        """Versão síncrona de `responder_async`."""
+        return executar_sincrono(self.responder_async(mensagem, historico))
+
+    def responder_stream_async(self, mensagem, historico):
+        """
+        Gera a resposta especializada em partes, à medida que o modelo as produz.
+
+        Returns:
+            Um gerador assíncrono de trechos de texto
+        """
+        return self._gerar(mensagem, historico, transmitir=True)
+
+    def responder_stream(self, mensagem, historico):
+        """Versão síncrona de `responder_stream_async` (um gerador comum)."""
+        return iterar_sincrono(self.responder_stream_async(mensagem, historico))
+
+    async def _gerar(self, mensagem, historico, transmitir):
+        """Consulta o cache e o modelo, produzindo a resposta em um ou mais trechos."""
+        with self.instrumentacao.medir("especialista", self.nome) as medicao:
+            chave = None
+            if self.cache is not None:
+                chave = self._chave_cache(mensagem, historico)
+                resposta_guardada = self.cache.obter(chave)
+                medicao.registrar_cache(resposta_guardada is not None)
+                if resposta_guardada is not None:
+                    medicao.registrar_resposta(resposta_guardada)
+                    yield resposta_guardada
+                    return
+
+            prompt = self.construir_prompt(mensagem, historico)
+            medicao.registrar_prompt(prompt)
+
+            # Gera a resposta usando a API assíncrona do backend do modelo
+            if transmitir:
+                partes = []
+                async for parte in self.modelo.gerar_stream(prompt, medicao, self.instrucao_sistema):
+                    partes.append(parte)
+                    yield parte
+                texto = "".join(partes)
+            else:
+                texto = await self.modelo.gerar(prompt, medicao, self.instrucao_sistema)
+                yield texto
+            medicao.registrar_resposta(texto)
+
+            if chave is not None:
+                self.cache.guardar(chave, texto)
+
+    def _formatar_historico(self, historico):
+        """Formata o histórico da conversa para incluir no prompt, reaproveitando a transcrição já renderizada."""
+        if self.seletor_contexto is not None:
+            return self.seletor_contexto.transcricao(self.nome, historico, self.janela_caracteres, self.limite_resumo)
+        if isinstance(historico, Historico):
+            return historico.transcricao(self.janela_caracteres, self.limite_resumo)
+
+        # Listas comuns: as transcrições ficam com o especialista, para as conversas mais recentes
+        chave = id(historico)
+        entrada = self._transcricoes.get(chave)
+        if entrada is None or entrada[0] is not historico:
+            entrada = (historico, TranscricaoIncremental(self.janela_caracteres, self.limite_resumo))
+            self._transcricoes[chave] = entrada
+            if len(self._transcricoes) > self.MAX_TRANSCRICOES:
+                self._transcricoes.popitem(last=False)
+        else:
+            self._transcricoes.move_to_end(chave)
+
+        transcricao = entrada[1]
+        transcricao.atualizar(historico)
+        return transcricao.texto
+
+
+class EspecialistaAdiado:
+    """
+    Representante de um especialista que só é importado e criado no primeiro uso.
+
+    Permite registrar todos os especialistas no gerente sem carregar os seus módulos:
+    o agente real é construído quando é consultado pela primeira vez (ou quando a sua
+    personalidade é lida para montar o índice de roteamento). As configurações de cache
+    e instrumentação recebidas antes disso são guardadas e aplicadas na criação.
+    """
+
+    def __init__(self, fabrica, *args, **kwargs):
+        """
+        Args:
+            fabrica: A classe do especialista, ou o seu caminho no formato "modulo:Classe"
+            args, kwargs: Argumentos repassados ao construtor da classe (por exemplo, o modelo)
+        """
+        self._fabrica = fabrica
+        self._args = args
+        self._kwargs = kwargs
+        self._especialista = None
+        self._configuracoes = {}
+
+    @property
+    def carregado(self):
+        """Indica se o especialista real já foi criado."""
+        return self._especialista is not None
+
+    def obter(self):
+        """Retorna o especialista real, importando o módulo e criando-o se necessário."""
+        if self._especialista is None:
+            fabrica = self._fabrica
+            if isinstance(fabrica, str):
+                modulo, _, classe = fabrica.partition(":")
+                fabrica = getattr(importlib.import_module(modulo), classe)
+            especialista = fabrica(*self._args, **self._kwargs)
+            for metodo, argumentos in self._configuracoes.items():
+                getattr(especialista, metodo)(*argumentos)
+            self._especialista = especialista
+        return self._especialista
+
+    def configurar_cache(self, *argumentos):
+        self._configurar("configurar_cache", argumentos)
+
+    def configurar_instrumentacao(self, *argumentos):
+        self._configurar("configurar_instrumentacao", argumentos)
+
+    def configurar_contexto(self, *argumentos):
+        self._configurar("configurar_contexto", argumentos)
+
+    def _configurar(self, metodo, argumentos):
+        if self._especialista is not None:
+            getattr(self._especialista, metodo)(*argumentos)
+        else:
+            self._configuracoes[metodo] = argumentos
+
+    def __getattr__(self, nome):
+        # Chamado apenas para atributos que o representante não tem
+        if nome.startswith("_"):
+            raise AttributeError(nome)
+        return getattr(self.obter(), nome)
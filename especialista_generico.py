@@ -0,0 +1,115 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Especialista Genérico - Agentes especialistas definidos no catálogo `especialistas.json`
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import json
+import os
+
+from especialista_base import EspecialistaBase
+
+# Catálogo com a definição dos especialistas do sistema
+CATALOGO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "especialistas.json")
+
+_catalogos = {}
+
+
+class DefinicaoEspecialista:
+    """
+    Definição de um especialista lida do catálogo.
+
+    Além dos textos, guarda a instrução de sistema (personalidade e instruções),
+    montada uma única vez na leitura do catálogo e compartilhada por todas as
+    instâncias do especialista.
+    """
+
+    __slots__ = ("nome", "classe", "personalidade", "instrucoes", "palavras_chave", "descricao", "instrucao_sistema")
+
+    def __init__(self, nome, personalidade, instrucoes, palavras_chave="", classe=None, descricao=""):
+        self.nome = nome
+        self.classe = classe or nome
+        self.personalidade = personalidade
+        self.instrucoes = instrucoes
+        self.palavras_chave = palavras_chave
+        self.descricao = descricao
+        self.instrucao_sistema = f"{personalidade}\n\n{instrucoes}"
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Cria a definição a partir de uma entrada do catálogo (textos como string ou lista de linhas)."""
+        def texto(valor):
+            return "\n".join(valor) if isinstance(valor, list) else valor
+
+        return cls(dados["nome"], texto(dados["personalidade"]), texto(dados["instrucoes"]),
+                   dados.get("palavras_chave", ""), dados.get("classe"), dados.get("descricao", ""))
+
+    def __repr__(self):
+        return f"DefinicaoEspecialista({self.nome!r})"
+
+
+def carregar_catalogo(caminho=None):
+    """
+    Lê o catálogo de especialistas (apenas uma vez por arquivo).
+
+    Args:
+        caminho: Arquivo JSON do catálogo (padrão: `especialistas.json` ao lado deste módulo)
+
+    Returns:
+        Um dicionário nome -> DefinicaoEspecialista, na ordem do catálogo
+    """
+    caminho = caminho or CATALOGO_PADRAO
+    catalogo = _catalogos.get(caminho)
+    if catalogo is None:
+        with open(caminho, encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        catalogo = {}
+        for entrada in dados["especialistas"]:
+            definicao = DefinicaoEspecialista.de_dict(entrada)
+            catalogo[definicao.nome] = definicao
+        _catalogos[caminho] = catalogo
+    return catalogo
+
+
+class EspecialistaGenerico(EspecialistaBase):
+    """
+    Agente especialista cuja personalidade e instruções vêm do catálogo.
+
+    Subclasses podem fixar a definição pelo atributo `NOME`, como fazem os módulos
+    `especialista_*.py` mantidos por compatibilidade.
+    """
+
+    # Nome da definição no catálogo usada quando nenhuma é passada ao construtor
+    NOME = None
+
+    def __init__(self, modelo_gemini, definicao=None, **opcoes):
+        """
+        Args:
+            modelo_gemini: O BackendModelo usado para gerar as respostas
+            definicao: Uma DefinicaoEspecialista, ou o nome de uma entrada do catálogo padrão
+            opcoes: Opções repassadas a EspecialistaBase (janela_caracteres, limite_resumo)
+        """
+        if definicao is None:
+            definicao = self.NOME
+        if isinstance(definicao, str):
+            definicao = carregar_catalogo()[definicao]
+        self.definicao = definicao
+        super().__init__(modelo_gemini, **opcoes)
+        self.nome = definicao.nome
+
+    @property
+    def identificador(self):
+        return self.definicao.classe
+
+    def definir_personalidade(self):
+        """Usa a personalidade definida no catálogo."""
+        self.personalidade = self.definicao.personalidade
+
+    def definir_instrucoes(self):
+        """Usa as instruções definidas no catálogo."""
+        self.instrucoes = self.definicao.instrucoes
+
+    def construir_instrucao_sistema(self):
+        """Usa a instrução de sistema já montada na definição."""
+        return self.definicao.instrucao_sistema
@@ -0,0 +1,332 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Histórico - Armazenamento compacto das conversas e transcrição incremental
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import sys
+import zlib
+from collections import deque
+
+from perfil import PerfilPropriedade
+
+# Custo fixo aproximado, em bytes, de cada registro do histórico (objeto com __slots__)
+CUSTO_REGISTRO = 72
+
+# Conteúdos a partir deste tamanho, em caracteres, são compactados quando saem da parte recente
+MIN_COMPACTAR = 256
+
+
+def formatar_item_historico(item):
+    """Formata um item do histórico como uma linha da transcrição."""
+    if item["papel"] == "usuário":
+        return f"Usuário: {item['conteúdo']}\n"
+    elif item["papel"] == "sistema":
+        return f"Sistema: {item['conteúdo']}\n"
+    elif item["papel"] == "especialista":
+        return f"{item['nome']}: {item['conteúdo']}\n"
+    return ""
+
+
+def resumir_linha(linha, limite=160):
+    """Reduz uma linha da transcrição ao autor e à primeira frase do conteúdo."""
+    autor, _, conteudo = linha.partition(": ")
+    conteudo = " ".join(conteudo.split())
+    frase = conteudo.split(". ", 1)[0]
+    if len(frase) > limite:
+        frase = frase[:limite].rsplit(" ", 1)[0] + "..."
+    return f"{autor}: {frase}"
+
+
+def montar_transcricao(resumo, janela):
+    """
+    Monta o texto da transcrição usado nos prompts.
+
+    Args:
+        resumo: Entradas de resumo das interações antigas, da mais antiga para a mais recente
+        janela: Linhas recentes já formatadas, concatenadas
+    """
+    if not resumo:
+        return janela
+    resumo = "\n".join(resumo)
+    return f"Resumo das interações anteriores:\n{resumo}\n\nInterações recentes:\n{janela}"
+
+
+class TranscricaoIncremental:
+    """
+    Transcrição pré-renderizada de um histórico de conversa.
+
+    Apenas os itens novos do histórico são formatados a cada atualização. As linhas
+    mais recentes ficam em uma janela limitada por `janela_caracteres`; as que saem
+    da janela são reduzidas a uma frase e acumuladas em um resumo que também tem
+    tamanho limitado. Assim o custo de montar o prompt não cresce com a conversa.
+
+    O histórico deve ser apenas acrescido (append); se ele diminuir, a transcrição
+    é refeita do zero.
+    """
+
+    def __init__(self, janela_caracteres=6000, limite_resumo=1500, resumo_inicial=(), inicio=0):
+        """
+        Args:
+            janela_caracteres: Tamanho máximo, em caracteres, das linhas recentes
+            limite_resumo: Tamanho máximo, em caracteres, do resumo das linhas antigas
+            resumo_inicial: Entradas de resumo de itens anteriores que não estão no histórico
+                (como os de uma conversa retomada do disco)
+            inicio: Índice do primeiro item do histórico incluído (os anteriores já estão resumidos)
+        """
+        self.janela_caracteres = janela_caracteres
+        self.limite_resumo = limite_resumo
+        self._resumo_inicial = resumo_inicial
+        self._inicio = inicio
+        self._linhas = deque()
+        self._tamanho_janela = 0
+        self._resumo = deque()
+        self._tamanho_resumo = 0
+        self._consumidos = inicio
+        self._renderizado = ""
+        for entrada in resumo_inicial:
+            self._acrescentar_resumo(entrada)
+        if self._resumo:
+            self._renderizado = self._renderizar()
+
+    def atualizar(self, historico):
+        """Incorpora à transcrição os itens do histórico ainda não processados."""
+        if len(historico) < self._consumidos:
+            self.__init__(self.janela_caracteres, self.limite_resumo, self._resumo_inicial, self._inicio)
+        if len(historico) == self._consumidos:
+            return
+
+        for indice in range(self._consumidos, len(historico)):
+            linha = formatar_item_historico(historico[indice])
+            if linha:
+                self._linhas.append(linha)
+                self._tamanho_janela += len(linha)
+        self._consumidos = len(historico)
+
+        # Mantém ao menos a última linha na janela, mesmo que ela sozinha exceda o limite
+        while self._tamanho_janela > self.janela_caracteres and len(self._linhas) > 1:
+            antiga = self._linhas.popleft()
+            self._tamanho_janela -= len(antiga)
+            self._acrescentar_resumo(resumir_linha(antiga))
+
+        self._renderizado = self._renderizar()
+
+    def _acrescentar_resumo(self, entrada):
+        """Acrescenta uma entrada ao resumo, descartando as mais antigas se exceder o limite."""
+        self._resumo.append(entrada)
+        self._tamanho_resumo += len(entrada) + 1
+        while self._tamanho_resumo > self.limite_resumo and len(self._resumo) > 1:
+            self._tamanho_resumo -= len(self._resumo.popleft()) + 1
+
+    def _renderizar(self):
+        """Monta o texto da transcrição a partir do resumo e da janela recente."""
+        return montar_transcricao(self._resumo, "".join(self._linhas))
+
+    @property
+    def texto(self):
+        """Texto pré-renderizado da transcrição."""
+        return self._renderizado
+
+
+class Registro:
+    """
+    Um item do histórico: o papel do autor, o nome do especialista e o conteúdo.
+
+    Papéis e nomes são internados (uma única cópia de cada texto para todas as
+    conversas) e o conteúdo pode estar compactado com zlib, sendo descompactado a cada
+    leitura. Para compatibilidade com o formato anterior, o registro também se lê como
+    um dicionário com as chaves "papel", "nome" e "conteúdo".
+    """
+
+    __slots__ = ("papel", "nome", "_conteudo")
+
+    def __init__(self, papel, conteudo, nome=None):
+        self.papel = sys.intern(papel)
+        self.nome = sys.intern(nome) if nome is not None else None
+        self._conteudo = conteudo
+
+    @classmethod
+    def de_dict(cls, item):
+        return cls(item["papel"], item.get("conteúdo", ""), item.get("nome"))
+
+    @property
+    def conteudo(self):
+        conteudo = self._conteudo
+        return zlib.decompress(conteudo).decode("utf-8") if isinstance(conteudo, bytes) else conteudo
+
+    @property
+    def compactado(self):
+        return isinstance(self._conteudo, bytes)
+
+    def compactar(self):
+        """Compacta o conteúdo, se ele for grande o bastante e a compactação valer a pena."""
+        conteudo = self._conteudo
+        if isinstance(conteudo, bytes) or len(conteudo) < MIN_COMPACTAR:
+            return
+        compactado = zlib.compress(conteudo.encode("utf-8"))
+        if len(compactado) < len(conteudo):
+            self._conteudo = compactado
+
+    def tamanho_estimado(self):
+        """Estimativa, em bytes, da memória ocupada pelo registro."""
+        return CUSTO_REGISTRO + len(self._conteudo)
+
+    def get(self, chave, padrao=None):
+        if chave == "conteúdo":
+            return self.conteudo
+        if chave == "papel":
+            return self.papel
+        if chave == "nome":
+            return self.nome if self.nome is not None else padrao
+        return padrao
+
+    def __getitem__(self, chave):
+        valor = self.get(chave)
+        if valor is None:
+            raise KeyError(chave)
+        return valor
+
+    def como_dict(self):
+        item = {"papel": self.papel, "conteúdo": self.conteudo}
+        if self.nome is not None:
+            item["nome"] = self.nome
+        return item
+
+    def __repr__(self):
+        return f"Registro({self.papel!r}, nome={self.nome!r})"
+
+
+class Historico:
+    """
+    Histórico de uma conversa, apenas acrescido (append).
+
+    Guarda os itens como Registro e compacta o conteúdo dos registros que saem dos
+    `recentes` últimos, já que as mensagens antigas só voltam a ser lidas na
+    transcrição (que as incorpora uma única vez) ou ao gravar a sessão em disco.
+    Mantém também as transcrições incrementais usadas nos prompts, de modo que o
+    texto recente já renderizado é obtido sem percorrer a conversa.
+
+    Aceita os itens no formato de dicionário usado pelo sistema ({"papel": ...,
+    "conteúdo": ..., "nome": ...}) e se comporta como uma lista somente leitura.
+
+    Uma conversa retomada do disco pode conter só os itens finais: `inicio` é a
+    quantidade de itens anteriores que ficaram de fora, representados pelas entradas
+    de `resumo_anterior`. O `observador`, se definido, é chamado com a posição
+    absoluta e o registro de cada item acrescentado (é assim que a persistência
+    acompanha a conversa).
+
+    O `resumo_estruturado` (um ResumoConversa, instalado pelo ResumidorConversas) cobre
+    os itens iniciais da conversa; com ele, a transcrição é o resumo seguido apenas dos
+    itens posteriores. O `perfil` (um PerfilPropriedade) guarda os dados da propriedade
+    informados pelo usuário e, quando preenchido, abre a transcrição, cuja janela passa
+    a ser só `FRACAO_JANELA_COM_PERFIL` da pedida.
+    """
+
+    # Fração da janela de mensagens recentes que resta quando o perfil está preenchido: os
+    # dados da propriedade, que faziam a conversa antiga ser relida, já estão no perfil
+    FRACAO_JANELA_COM_PERFIL = 0.75
+
+    __slots__ = ("_registros", "recentes", "_bytes", "_transcricoes", "inicio", "resumo_anterior", "observador",
+                 "resumo_estruturado", "perfil")
+
+    def __init__(self, itens=(), recentes=8, inicio=0, resumo_anterior=()):
+        """
+        Args:
+            itens: Itens iniciais (dicionários ou Registro)
+            recentes: Quantos registros finais permanecem sem compactação
+            inicio: Quantidade de itens anteriores a `itens` que não estão em memória
+            resumo_anterior: Entradas de resumo (uma por linha) desses itens anteriores
+        """
+        self._registros = []
+        self.recentes = recentes
+        self._bytes = 0
+        self._transcricoes = None
+        self.inicio = inicio
+        self.resumo_anterior = tuple(resumo_anterior)
+        self.observador = None
+        self.resumo_estruturado = None
+        self.perfil = PerfilPropriedade()
+        for item in itens:
+            self.append(item)
+
+    @property
+    def total(self):
+        """Quantidade de itens da conversa, incluindo os que não estão em memória."""
+        return self.inicio + len(self._registros)
+
+    def append(self, item):
+        """Acrescenta um item (dicionário ou Registro) ao final do histórico."""
+        registro = item if isinstance(item, Registro) else Registro.de_dict(item)
+        if self.observador is not None:
+            self.observador(self.total, registro)
+        self._registros.append(registro)
+        self._bytes += registro.tamanho_estimado()
+        if len(self._registros) > self.recentes:
+            antigo = self._registros[-self.recentes - 1]
+            antes = antigo.tamanho_estimado()
+            antigo.compactar()
+            self._bytes += antigo.tamanho_estimado() - antes
+
+    def extend(self, itens):
+        for item in itens:
+            self.append(item)
+
+    def __len__(self):
+        return len(self._registros)
+
+    def __getitem__(self, indice):
+        return self._registros[indice]
+
+    def __iter__(self):
+        return iter(self._registros)
+
+    def tamanho_estimado(self):
+        """Estimativa, em bytes, da memória ocupada pelos registros (mantida a cada acréscimo)."""
+        return self._bytes
+
+    def transcricao(self, janela_caracteres=6000, limite_resumo=1500):
+        """
+        Retorna a transcrição renderizada para os prompts, atualizada só com os itens novos.
+
+        Cada combinação de janela e limite de resumo tem a sua TranscricaoIncremental; um
+        novo resumo estruturado a substitui por outra que começa no fim do resumo e cujas
+        linhas de resumo ocupam só o que o resumo estruturado deixar livre do limite. O
+        preenchimento do perfil também a substitui, pela de janela reduzida.
+        """
+        if self._transcricoes is None:
+            self._transcricoes = {}
+        chave = (janela_caracteres, limite_resumo)
+        resumo = self.resumo_estruturado
+        inicio = resumo.ate if resumo is not None else 0
+        com_perfil = bool(self.perfil)
+        if com_perfil:
+            janela_caracteres = int(janela_caracteres * self.FRACAO_JANELA_COM_PERFIL)
+        guardada = self._transcricoes.get(chave)
+        if guardada is None or guardada[0] != (inicio, com_perfil):
+            # Com o resumo estruturado, as linhas de resumo antigas já estão cobertas por ele
+            if resumo is None:
+                transcricao = TranscricaoIncremental(janela_caracteres, limite_resumo, self.resumo_anterior)
+            else:
+                transcricao = TranscricaoIncremental(janela_caracteres, max(0, limite_resumo - len(resumo.texto)),
+                                                     inicio=inicio)
+            guardada = self._transcricoes[chave] = ((inicio, com_perfil), transcricao)
+        transcricao = guardada[1]
+        transcricao.atualizar(self)
+        contexto = self.contexto_estruturado()
+        return f"{contexto}\n\n{transcricao.texto}" if contexto else transcricao.texto
+
+    def contexto_estruturado(self):
+        """O perfil da propriedade e o resumo estruturado, que antecedem a transcrição nos prompts."""
+        perfil = self.perfil.texto
+        resumo = self.resumo_estruturado.texto if self.resumo_estruturado is not None else ""
+        if perfil and resumo:
+            return f"{perfil}\n\n{resumo}"
+        return perfil or resumo
+
+    def como_lista(self):
+        """Retorna os itens como dicionários (para gravar em JSON)."""
+        return [registro.como_dict() for registro in self._registros]
+
+    def __repr__(self):
+        return f"Historico({len(self._registros)} itens)"
@@ -0,0 +1,401 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Instrumentação - Mede cada etapa das chamadas ao modelo e exporta as métricas
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+# Sessão da conversa em andamento, usada para identificar as medições
+sessao_atual = ContextVar("agrismart_sessao", default=None)
+
+# Limites (em segundos) das faixas do histograma de duração exportado para o Prometheus
+FAIXAS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Medicao:
+    """
+    Medição de uma etapa: duração, tamanho do prompt e da resposta, tokens, uso de
+    cache, tentativas e erro. Registra também o que deixou de ser enviado ao modelo
+    graças ao cache de contexto (instruções de sistema já registradas).
+
+    É usada como gerenciador de contexto: a duração vai do `with` até a sua saída,
+    e uma exceção que atravesse o bloco é registrada como erro (e propagada).
+    """
+
+    __slots__ = ("etapa", "agente", "sessao", "inicio", "duracao", "bytes_prompt", "bytes_resposta",
+                 "tokens_prompt", "tokens_resposta", "tokens_cache", "bytes_economizados", "cache", "tentativas",
+                 "erro", "detalhe", "_instrumentacao")
+
+    def __init__(self, instrumentacao, etapa, agente):
+        self._instrumentacao = instrumentacao
+        self.etapa = etapa
+        self.agente = agente
+        self.sessao = sessao_atual.get()
+        self.inicio = 0.0
+        self.duracao = 0.0
+        self.bytes_prompt = 0
+        self.bytes_resposta = 0
+        self.tokens_prompt = 0
+        self.tokens_resposta = 0
+        self.tokens_cache = 0
+        self.bytes_economizados = 0
+        self.cache = None
+        self.tentativas = 0
+        self.erro = None
+        self.detalhe = None
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, rastreamento):
+        self.duracao = time.perf_counter() - self.inicio
+        if tipo is not None:
+            self.erro = tipo.__name__
+        self._instrumentacao.emitir(self)
+        return False
+
+    def registrar_prompt(self, prompt):
+        """Soma o tamanho de um prompt enviado ao modelo e conta a chamada como uma tentativa."""
+        self.bytes_prompt += len(prompt.encode("utf-8"))
+        self.tentativas += 1
+
+    def registrar_tentativa(self):
+        """Conta uma nova tentativa da mesma chamada (repetida após um erro transitório)."""
+        self.tentativas += 1
+
+    def registrar_resposta(self, texto):
+        """Soma o tamanho de um trecho da resposta."""
+        self.bytes_resposta += len(texto.encode("utf-8"))
+
+    def registrar_uso(self, tokens_prompt=0, tokens_resposta=0, tokens_cache=0):
+        """Soma os tokens informados pelo backend do modelo (`tokens_cache`: os lidos do cache de contexto)."""
+        self.tokens_prompt += tokens_prompt or 0
+        self.tokens_resposta += tokens_resposta or 0
+        self.tokens_cache += tokens_cache or 0
+
+    def registrar_economia(self, bytes_economizados):
+        """Soma os bytes de instrução de sistema que não precisaram ser reenviados."""
+        self.bytes_economizados += bytes_economizados
+
+    def registrar_cache(self, acerto):
+        """Registra se a resposta veio do cache."""
+        self.cache = "acerto" if acerto else "falha"
+
+    def anotar(self, detalhe):
+        """Acrescenta uma informação livre à medição (por exemplo, a origem do roteamento)."""
+        self.detalhe = detalhe
+
+    def como_dict(self):
+        """Retorna a medição como um dicionário serializável."""
+        return {
+            "etapa": self.etapa,
+            "agente": self.agente,
+            "sessao": self.sessao,
+            "duracao_s": self.duracao,
+            "bytes_prompt": self.bytes_prompt,
+            "bytes_resposta": self.bytes_resposta,
+            "tokens_prompt": self.tokens_prompt,
+            "tokens_resposta": self.tokens_resposta,
+            "tokens_cache": self.tokens_cache,
+            "bytes_economizados": self.bytes_economizados,
+            "cache": self.cache,
+            "tentativas": self.tentativas,
+            "erro": self.erro,
+            "detalhe": self.detalhe,
+        }
+
+
+class _MedicaoNula:
+    """Medição que não registra nada, usada quando a instrumentação está desativada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastreamento):
+        return False
+
+    def registrar_prompt(self, prompt):
+        pass
+
+    def registrar_tentativa(self):
+        pass
+
+    def registrar_resposta(self, texto):
+        pass
+
+    def registrar_uso(self, tokens_prompt=0, tokens_resposta=0, tokens_cache=0):
+        pass
+
+    def registrar_economia(self, bytes_economizados):
+        pass
+
+    def registrar_cache(self, acerto):
+        pass
+
+    def anotar(self, detalhe):
+        pass
+
+
+MEDICAO_NULA = _MedicaoNula()
+
+
+class Instrumentacao:
+    """
+    Distribui as medições para os destinos configurados (sinks).
+
+    Sem destinos, `medir` retorna sempre a mesma medição nula e o custo de uma etapa
+    instrumentada se resume a uma chamada de método.
+    """
+
+    def __init__(self, *destinos):
+        """
+        Args:
+            destinos: Objetos com um método `registrar(medicao)`, como SinkMemoria,
+                SinkJSONL e SinkPrometheus
+        """
+        self.destinos = list(destinos)
+
+    @property
+    def ativa(self):
+        return bool(self.destinos)
+
+    def adicionar_destino(self, destino):
+        self.destinos.append(destino)
+
+    def medir(self, etapa, agente=None):
+        """
+        Inicia a medição de uma etapa.
+
+        Args:
+            etapa: Nome da etapa ("turno", "roteamento", "especialista", "integracao"...)
+            agente: Nome do agente que executa a etapa
+
+        Returns:
+            Uma Medicao (ou a medição nula, se não houver destinos) para usar com `with`
+        """
+        if not self.destinos:
+            return MEDICAO_NULA
+        return Medicao(self, etapa, agente)
+
+    def emitir(self, medicao):
+        """Entrega uma medição concluída a todos os destinos."""
+        for destino in self.destinos:
+            try:
+                destino.registrar(medicao)
+            except Exception as erro:
+                print(f"Falha ao registrar medição em {type(destino).__name__}: {erro}")
+
+    def fechar(self):
+        """Fecha os destinos que mantêm recursos abertos."""
+        for destino in self.destinos:
+            if hasattr(destino, "fechar"):
+                destino.fechar()
+
+
+# Instância compartilhada pelos agentes enquanto nenhuma instrumentação é configurada
+INSTRUMENTACAO_DESATIVADA = Instrumentacao()
+
+
+class SinkMemoria:
+    """
+    Agrega as medições em memória por etapa e agente.
+
+    Guarda também as últimas `max_eventos` medições completas, com a sessão, para
+    inspeção em notebooks.
+    """
+
+    def __init__(self, max_eventos=10_000, max_amostras=1024):
+        self.eventos = deque(maxlen=max_eventos)
+        self.max_amostras = max_amostras
+        self._agregados = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, medicao):
+        with self._trava:
+            self.eventos.append(medicao)
+            chave = (medicao.etapa, medicao.agente)
+            agregado = self._agregados.get(chave)
+            if agregado is None:
+                agregado = self._agregados[chave] = {
+                    "contagem": 0, "erros": 0, "duracao_total_s": 0.0, "duracao_max_s": 0.0,
+                    "bytes_prompt": 0, "bytes_resposta": 0, "tokens_prompt": 0, "tokens_resposta": 0,
+                    "tokens_cache": 0, "bytes_economizados": 0, "cache_acertos": 0, "cache_falhas": 0, "tentativas": 0,
+                    "_duracoes": deque(maxlen=self.max_amostras),
+                }
+            agregado["contagem"] += 1
+            agregado["erros"] += medicao.erro is not None
+            agregado["duracao_total_s"] += medicao.duracao
+            agregado["duracao_max_s"] = max(agregado["duracao_max_s"], medicao.duracao)
+            agregado["bytes_prompt"] += medicao.bytes_prompt
+            agregado["bytes_resposta"] += medicao.bytes_resposta
+            agregado["tokens_prompt"] += medicao.tokens_prompt
+            agregado["tokens_resposta"] += medicao.tokens_resposta
+            agregado["tokens_cache"] += medicao.tokens_cache
+            agregado["bytes_economizados"] += medicao.bytes_economizados
+            agregado["cache_acertos"] += medicao.cache == "acerto"
+            agregado["cache_falhas"] += medicao.cache == "falha"
+            agregado["tentativas"] += medicao.tentativas
+            agregado["_duracoes"].append(medicao.duracao)
+
+    def resumo(self):
+        """
+        Retorna os agregados por etapa e agente, com a duração média e os percentis
+        50 e 95 das medições mais recentes.
+        """
+        with self._trava:
+            resumo = {}
+            for (etapa, agente), agregado in self._agregados.items():
+                duracoes = sorted(agregado["_duracoes"])
+                dados = {nome: valor for nome, valor in agregado.items() if not nome.startswith("_")}
+                dados["duracao_media_s"] = agregado["duracao_total_s"] / agregado["contagem"]
+                dados["duracao_p50_s"] = duracoes[int(0.50 * (len(duracoes) - 1))]
+                dados["duracao_p95_s"] = duracoes[int(0.95 * (len(duracoes) - 1))]
+                resumo[f"{etapa}/{agente}" if agente else etapa] = dados
+            return resumo
+
+    def da_sessao(self, sessao_id):
+        """Retorna as medições recentes de uma sessão."""
+        with self._trava:
+            return [medicao.como_dict() for medicao in self.eventos if medicao.sessao == sessao_id]
+
+    def economia_por_sessao(self):
+        """Retorna, por sessão, os bytes e tokens de instrução de sistema que não foram reenviados."""
+        with self._trava:
+            economia = defaultdict(lambda: {"bytes_economizados": 0, "tokens_cache": 0})
+            for medicao in self.eventos:
+                if medicao.bytes_economizados or medicao.tokens_cache:
+                    dados = economia[medicao.sessao]
+                    dados["bytes_economizados"] += medicao.bytes_economizados
+                    dados["tokens_cache"] += medicao.tokens_cache
+            return dict(economia)
+
+
+class SinkJSONL:
+    """Grava cada medição como uma linha JSON em um arquivo."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+        self._trava = threading.Lock()
+
+    def registrar(self, medicao):
+        dados = medicao.como_dict()
+        dados["instante"] = time.time()
+        linha = json.dumps(dados, ensure_ascii=False)
+        with self._trava:
+            self._arquivo.write(linha + "\n")
+
+    def fechar(self):
+        with self._trava:
+            self._arquivo.close()
+
+
+class SinkPrometheus:
+    """
+    Mantém contadores e histogramas no formato de texto do Prometheus.
+
+    Os rótulos são a etapa e o agente; a sessão fica de fora para não criar uma série
+    por conversa.
+    """
+
+    def __init__(self, prefixo="agrismart", faixas=FAIXAS_DURACAO):
+        self.prefixo = prefixo
+        self.faixas = faixas
+        self._trava = threading.Lock()
+        self._contagens = defaultdict(lambda: [0] * (len(faixas) + 1))
+        self._somas = defaultdict(float)
+        self._contadores = defaultdict(float)
+        self._servidor = None
+
+    def registrar(self, medicao):
+        rotulos = (medicao.etapa, medicao.agente or "")
+        with self._trava:
+            contagens = self._contagens[rotulos]
+            for indice, limite in enumerate(self.faixas):
+                if medicao.duracao <= limite:
+                    contagens[indice] += 1
+                    break
+            else:
+                contagens[-1] += 1
+            self._somas[rotulos] += medicao.duracao
+            self._contadores[("erros_total", rotulos, "")] += medicao.erro is not None
+            self._contadores[("prompt_bytes_total", rotulos, "")] += medicao.bytes_prompt
+            self._contadores[("resposta_bytes_total", rotulos, "")] += medicao.bytes_resposta
+            self._contadores[("tokens_total", rotulos, 'tipo="prompt"')] += medicao.tokens_prompt
+            self._contadores[("tokens_total", rotulos, 'tipo="resposta"')] += medicao.tokens_resposta
+            self._contadores[("tokens_total", rotulos, 'tipo="cache"')] += medicao.tokens_cache
+            self._contadores[("economizados_bytes_total", rotulos, "")] += medicao.bytes_economizados
+            self._contadores[("tentativas_total", rotulos, "")] += medicao.tentativas
+            if medicao.cache is not None:
+                self._contadores[("cache_total", rotulos, f'resultado="{medicao.cache}"')] += 1
+
+    @staticmethod
+    def _rotulos(rotulos, extra=""):
+        etapa, agente = (valor.replace("\\", "\\\\").replace('"', '\\"') for valor in rotulos)
+        texto = f'etapa="{etapa}",agente="{agente}"'
+        return f"{texto},{extra}" if extra else texto
+
+    @staticmethod
+    def _valor(valor):
+        # Contadores inteiros (bytes, tokens) saem com todos os dígitos; os demais, sem arredondar
+        if isinstance(valor, int) or float(valor).is_integer():
+            return str(int(valor))
+        return repr(float(valor))
+
+    def exportar(self):
+        """Retorna as métricas no formato de exposição de texto do Prometheus."""
+        nome_duracao = f"{self.prefixo}_etapa_duracao_segundos"
+        linhas = [f"# TYPE {nome_duracao} histogram"]
+        with self._trava:
+            for rotulos, contagens in sorted(self._contagens.items()):
+                acumulado = 0
+                for limite, contagem in zip(self.faixas + ("+Inf",), contagens):
+                    acumulado += contagem
+                    faixa = f'le="{limite}"'
+                    linhas.append(f"{nome_duracao}_bucket{{{self._rotulos(rotulos, faixa)}}} {acumulado}")
+                linhas.append(f"{nome_duracao}_sum{{{self._rotulos(rotulos)}}} {self._somas[rotulos]}")
+                linhas.append(f"{nome_duracao}_count{{{self._rotulos(rotulos)}}} {acumulado}")
+            declarados = set()
+            for (metrica, rotulos, extra), valor in sorted(self._contadores.items()):
+                nome = f"{self.prefixo}_{metrica}"
+                if nome not in declarados:
+                    linhas.append(f"# TYPE {nome} counter")
+                    declarados.add(nome)
+                linhas.append(f"{nome}{{{self._rotulos(rotulos, extra)}}} {self._valor(valor)}")
+        return "\n".join(linhas) + "\n"
+
+    def servir(self, porta=9464, endereco="0.0.0.0"):
+        """Publica as métricas em http://endereco:porta/metrics, em uma thread própria."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        destino = self
+
+        class Tratador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                corpo = destino.exportar().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer((endereco, porta), Tratador)
+        threading.Thread(target=self._servidor.serve_forever, name="agrismart-metricas", daemon=True).start()
+        return self._servidor
+
+    def fechar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor = None
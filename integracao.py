@@ -0,0 +1,81 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Integração Extrativa - Junta as respostas de vários especialistas sem chamar o modelo
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import re
+
+from roteador import extrair_termos
+
+# Estratégias de integração das respostas de vários especialistas
+INTEGRACAO_MODELO = "modelo"          # sempre uma chamada ao modelo
+INTEGRACAO_EXTRATIVA = "extrativa"    # junção local, sem chamada ao modelo
+INTEGRACAO_ADAPTATIVA = "adaptativa"  # local, a não ser que as respostas sejam longas ou repetitivas
+ESTRATEGIAS_INTEGRACAO = (INTEGRACAO_MODELO, INTEGRACAO_EXTRATIVA, INTEGRACAO_ADAPTATIVA)
+
+
+class IntegracaoExtrativa:
+    """Resultado da junção local: o texto e quantos parágrafos foram descartados por repetição."""
+
+    __slots__ = ("texto", "paragrafos", "repetidos", "caracteres")
+
+    def __init__(self, texto, paragrafos, repetidos, caracteres):
+        self.texto = texto
+        self.paragrafos = paragrafos
+        self.repetidos = repetidos
+        self.caracteres = caracteres
+
+    @property
+    def sobreposicao(self):
+        """Fração dos parágrafos que repetiam o conteúdo de outro especialista."""
+        return self.repetidos / self.paragrafos if self.paragrafos else 0.0
+
+    def __repr__(self):
+        return f"IntegracaoExtrativa(paragrafos={self.paragrafos}, repetidos={self.repetidos})"
+
+
+def _semelhanca(termos, outros):
+    """Índice de Jaccard entre dois conjuntos de radicais."""
+    if not termos or not outros:
+        return 0.0
+    return len(termos & outros) / len(termos | outros)
+
+
+def integrar_extrativo(respostas, limiar_repeticao=0.6):
+    """
+    Junta as respostas em seções, uma por especialista, na ordem recebida.
+
+    Cada resposta é dividida em parágrafos; um parágrafo cujos radicais coincidem com
+    os de um parágrafo já incluído (índice de Jaccard a partir de `limiar_repeticao`)
+    é descartado, de modo que a informação repetida entre especialistas aparece uma
+    única vez, na seção do primeiro que a trouxe.
+
+    Args:
+        respostas: Pares (nome do especialista, texto da resposta), na ordem de relevância
+        limiar_repeticao: Semelhança a partir da qual um parágrafo é considerado repetido
+
+    Returns:
+        Uma IntegracaoExtrativa
+    """
+    incluidos = []
+    secoes = []
+    paragrafos = repetidos = caracteres = 0
+    for nome, resposta in respostas:
+        caracteres += len(resposta)
+        mantidos = []
+        for paragrafo in re.split(r"\n\s*\n", resposta.strip()):
+            paragrafo = paragrafo.strip()
+            if not paragrafo:
+                continue
+            paragrafos += 1
+            termos = frozenset(extrair_termos(paragrafo))
+            if any(_semelhanca(termos, outros) >= limiar_repeticao for outros in incluidos):
+                repetidos += 1
+                continue
+            incluidos.append(termos)
+            mantidos.append(paragrafo)
+        if mantidos:
+            secoes.append(f"**{nome}**\n\n" + "\n\n".join(mantidos))
+    return IntegracaoExtrativa("\n\n".join(secoes), paragrafos, repetidos, caracteres)
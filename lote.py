@@ -0,0 +1,284 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Processamento em Lote - Responde arquivos JSONL de perguntas em trabalhos noturnos
+
+Uso:
+    python lote.py perguntas.jsonl --saida respostas.jsonl --api-key SUA_CHAVE
+    python lote.py perguntas.jsonl --simultaneas 16 --por-minuto 300
+    python lote.py perguntas.jsonl --falso          # testa o lote sem rede
+
+Cada linha da entrada é um objeto JSON com a `pergunta` e, opcionalmente, o `id` e a
+`sessao` (perguntas da mesma sessão são respondidas em ordem, com o histórico da
+conversa). Cada linha da saída traz o `id`, a `sessao`, a `pergunta`, os
+`especialistas` consultados e a `resposta` (ou o `erro`).
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from assincrono import executar_sincrono
+from cache_respostas import chave_cache
+from cliente_modelo import LOTE, prioridade_atual
+
+
+class ItemLote:
+    """Uma pergunta do lote."""
+
+    __slots__ = ("id", "sessao", "pergunta", "especialistas", "chave")
+
+    def __init__(self, item_id, sessao, pergunta):
+        self.id = item_id
+        self.sessao = sessao
+        self.pergunta = pergunta
+        self.especialistas = None
+        self.chave = None
+
+
+def ler_perguntas(caminho):
+    """
+    Lê o arquivo JSONL de perguntas.
+
+    Args:
+        caminho: Arquivo com um objeto JSON por linha (`pergunta`, e opcionalmente `id` e `sessao`)
+
+    Returns:
+        A lista de ItemLote na ordem do arquivo; sem `id`, vale o número da linha e,
+        sem `sessao`, cada pergunta tem uma sessão própria
+    """
+    itens = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for numero, linha in enumerate(arquivo, 1):
+            if not linha.strip():
+                continue
+            dados = json.loads(linha)
+            item_id = str(dados.get("id", numero))
+            itens.append(ItemLote(item_id, str(dados.get("sessao", f"lote-{item_id}")), dados["pergunta"]))
+    return itens
+
+
+def ler_concluidos(caminho):
+    """
+    Lê o que já foi gravado em uma execução anterior (a própria saída é o ponto de retomada).
+
+    Uma última linha incompleta, deixada por uma interrupção durante a gravação, é
+    removida do arquivo. Itens que terminaram com erro não contam como concluídos.
+
+    Returns:
+        Um dicionário id -> registro gravado
+    """
+    concluidos = {}
+    if not os.path.exists(caminho):
+        return concluidos
+    with open(caminho, "rb+") as arquivo:
+        conteudo = arquivo.read()
+        fim = conteudo.rfind(b"\n") + 1
+        if fim < len(conteudo):
+            arquivo.truncate(fim)
+    for linha in conteudo[:fim].decode("utf-8").splitlines():
+        registro = json.loads(linha)
+        if "resposta" in registro:
+            concluidos[registro["id"]] = registro
+    return concluidos
+
+
+class _LimiteTaxa:
+    """Espaça as chamadas para não passar de `por_minuto` chamadas por minuto."""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto if por_minuto else 0.0
+        self._proxima = 0.0
+
+    async def aguardar(self):
+        if not self.intervalo:
+            return
+        agora = time.monotonic()
+        horario = max(agora, self._proxima)
+        self._proxima = horario + self.intervalo
+        if horario > agora:
+            await asyncio.sleep(horario - agora)
+
+
+class ProcessadorLote:
+    """
+    Responde um lote de perguntas com o Agente Gerente.
+
+    O processamento tem duas fases. Primeiro todas as perguntas são roteadas; depois
+    são despachadas agrupadas pelos especialistas indicados, com no máximo
+    `simultaneas` turnos em andamento e `por_minuto` turnos iniciados por minuto; no
+    ClienteModelo compartilhado, as chamadas do lote têm prioridade menor que as
+    conversas interativas.
+    Perguntas idênticas que abrem conversas novas e vão para os mesmos especialistas
+    são respondidas uma única vez. Os resultados são gravados na saída assim que
+    ficam prontos, e uma nova execução sobre a mesma saída continua de onde a
+    anterior parou.
+    """
+
+    def __init__(self, gerente, simultaneas=8, por_minuto=None):
+        """
+        Args:
+            gerente: O AgenteGerente que responde as perguntas
+            simultaneas: Número máximo de turnos em andamento ao mesmo tempo
+            por_minuto: Número máximo de turnos (e de roteamentos) iniciados por minuto
+                (None para não limitar)
+        """
+        self.gerente = gerente
+        self.simultaneas = simultaneas
+        self.por_minuto = por_minuto
+        self.estatisticas = {"perguntas": 0, "retomadas": 0, "turnos": 0, "duplicadas": 0, "erros": 0}
+
+    def processar(self, entrada, saida, retomar=True):
+        """Versão síncrona de `processar_async`."""
+        return executar_sincrono(self.processar_async(entrada, saida, retomar))
+
+    async def processar_async(self, entrada, saida, retomar=True):
+        """
+        Processa o arquivo de perguntas `entrada`, gravando as respostas em `saida`.
+
+        Args:
+            entrada: Arquivo JSONL de perguntas
+            saida: Arquivo JSONL de respostas, que também serve de ponto de retomada
+            retomar: Pula as perguntas já respondidas em `saida` (False recomeça do zero)
+
+        Returns:
+            As estatísticas da execução
+        """
+        # As chamadas do lote cedem a vez aos turnos interativos no limite de taxa
+        prioridade_atual.set(LOTE)
+        itens = ler_perguntas(entrada)
+        concluidos = ler_concluidos(saida) if retomar else {}
+        self.estatisticas["perguntas"] = len(itens)
+        self.estatisticas["retomadas"] = sum(1 for item in itens if item.id in concluidos)
+        pendentes = [item for item in itens if item.id not in concluidos]
+
+        limite = asyncio.Semaphore(self.simultaneas)
+        taxa = _LimiteTaxa(self.por_minuto)
+        await self._rotear(pendentes, limite, taxa)
+        cadeias = self._agrupar(pendentes, concluidos)
+
+        # Respostas já conhecidas de cada pergunta deduplicada (inclusive da execução anterior)
+        respostas = {registro["chave"]: registro["resposta"] for registro in concluidos.values()
+                     if registro.get("chave")}
+        em_andamento = {}
+        with open(saida, "a" if retomar else "w", encoding="utf-8") as arquivo:
+            async def responder(item):
+                if item.chave is not None:
+                    if item.chave in respostas:
+                        self.estatisticas["duplicadas"] += 1
+                        return respostas[item.chave], True
+                    if item.chave in em_andamento:
+                        self.estatisticas["duplicadas"] += 1
+                        return await asyncio.shield(em_andamento[item.chave]), True
+                    futuro = em_andamento[item.chave] = asyncio.get_running_loop().create_future()
+                try:
+                    async with limite:
+                        await taxa.aguardar()
+                        self.estatisticas["turnos"] += 1
+                        resposta = await self.gerente.processar_mensagem_async(
+                            item.pergunta, item.sessao, especialistas=item.especialistas)
+                except Exception as erro:
+                    if item.chave is not None:
+                        futuro.set_exception(erro)
+                        futuro.exception()  # as duplicadas recebem a exceção; evita o aviso de exceção não lida
+                        del em_andamento[item.chave]
+                    raise
+                if item.chave is not None:
+                    respostas[item.chave] = resposta
+                    futuro.set_result(resposta)
+                    del em_andamento[item.chave]
+                return resposta, False
+
+            async def percorrer(cadeia):
+                for item in cadeia:
+                    registro = {"id": item.id, "sessao": item.sessao, "pergunta": item.pergunta,
+                                "especialistas": item.especialistas}
+                    try:
+                        registro["resposta"], duplicada = await responder(item)
+                        if duplicada:
+                            # A conversa recebe a resposta como se tivesse sido gerada para ela
+                            historico = self.gerente.sessoes.obter(item.sessao).historico
+                            historico.append({"papel": "usuário", "conteúdo": item.pergunta})
+                            historico.append({"papel": "sistema", "conteúdo": registro["resposta"]})
+                    except Exception as erro:
+                        self.estatisticas["erros"] += 1
+                        registro["erro"] = f"{type(erro).__name__}: {erro}"
+                    if item.chave is not None:
+                        registro["chave"] = item.chave
+                    arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                    arquivo.flush()
+
+            await asyncio.gather(*(percorrer(cadeia) for cadeia in cadeias))
+        return self.estatisticas
+
+    async def _rotear(self, itens, limite, taxa):
+        """Primeira fase: escolhe os especialistas de todas as perguntas."""
+        async def rotear(item):
+            resultado = self.gerente.roteador.rotear(item.pergunta)
+            if resultado.especialistas and resultado.confianca >= self.gerente.limiar_confianca:
+                indicados = resultado.especialistas
+            else:
+                # Só o roteamento que consulta o modelo passa pelos limites
+                async with limite:
+                    await taxa.aguardar()
+                    indicados = await self.gerente.analisar_intencao_async(item.pergunta)
+            item.especialistas = [nome for nome in indicados if nome in self.gerente.especialistas]
+
+        await asyncio.gather(*(rotear(item) for item in itens))
+
+    def _agrupar(self, itens, concluidos):
+        """
+        Segunda fase: monta as cadeias de perguntas a despachar.
+
+        As perguntas da mesma sessão formam uma cadeia, respondida em ordem. As cadeias
+        são ordenadas pelos especialistas da primeira pergunta, de modo que as consultas a
+        um mesmo especialista sejam despachadas juntas. A pergunta que abre uma conversa
+        sem histórico recebe uma chave de deduplicação.
+        """
+        sessoes_concluidas = {registro["sessao"] for registro in concluidos.values()}
+        cadeias = OrderedDict()
+        for item in itens:
+            cadeia = cadeias.setdefault(item.sessao, [])
+            novo = (not cadeia and item.sessao not in sessoes_concluidas
+                    and not self.gerente.sessoes.obter(item.sessao).historico)
+            if novo and item.especialistas:
+                item.chave = chave_cache(",".join(item.especialistas), item.pergunta)
+            cadeia.append(item)
+        return sorted(cadeias.values(), key=lambda cadeia: cadeia[0].especialistas or [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help="Arquivo JSONL de perguntas")
+    parser.add_argument("--saida", help="Arquivo JSONL de respostas (padrão: <entrada>.respostas.jsonl)")
+    parser.add_argument("--api-key", help="Chave da API Gemini (padrão: variável GOOGLE_API_KEY)")
+    parser.add_argument("--simultaneas", type=int, default=8, help="Turnos em andamento ao mesmo tempo")
+    parser.add_argument("--por-minuto", type=float, help="Máximo de turnos iniciados por minuto")
+    parser.add_argument("--requisicoes-por-minuto", type=float, help="Cota de requisições ao modelo por minuto")
+    parser.add_argument("--tokens-por-minuto", type=float, help="Cota de tokens do modelo por minuto")
+    parser.add_argument("--recomecar", action="store_true", help="Ignora as respostas já gravadas na saída")
+    parser.add_argument("--falso", action="store_true", help="Usa o BackendFalso, sem rede")
+    args = parser.parse_args()
+
+    from agrismart import iniciar_agrismart
+    from backend_modelo import BackendFalso
+
+    saida = args.saida or f"{os.path.splitext(args.entrada)[0]}.respostas.jsonl"
+    backend = BackendFalso(latencia=0.05, tokens_por_segundo=0) if args.falso else None
+    limites = {"requisicoes_por_minuto": args.requisicoes_por_minuto, "tokens_por_minuto": args.tokens_por_minuto}
+    gerente = iniciar_agrismart(args.api_key or os.environ.get("GOOGLE_API_KEY"), backend=backend, limites=limites)
+
+    inicio = time.perf_counter()
+    estatisticas = ProcessadorLote(gerente, args.simultaneas, args.por_minuto).processar(
+        args.entrada, saida, retomar=not args.recomecar)
+    estatisticas["duracao_s"] = round(time.perf_counter() - inicio, 2)
+    print(json.dumps(estatisticas, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Perfil da Propriedade - Dados da propriedade extraídos das mensagens, sem chamar o modelo
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import re
+import threading
+
+from roteador import normalizar_texto
+
+# Campos do perfil da propriedade: chave e rótulo no prompt dos especialistas
+CAMPOS_PERFIL = (
+    ("cultura", "Cultura"),
+    ("area", "Área"),
+    ("solo", "Solo"),
+    ("ph_solo", "pH do solo"),
+    ("regiao", "Região"),
+    ("irrigacao", "Irrigação"),
+    ("agua", "Disponibilidade de água"),
+)
+
+# Classe do especialista cuja personalidade lista as culturas reconhecidas
+CLASSE_CULTURAS = "EspecialistaCulturas"
+
+_NUMERO = r"(\d{1,3}(?:\.\d{3})+|\d+(?:[.,]\d+)?)"
+
+# Unidades de área (texto normalizado) e a forma usada no perfil
+_UNIDADES_AREA = {"hectare": "ha", "hectares": "ha", "ha": "ha", "alqueire": "alqueire", "alqueires": "alqueires",
+                  "m2": "m²", "metros quadrados": "m²"}
+_AREA = re.compile(_NUMERO + r"\s*(" + "|".join(sorted(_UNIDADES_AREA, key=len, reverse=True)) + r")\b")
+_PH = re.compile(r"\bph\b(?:\s*(?:do solo|da terra|de|do|da|e|esta|fica|=|:|em torno de|perto de|proximo de|"
+                 r"por volta de|cerca de|igual a|entre))*\s*(\d(?:[.,]\d+)?)(?!\d)")
+
+# Termos reconhecidos em cada campo (texto normalizado) e a forma usada no perfil
+_TERMOS = {
+    "solo": {
+        "areno-argiloso": "areno-argiloso", "argilo-arenoso": "argilo-arenoso", "franco-arenoso": "franco-arenoso",
+        "franco-argiloso": "franco-argiloso", "argiloso": "argiloso", "argilosa": "argiloso",
+        "muito argiloso": "muito argiloso", "arenoso": "arenoso", "arenosa": "arenoso", "siltoso": "siltoso",
+        "siltosa": "siltoso", "latossolo": "latossolo", "argissolo": "argissolo", "cambissolo": "cambissolo",
+        "neossolo": "neossolo", "nitossolo": "nitossolo", "terra roxa": "terra roxa", "pedregoso": "pedregoso",
+        "compactado": "compactado", "encharcado": "encharcado",
+    },
+    "regiao": {
+        "acre": "Acre", "alagoas": "Alagoas", "amapa": "Amapá", "amazonas": "Amazonas", "bahia": "Bahia",
+        "ceara": "Ceará", "distrito federal": "Distrito Federal", "espirito santo": "Espírito Santo",
+        "goias": "Goiás", "maranhao": "Maranhão", "mato grosso do sul": "Mato Grosso do Sul",
+        "mato grosso": "Mato Grosso", "minas gerais": "Minas Gerais", "paraiba": "Paraíba", "parana": "Paraná",
+        "pernambuco": "Pernambuco", "piaui": "Piauí", "rio de janeiro": "Rio de Janeiro",
+        "rio grande do norte": "Rio Grande do Norte", "rio grande do sul": "Rio Grande do Sul",
+        "rondonia": "Rondônia", "roraima": "Roraima", "santa catarina": "Santa Catarina", "sao paulo": "São Paulo",
+        "sergipe": "Sergipe", "tocantins": "Tocantins", "sul de minas": "sul de Minas",
+        "norte de minas": "norte de Minas", "triangulo mineiro": "Triângulo Mineiro", "zona da mata": "Zona da Mata",
+        "oeste baiano": "oeste baiano", "oeste da bahia": "oeste da Bahia", "nordeste": "Nordeste",
+        "sudeste": "Sudeste", "centro-oeste": "Centro-Oeste", "regiao sul": "Região Sul",
+        "regiao norte": "Região Norte", "cerrado": "cerrado", "caatinga": "caatinga", "semiarido": "semiárido",
+        "sertao": "sertão", "pantanal": "Pantanal", "pampa": "Pampa", "mata atlantica": "Mata Atlântica",
+        "amazonia": "Amazônia",
+    },
+    "irrigacao": {
+        "gotejamento": "gotejamento", "microaspersao": "microaspersão", "microaspersor": "microaspersão",
+        "aspersao": "aspersão", "aspersor": "aspersão", "aspersores": "aspersão", "pivo central": "pivô central",
+        "pivo": "pivô central", "fertirrigacao": "fertirrigação", "irrigacao por sulco": "sulcos",
+        "irrigacao por sulcos": "sulcos", "inundacao": "inundação", "sequeiro": "sequeiro (sem irrigação)",
+        "sem irrigacao": "sequeiro (sem irrigação)", "nao tenho irrigacao": "sequeiro (sem irrigação)",
+        "nao irrigo": "sequeiro (sem irrigação)",
+    },
+    "agua": {
+        "poco artesiano": "poço artesiano", "poco semiartesiano": "poço semiartesiano", "poco": "poço",
+        "acude": "açude", "represa": "represa", "barragem": "barragem", "nascente": "nascente",
+        "cisterna": "cisterna", "agua do rio": "rio", "pouca agua": "escassa", "falta de agua": "escassa",
+        "escassez de agua": "escassa", "agua escassa": "escassa", "agua limitada": "escassa",
+        "agua e limitada": "escassa", "muita agua": "abundante", "agua abundante": "abundante",
+        "agua a vontade": "abundante",
+    },
+}
+
+# Marcas de que o usuário fala da própria propriedade (e não de um caso hipotético)
+_PRIMEIRA_PESSOA = re.compile(
+    r"\b(?:tenho|temos|planto|plantamos|plantei|cultivo|cultivamos|produzo|produzimos|colho|colhemos|irrigo|"
+    r"irrigamos|usamos|estou|estamos|vou|vamos|pretendo|pretendemos|moro|meu|meus|minha|minhas|"
+    r"nosso|nossos|nossa|nossas)\b")
+
+_FRASES = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _alternativas(termos):
+    """Expressão que reconhece qualquer um dos `termos`, preferindo os mais longos."""
+    return re.compile(r"\b(?:" + "|".join(re.escape(termo) for termo in sorted(termos, key=len, reverse=True))
+                      + r")\b")
+
+
+def culturas_do_catalogo(catalogo=None):
+    """
+    Lê as culturas (e as suas variedades) da personalidade do especialista em culturas.
+
+    As linhas no formato "- Cultivo de café: variedades (arábica, robusta), ..." dão o
+    nome da cultura e, entre parênteses, as variedades reconhecidas.
+
+    Returns:
+        Um dicionário cultura -> tupla de variedades
+    """
+    from especialista_generico import carregar_catalogo
+
+    culturas = {}
+    for definicao in carregar_catalogo(catalogo).values():
+        if definicao.classe != CLASSE_CULTURAS:
+            continue
+        for nome, descricao in re.findall(r"^\s*-\s*Cultivo de ([^:]+):(.*)$", definicao.personalidade, re.MULTILINE):
+            variedades = re.search(r"variedades\s*\(([^)]*)\)", descricao)
+            culturas[nome.strip()] = tuple(variedade.strip() for variedade in variedades.group(1).split(",")
+                                           if variedade.strip()) if variedades else ()
+    return culturas
+
+
+def renderizar_perfil(campos):
+    """Texto do perfil para os prompts (vazio se nenhum campo for conhecido)."""
+    linhas = [f"- {rotulo}: {campos[chave]}" for chave, rotulo in CAMPOS_PERFIL if campos.get(chave)]
+    return "Perfil da propriedade:\n" + "\n".join(linhas) if linhas else ""
+
+
+class PerfilPropriedade:
+    """
+    Dados da propriedade do usuário conhecidos em uma conversa.
+
+    Os campos são os de CAMPOS_PERFIL; `texto` é a forma renderizada para os prompts,
+    refeita apenas quando um campo muda. As atualizações podem vir de threads diferentes
+    (o turno e o ResumidorConversas) e substituem o dicionário de campos de uma só vez.
+    """
+
+    __slots__ = ("campos", "texto")
+
+    _trava = threading.Lock()
+
+    def __init__(self, campos=None):
+        self.campos = {}
+        self.texto = ""
+        if campos:
+            self.atualizar(campos)
+
+    def atualizar(self, campos, substituir=True):
+        """
+        Atualiza o perfil com os `campos` informados.
+
+        Args:
+            campos: Dicionário campo -> valor (campos desconhecidos e valores vazios são ignorados)
+            substituir: Se falso, só preenche os campos ainda desconhecidos
+
+        Returns:
+            A lista dos campos alterados
+        """
+        with self._trava:
+            novos = dict(self.campos)
+            alterados = []
+            for chave, _ in CAMPOS_PERFIL:
+                valor = campos.get(chave)
+                if not valor or novos.get(chave) == valor or (chave in novos and not substituir):
+                    continue
+                novos[chave] = valor
+                alterados.append(chave)
+            if alterados:
+                self.campos = novos
+                self.texto = renderizar_perfil(novos)
+        return alterados
+
+    def como_dict(self):
+        """Todos os campos do perfil, com None nos desconhecidos."""
+        campos = self.campos
+        return {chave: campos.get(chave) for chave, _ in CAMPOS_PERFIL}
+
+    def __bool__(self):
+        return bool(self.campos)
+
+    def __repr__(self):
+        return f"PerfilPropriedade({self.campos})"
+
+
+class ExtratorPerfil:
+    """
+    Extrai os dados da propriedade das mensagens do usuário com expressões regulares e
+    um vocabulário fixo, sem chamar o modelo.
+
+    Reconhece a área com a sua unidade, o pH, o tipo de solo, o estado ou a região,
+    o sistema de irrigação, as fontes de água e as culturas citadas na personalidade
+    do especialista em culturas (com as suas variedades). Só são consideradas as
+    frases afirmativas e as perguntas em que o usuário fala de si ("minha lavoura de
+    café está..."): perguntas genéricas, como "qual a época de plantar mandioca?",
+    não alteram o perfil. Um valor novo substitui o anterior, de modo que correções do
+    usuário prevalecem.
+    """
+
+    def __init__(self, culturas=None):
+        """
+        Args:
+            culturas: Dicionário cultura -> variedades reconhecidas (padrão: as do catálogo)
+        """
+        self.culturas = culturas if culturas is not None else culturas_do_catalogo()
+        self._culturas = {}
+        self._variedades = {}
+        for cultura, variedades in self.culturas.items():
+            raiz = normalizar_texto(cultura)
+            # Plural e plantação: "cafés", "cafezal", "bananal", "mandiocais"
+            for forma in (raiz, raiz + "s", raiz + "l", raiz + "is", raiz + "zal", raiz + "zais"):
+                self._culturas.setdefault(forma, cultura)
+            self._variedades[cultura] = {normalizar_texto(variedade): variedade for variedade in variedades}
+        self._expressao_culturas = _alternativas(self._culturas) if self._culturas else None
+        self._expressoes = {campo: (_alternativas(termos), termos) for campo, termos in _TERMOS.items()}
+        self.contadores = {"mensagens": 0, "mensagens_com_dados": 0, "campos_atualizados": 0}
+
+    def extrair(self, texto):
+        """
+        Extrai os dados da propriedade de uma mensagem.
+
+        Returns:
+            Um dicionário campo -> valor com os campos encontrados
+        """
+        frases = [normalizar_texto(frase) for frase in _FRASES.split(texto) if frase.strip()]
+        frases = [frase for frase in frases if not frase.rstrip().endswith("?") or _PRIMEIRA_PESSOA.search(frase)]
+        if not frases:
+            return {}
+        texto = " \n ".join(frases)
+        campos = {}
+
+        area = _AREA.search(texto)
+        if area:
+            campos["area"] = f"{area.group(1)} {_UNIDADES_AREA[area.group(2)]}"
+        ph = _PH.search(texto)
+        if ph and 3 <= float(ph.group(1).replace(",", ".")) <= 10:
+            campos["ph_solo"] = ph.group(1)
+        if self._expressao_culturas is not None:
+            culturas = _valores(self._expressao_culturas, self._culturas, texto)
+            if culturas:
+                campos["cultura"] = ", ".join(self._com_variedade(cultura, texto) for cultura in culturas)
+        for campo, (expressao, termos) in self._expressoes.items():
+            valores = _valores(expressao, termos, texto)
+            if valores:
+                campos[campo] = ", ".join(valores)
+        return campos
+
+    def _com_variedade(self, cultura, texto):
+        for variedade_normalizada, variedade in self._variedades[cultura].items():
+            if re.search(rf"\b{re.escape(variedade_normalizada)}\b", texto):
+                return f"{cultura} {variedade}"
+        return cultura
+
+    def atualizar(self, perfil, mensagem):
+        """
+        Atualiza o `perfil` com os dados encontrados na `mensagem` do usuário.
+
+        Returns:
+            A lista dos campos alterados
+        """
+        self.contadores["mensagens"] += 1
+        campos = self.extrair(mensagem)
+        if not campos:
+            return []
+        self.contadores["mensagens_com_dados"] += 1
+        alterados = perfil.atualizar(campos)
+        self.contadores["campos_atualizados"] += len(alterados)
+        return alterados
+
+    def estatisticas(self):
+        """Retorna quantas mensagens foram examinadas, quantas tinham dados e quantos campos mudaram."""
+        return dict(self.contadores)
+
+
+def _valores(expressao, termos, texto):
+    """Formas no perfil dos termos encontrados no `texto`, na ordem em que aparecem e sem repetição."""
+    valores = []
+    for achado in expressao.finditer(texto):
+        valor = termos[achado.group(0)]
+        if valor not in valores:
+            valores.append(valor)
+    return valores
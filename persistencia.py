@@ -0,0 +1,298 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Persistência - Conversas gravadas em SQLite e retomadas após reinicializações
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import heapq
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from historico import Historico, formatar_item_historico, resumir_linha
+from resumo import ResumoConversa
+
+# Marca, na fila de gravação, o pedido de encerramento da thread
+_ENCERRAR = object()
+# Marca, na fila de gravação, o perfil e o resumo estruturado de uma conversa
+_CONTEXTO = object()
+
+
+class PersistenciaSQLite:
+    """
+    Guarda as conversas em um arquivo SQLite (modo WAL).
+
+    As mensagens entram em uma fila e são gravadas em lotes, em uma única transação,
+    por uma thread própria: o turno da conversa não espera pelo disco. Cada mensagem
+    é gravada com a sua posição na conversa, o horário e a linha de resumo que a
+    representa quando ela sai da parte recente.
+
+    Uma conversa é retomada lendo apenas as `janela` mensagens mais recentes e as
+    linhas de resumo imediatamente anteriores (até `limite_resumo` caracteres), ambas
+    por consultas indexadas; por isso o tempo de retomada não cresce com o tamanho
+    da conversa. As mensagens da conversa que ainda estão na fila são guardadas à parte,
+    por conversa, até serem gravadas, e a retomada as junta às lidas do banco: ela
+    nunca espera pela gravação (nem pela das outras conversas).
+
+    O perfil da propriedade e o resumo estruturado (as observações e até que mensagem
+    ele cobre) ficam na linha da conversa, gravados pela mesma fila sempre que mudam, e
+    também são restaurados na retomada.
+    """
+
+    def __init__(self, caminho="agrismart_conversas.sqlite", janela=16, limite_resumo=1500,
+                 intervalo_gravacao=0.2, max_lote=500):
+        """
+        Args:
+            caminho: Arquivo do banco de dados
+            janela: Quantidade de mensagens recentes carregadas na retomada
+            limite_resumo: Tamanho máximo, em caracteres, do resumo carregado na retomada
+            intervalo_gravacao: Tempo máximo, em segundos, que uma mensagem espera na fila
+            max_lote: Quantidade máxima de mensagens gravadas em uma transação
+        """
+        self.caminho = caminho
+        self.janela = janela
+        self.limite_resumo = limite_resumo
+        self.intervalo_gravacao = intervalo_gravacao
+        self.max_lote = max_lote
+        self.gravadas = 0
+        self.lotes = 0
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        # Mensagens na fila, por conversa e posição, até que a sua transação seja confirmada
+        self._pendentes = {}
+        # Último perfil e resumo estruturado na fila, por conversa, até serem gravados
+        self._contextos_pendentes = {}
+        self._trava_pendentes = threading.Lock()
+        self._conexao = self._conectar()
+        self._conexao.executescript(
+            "CREATE TABLE IF NOT EXISTS conversas ("
+            " sessao TEXT PRIMARY KEY, criada_em REAL NOT NULL, atualizada_em REAL NOT NULL,"
+            " total INTEGER NOT NULL, perfil TEXT NOT NULL DEFAULT '{}', observacoes TEXT, resumo_ate INTEGER);"
+            "CREATE INDEX IF NOT EXISTS conversas_atualizada ON conversas (atualizada_em);"
+            "CREATE TABLE IF NOT EXISTS mensagens ("
+            " sessao TEXT NOT NULL, posicao INTEGER NOT NULL, instante REAL NOT NULL, papel TEXT NOT NULL,"
+            " nome TEXT, conteudo TEXT NOT NULL, resumo TEXT NOT NULL, PRIMARY KEY (sessao, posicao))"
+            " WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS mensagens_instante ON mensagens (sessao, instante);"
+        )
+        # Bancos criados antes do perfil e do resumo estruturado ganham as colunas deles
+        colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(conversas)")}
+        for coluna, definicao in (("perfil", "TEXT NOT NULL DEFAULT '{}'"), ("observacoes", "TEXT"),
+                                  ("resumo_ate", "INTEGER")):
+            if coluna not in colunas:
+                self._conexao.execute(f"ALTER TABLE conversas ADD COLUMN {coluna} {definicao}")
+        self._gravador = threading.Thread(target=self._gravar_continuamente, name="agrismart-persistencia",
+                                          daemon=True)
+        self._gravador.start()
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        return conexao
+
+    def registrar(self, sessao_id, posicao, registro):
+        """Coloca uma mensagem na fila de gravação (retorna sem esperar pelo disco)."""
+        linha = formatar_item_historico(registro)
+        resumo = resumir_linha(linha) if linha else ""
+        mensagem = (sessao_id, posicao, time.time(), registro.papel, registro.nome, registro.conteudo, resumo)
+        with self._trava_pendentes:
+            self._pendentes.setdefault(sessao_id, {})[posicao] = mensagem
+        self._fila.put(mensagem)
+
+    def registrar_contexto(self, sessao_id, historico):
+        """Coloca na fila de gravação o perfil e o resumo estruturado atuais do `historico`."""
+        resumo = historico.resumo_estruturado
+        contexto = (_CONTEXTO, sessao_id, json.dumps(historico.perfil.campos, ensure_ascii=False),
+                    json.dumps(resumo.observacoes, ensure_ascii=False) if resumo is not None else None,
+                    historico.inicio + resumo.ate if resumo is not None else None)
+        with self._trava_pendentes:
+            self._contextos_pendentes[sessao_id] = contexto
+        self._fila.put(contexto)
+
+    def acompanhar(self, sessao_id, historico):
+        """
+        Faz com que cada item acrescentado ao `historico` seja gravado.
+
+        O perfil e o resumo estruturado são gravados junto com o item seguinte à sua mudança
+        (o perfil muda depois da mensagem do usuário; o resumo, em segundo plano).
+        """
+        gravado = [None]
+
+        def observar(posicao, registro):
+            self.registrar(sessao_id, posicao, registro)
+            contexto = (historico.perfil.texto, historico.resumo_estruturado)
+            if contexto != gravado[0]:
+                gravado[0] = contexto
+                self.registrar_contexto(sessao_id, historico)
+
+        historico.observador = observar
+
+    def _gravar_continuamente(self):
+        conexao = self._conectar()
+        encerrar = False
+        while not encerrar:
+            lote = [self._fila.get()]
+            # Junta ao lote o que chegar dentro do intervalo, até o tamanho máximo
+            limite = time.monotonic() + self.intervalo_gravacao
+            while len(lote) < self.max_lote:
+                espera = limite - time.monotonic()
+                try:
+                    lote.append(self._fila.get(timeout=espera) if espera > 0 else self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            encerrar = any(item is _ENCERRAR for item in lote)
+            mensagens = [item for item in lote if item is not _ENCERRAR and item[0] is not _CONTEXTO]
+            # Só o contexto mais recente de cada conversa no lote precisa ser gravado
+            contextos = {item[1]: item for item in lote if item is not _ENCERRAR and item[0] is _CONTEXTO}
+            try:
+                if mensagens or contextos:
+                    self._gravar_lote(conexao, mensagens, contextos.values())
+            except sqlite3.Error as erro:
+                print(f"Erro ao gravar {len(mensagens)} mensagens das conversas: {erro}")
+            finally:
+                self._liberar_pendentes(mensagens, contextos)
+                for _ in lote:
+                    self._fila.task_done()
+        conexao.close()
+
+    def _gravar_lote(self, conexao, mensagens, contextos=()):
+        conversas = {}
+        for sessao_id, posicao, instante, *_ in mensagens:
+            criada, _, total = conversas.get(sessao_id, (instante, instante, 0))
+            conversas[sessao_id] = (min(criada, instante), instante, max(total, posicao + 1))
+        conexao.execute("BEGIN")
+        try:
+            conexao.executemany(
+                "INSERT OR REPLACE INTO mensagens (sessao, posicao, instante, papel, nome, conteudo, resumo)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", mensagens)
+            conexao.executemany(
+                "INSERT INTO conversas (sessao, criada_em, atualizada_em, total) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (sessao) DO UPDATE SET atualizada_em = excluded.atualizada_em,"
+                " total = MAX(total, excluded.total)",
+                [(sessao_id, *valores) for sessao_id, valores in conversas.items()])
+            conexao.executemany(
+                "UPDATE conversas SET perfil = ?, observacoes = ?, resumo_ate = ? WHERE sessao = ?",
+                [(perfil, observacoes, ate, sessao_id) for _, sessao_id, perfil, observacoes, ate in contextos])
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        self.gravadas += len(mensagens)
+        self.lotes += 1
+
+    def _liberar_pendentes(self, mensagens, contextos):
+        """Tira as `mensagens` e os `contextos` já gravados do registro de pendentes (se não foram substituídos)."""
+        with self._trava_pendentes:
+            for sessao_id, contexto in contextos.items():
+                if self._contextos_pendentes.get(sessao_id) is contexto:
+                    del self._contextos_pendentes[sessao_id]
+            for mensagem in mensagens:
+                sessao_id, posicao = mensagem[0], mensagem[1]
+                pendentes = self._pendentes.get(sessao_id)
+                if pendentes is not None and pendentes.get(posicao) is mensagem:
+                    del pendentes[posicao]
+                    if not pendentes:
+                        del self._pendentes[sessao_id]
+
+    def sincronizar(self):
+        """Espera até que todas as mensagens da fila tenham sido gravadas."""
+        self._fila.join()
+
+    def carregar(self, sessao_id):
+        """
+        Retoma uma conversa gravada.
+
+        Returns:
+            Um Historico com as mensagens recentes, o resumo das anteriores, o perfil e o
+            resumo estruturado (ou None se a conversa não existir) e o horário de criação
+            da conversa
+        """
+        # Mensagens ainda na fila (de uma sessão que acabou de sair da memória) vêm do registro
+        # de pendentes; ele é copiado antes da leitura do banco, e uma mensagem só sai dele
+        # depois de gravada, de modo que nenhuma fica de fora
+        with self._trava_pendentes:
+            pendentes = dict(self._pendentes.get(sessao_id, ()))
+            contexto = self._contextos_pendentes.get(sessao_id)
+        with self._trava:
+            conversa = self._conexao.execute(
+                "SELECT criada_em, total, perfil, observacoes, resumo_ate FROM conversas WHERE sessao = ?",
+                (sessao_id,)).fetchone()
+            if conversa is None and not pendentes:
+                return None, None
+            if conversa is None:
+                conversa = (min(mensagem[2] for mensagem in pendentes.values()), 0, "{}", None, None)
+            criada_em, total, perfil, observacoes, resumo_ate = conversa
+            if contexto is not None:
+                perfil, observacoes, resumo_ate = contexto[2:]
+            if pendentes:
+                total = max(total, max(pendentes) + 1)
+            inicio = max(0, total - self.janela)
+            # As linhas de resumo só são necessárias depois do que o resumo estruturado já cobre
+            primeira = resumo_ate if resumo_ate is not None else 0
+            recentes = {posicao: (papel, nome, conteudo) for posicao, papel, nome, conteudo in self._conexao.execute(
+                "SELECT posicao, papel, nome, conteudo FROM mensagens WHERE sessao = ? AND posicao >= ?",
+                (sessao_id, inicio))}
+            recentes.update((posicao, mensagem[3:6]) for posicao, mensagem in pendentes.items() if posicao >= inicio)
+            resumo = []
+            tamanho = 0
+            # Linhas de resumo das mensagens anteriores, da mais recente para a mais antiga
+            gravadas = self._conexao.execute(
+                "SELECT posicao, resumo FROM mensagens WHERE sessao = ? AND posicao >= ? AND posicao < ?"
+                " AND resumo != '' ORDER BY posicao DESC", (sessao_id, primeira, inicio))
+            na_fila = sorted(((posicao, mensagem[6]) for posicao, mensagem in pendentes.items()
+                              if primeira <= posicao < inicio and mensagem[6]), reverse=True)
+            for posicao, linha in heapq.merge(gravadas, na_fila, reverse=True):
+                if posicao in pendentes and linha is not pendentes[posicao][6]:
+                    continue
+                tamanho += len(linha) + 1
+                if tamanho > self.limite_resumo and resumo:
+                    break
+                resumo.append(linha)
+        itens = [{"papel": papel, "nome": nome, "conteúdo": conteudo} if nome else {"papel": papel, "conteúdo": conteudo}
+                 for _, (papel, nome, conteudo) in sorted(recentes.items())]
+        resumo.reverse()
+        if resumo_ate is None:
+            historico = Historico(itens, inicio=inicio, resumo_anterior=resumo)
+        else:
+            # O resumo estruturado cobre as posições até `resumo_ate`; se a parte carregada começar
+            # depois dele, as linhas de resumo do intervalo entram nas observações
+            historico = Historico(itens, inicio=inicio)
+            historico.resumo_estruturado = ResumoConversa(json.loads(observacoes or "[]") + resumo,
+                                                          max(0, resumo_ate - inicio))
+        historico.perfil.atualizar(json.loads(perfil))
+        return historico, criada_em
+
+    def substituir(self, sessao_id, historico):
+        """
+        Troca a conversa gravada pelo `historico` (como ao reiniciar a conversa) e passa a acompanhá-lo.
+
+        Espera pela gravação do que está na fila, como `remover`.
+        """
+        self.remover(sessao_id)
+        for posicao, registro in enumerate(historico, historico.inicio):
+            self.registrar(sessao_id, posicao, registro)
+        if historico.perfil or historico.resumo_estruturado is not None:
+            self.registrar_contexto(sessao_id, historico)
+        self.acompanhar(sessao_id, historico)
+
+    def remover(self, sessao_id):
+        """Apaga uma conversa do banco."""
+        self.sincronizar()
+        with self._trava:
+            self._conexao.execute("DELETE FROM mensagens WHERE sessao = ?", (sessao_id,))
+            self._conexao.execute("DELETE FROM conversas WHERE sessao = ?", (sessao_id,))
+
+    def estatisticas(self):
+        """Retorna quantas mensagens e lotes foram gravados e quantas mensagens aguardam na fila."""
+        return {"gravadas": self.gravadas, "lotes": self.lotes, "pendentes": self._fila.qsize()}
+
+    def fechar(self):
+        """Grava o que está na fila, encerra a thread de gravação e fecha o banco."""
+        self._fila.put(_ENCERRAR)
+        self._gravador.join()
+        with self._trava:
+            self._conexao.close()
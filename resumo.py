@@ -0,0 +1,239 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Resumo da Conversa - Compacta os turnos antigos em um perfil da propriedade, em segundo plano
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import asyncio
+import json
+import queue
+import re
+import threading
+
+from cliente_modelo import LOTE, prioridade_atual
+from historico import formatar_item_historico, resumir_linha
+from instrumentacao import INSTRUMENTACAO_DESATIVADA
+from perfil import CAMPOS_PERFIL
+
+# Marca, na fila de resumos, o pedido de encerramento da thread
+_ENCERRAR = object()
+
+# Instrução de sistema do resumo (fixa, aproveita o cache de contexto do backend)
+INSTRUCAO_RESUMO = f"""
+Você resume conversas de consultoria agrícola do AgriSmart.
+
+Recebe o resumo atual (em JSON) e novas interações da conversa. Retorne apenas um objeto
+JSON, sem nenhum outro texto, com as chaves:
+- {", ".join(f'"{chave}"' for chave, _ in CAMPOS_PERFIL)}: o que o usuário informou
+  sobre a sua propriedade (cultura plantada, área, tipo de solo, pH do solo, região,
+  sistema de irrigação e disponibilidade de água), ou null se não foi informado;
+- "observacoes": lista de frases curtas com as recomendações já dadas e as decisões e
+  problemas relatados que continuam importantes para a conversa.
+
+Mantenha as informações do resumo atual que as novas interações não corrigirem.
+"""
+
+
+class ResumoConversa:
+    """
+    Resumo estruturado dos itens iniciais de uma conversa.
+
+    Guarda as observações e `ate`, a quantidade de itens do histórico cobertos pelo
+    resumo; o perfil da propriedade fica no PerfilPropriedade do próprio histórico. É
+    imutável: cada atualização cria um novo resumo, que substitui o anterior no
+    histórico de uma só vez.
+    """
+
+    __slots__ = ("observacoes", "ate", "texto")
+
+    def __init__(self, observacoes=(), ate=0):
+        self.observacoes = tuple(observacoes)
+        self.ate = ate
+        self.texto = ("Pontos já tratados na conversa:\n" + "\n".join(f"- {texto}" for texto in self.observacoes)
+                      if self.observacoes else "")
+
+    def __repr__(self):
+        return f"ResumoConversa(ate={self.ate}, observacoes={len(self.observacoes)})"
+
+
+def interpretar_resumo(texto):
+    """
+    Lê o JSON do resumo retornado pelo modelo.
+
+    Returns:
+        Um dicionário com os campos do perfil e as `observacoes`, ou None se o texto não
+        contiver um objeto JSON
+    """
+    achado = re.search(r"\{.*\}", texto, re.DOTALL)
+    if not achado:
+        return None
+    try:
+        dados = json.loads(achado.group(0))
+    except ValueError:
+        return None
+    if not isinstance(dados, dict):
+        return None
+    perfil = {chave: str(dados[chave]).strip() for chave, _ in CAMPOS_PERFIL
+              if dados.get(chave) not in (None, "", "null")}
+    observacoes = dados.get("observacoes") or []
+    if isinstance(observacoes, str):
+        observacoes = [observacoes]
+    return dict(perfil, observacoes=[" ".join(str(texto).split()) for texto in observacoes if str(texto).strip()])
+
+
+class ResumidorConversas:
+    """
+    Compacta os turnos antigos das conversas em um ResumoConversa, fora do caminho das respostas.
+
+    Depois de cada turno, `acompanhar` verifica (em tempo constante) se a conversa tem
+    itens suficientes fora dos `itens_recentes` finais que ainda não foram resumidos; se
+    tiver, ela entra na fila de uma thread própria. A thread monta o prompt com o resumo
+    atual e esses itens, pede ao modelo o resumo em JSON (com a prioridade do trabalho
+    em lote, no loop de eventos do turno que a agendou) e o instala no histórico. A
+    partir daí, os especialistas recebem o resumo seguido apenas dos itens seguintes.
+    Os dados da propriedade devolvidos pelo modelo só preenchem os campos do perfil
+    ainda desconhecidos: os extraídos das mensagens (ExtratorPerfil) são mais recentes.
+
+    Se o modelo falhar ou não devolver JSON, o perfil fica como está e os itens são
+    acrescentados às observações como linhas de resumo, de modo que a conversa continua
+    compactada. Cada resumo é uma medição "resumo" da instrumentação, anotada com a
+    origem ("modelo" ou "local", com o motivo da falha do modelo); um erro inesperado
+    fica registrado na medição e em `contadores["erros"]`.
+    """
+
+    def __init__(self, modelo, itens_recentes=8, min_itens=16, max_observacoes=10, max_caracteres_resposta=300,
+                 tempo_maximo=60, instrumentacao=None):
+        """
+        Args:
+            modelo: BackendModelo usado para resumir (None resume só com as linhas de resumo locais)
+            itens_recentes: Itens finais da conversa que nunca são resumidos
+            min_itens: Quantidade mínima de itens novos fora da parte recente para agendar um resumo
+            max_observacoes: Quantidade máxima de observações mantidas no resumo
+            max_caracteres_resposta: Tamanho máximo de cada resposta no prompt do resumo (as
+                mensagens do usuário, onde estão os dados da propriedade, vão inteiras)
+            tempo_maximo: Segundos de espera pela resposta do modelo
+            instrumentacao: Instrumentacao onde registrar as chamadas de resumo
+        """
+        self.modelo = modelo
+        self.itens_recentes = itens_recentes
+        self.min_itens = min_itens
+        self.max_observacoes = max_observacoes
+        self.max_caracteres_resposta = max_caracteres_resposta
+        self.tempo_maximo = tempo_maximo
+        self.instrumentacao = instrumentacao or INSTRUMENTACAO_DESATIVADA
+        self.contadores = {"agendados": 0, "resumos": 0, "falhas_modelo": 0, "erros": 0, "itens_resumidos": 0}
+        self._fila = queue.Queue()
+        self._agendados = set()
+        self._trava = threading.Lock()
+        self._trabalhador = threading.Thread(target=self._trabalhar, name="agrismart-resumo", daemon=True)
+        self._trabalhador.start()
+
+    def _pendentes(self, historico):
+        resumo = historico.resumo_estruturado
+        return len(historico) - self.itens_recentes - (resumo.ate if resumo is not None else 0)
+
+    def acompanhar(self, historico):
+        """
+        Agenda o resumo da conversa se ela já tiver itens antigos suficientes (chamado após cada turno).
+
+        Deve ser chamado de dentro do loop de eventos do turno: é nele que a chamada ao
+        modelo será feita.
+        """
+        if self._pendentes(historico) < self.min_itens:
+            return
+        with self._trava:
+            if id(historico) in self._agendados:
+                return
+            self._agendados.add(id(historico))
+            self.contadores["agendados"] += 1
+        self._fila.put((historico, asyncio.get_running_loop() if self.modelo is not None else None))
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self._fila.get()
+            if tarefa is _ENCERRAR:
+                self._fila.task_done()
+                return
+            historico, loop = tarefa
+            try:
+                with self.instrumentacao.medir("resumo", "ResumidorConversas") as medicao:
+                    self._resumir(historico, loop, medicao)
+            except Exception:
+                # O erro já está na medição; a thread segue com as outras conversas
+                with self._trava:
+                    self.contadores["erros"] += 1
+            finally:
+                with self._trava:
+                    self._agendados.discard(id(historico))
+                self._fila.task_done()
+
+    def _resumir(self, historico, loop, medicao):
+        """Resume os itens entre o resumo atual e a parte recente e instala o novo resumo."""
+        anterior = historico.resumo_estruturado or ResumoConversa()
+        ate = len(historico) - self.itens_recentes
+        if ate <= anterior.ate:
+            return
+        itens = [historico[indice] for indice in range(anterior.ate, ate)]
+
+        dados = falha = None
+        if loop is not None:
+            prompt = self._construir_prompt(historico.perfil, anterior, itens)
+            falha = "resposta sem JSON"
+            futuro = asyncio.run_coroutine_threadsafe(self._gerar(prompt, medicao), loop)
+            try:
+                texto = futuro.result(self.tempo_maximo)
+                dados = interpretar_resumo(texto)
+            except Exception as erro:
+                falha = type(erro).__name__
+                # Sem isto a chamada seguiria no loop (e no limite de taxa) depois do tempo máximo
+                futuro.cancel()
+            if dados is None:
+                with self._trava:
+                    self.contadores["falhas_modelo"] += 1
+
+        if dados is not None:
+            medicao.anotar("modelo")
+            observacoes = dados.pop("observacoes")
+            historico.perfil.atualizar(dados, substituir=False)
+        else:
+            medicao.anotar(f"local ({falha})" if falha else "local")
+            linhas = (formatar_item_historico(item) for item in itens)
+            observacoes = list(anterior.observacoes) + [resumir_linha(linha) for linha in linhas if linha]
+        historico.resumo_estruturado = ResumoConversa(observacoes[-self.max_observacoes:], ate)
+        with self._trava:
+            self.contadores["resumos"] += 1
+            self.contadores["itens_resumidos"] += ate - anterior.ate
+
+    def _construir_prompt(self, perfil, anterior, itens):
+        linhas = []
+        for item in itens:
+            linha = formatar_item_historico(item)
+            if item.get("papel") != "usuário" and len(linha) > self.max_caracteres_resposta:
+                linha = linha[:self.max_caracteres_resposta].rsplit(" ", 1)[0] + "...\n"
+            linhas.append(linha)
+        atual = dict(perfil.como_dict(), observacoes=list(anterior.observacoes))
+        return (f"Resumo atual:\n{json.dumps(atual, ensure_ascii=False)}\n\n"
+                f"Novas interações:\n{''.join(linhas)}")
+
+    async def _gerar(self, prompt, medicao):
+        # O resumo cede a vez aos turnos interativos no limite de taxa do ClienteModelo
+        prioridade_atual.set(LOTE)
+        medicao.registrar_prompt(prompt)
+        texto = await self.modelo.gerar(prompt, medicao, INSTRUCAO_RESUMO)
+        medicao.registrar_resposta(texto)
+        return texto
+
+    def sincronizar(self):
+        """Espera até que todos os resumos agendados tenham sido feitos."""
+        self._fila.join()
+
+    def encerrar(self):
+        """Encerra a thread depois dos resumos já agendados (os agendados depois disso não são feitos)."""
+        self._fila.put(_ENCERRAR)
+        self._trabalhador.join()
+
+    def estatisticas(self):
+        """Retorna quantos resumos foram agendados e feitos, as falhas do modelo, os erros e os itens resumidos."""
+        with self._trava:
+            return dict(self.contadores, na_fila=self._fila.qsize())
@@ -0,0 +1,429 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Roteador Local - Seleciona os especialistas adequados sem chamar o modelo Gemini
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import functools
+import json
+import math
+import re
+import unicodedata
+
+# Palavras muito frequentes em português que não ajudam a distinguir especialistas
+PALAVRAS_VAZIAS = frozenset("""
+    a ao aos as ate com como da das de do dos e ela ele em entre era essa esse esta este eu foi
+    ha isso isto ja la lhe mais mas me meu minha minhas meus muito na nas nao no nos o os ou
+    para pela pelas pelo pelos por pode poderia qual quais quando que quem se sem ser seu seus
+    sua suas tem ter um uma umas uns voce voces vou sao estou esta estao sobre tambem ola
+    preciso gostaria ajuda ajudar favor devo fazer melhor
+    agrismart sistema multiagente consultoria especialista especialistas
+""".split())
+
+
+@functools.lru_cache(maxsize=4096)
+def _remover_acentos(trecho):
+    trecho = unicodedata.normalize("NFKD", trecho)
+    return "".join(c for c in trecho if not unicodedata.combining(c))
+
+
+def _trocar_acentuados(achado):
+    return _remover_acentos(achado.group(0))
+
+
+# Sequências de caracteres fora do ASCII; em português, poucas e curtas ("ção", "é")
+_NAO_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+
+def normalizar_texto(texto):
+    """Converte o texto para minúsculas e remove acentos."""
+    texto = texto.lower()
+    # Só as sequências acentuadas são decompostas, e cada uma uma única vez (o resultado fica guardado)
+    return texto if texto.isascii() else _NAO_ASCII.sub(_trocar_acentuados, texto)
+
+
+def extrair_termos(texto):
+    """
+    Extrai os radicais relevantes de um texto.
+
+    Usa um radical simples (os cinco primeiros caracteres da palavra sem o plural),
+    suficiente para aproximar "irrigação", "irrigar" e "irrigado".
+    """
+    termos = []
+    for palavra in re.findall(r"[a-z0-9]+", normalizar_texto(texto)):
+        if palavra in PALAVRAS_VAZIAS or len(palavra) < 2:
+            continue
+        if len(palavra) > 3 and palavra.endswith("s"):
+            palavra = palavra[:-1]
+        termos.append(palavra[:5])
+    return termos
+
+
+class ResultadoRoteamento:
+    """Resultado de um roteamento local: especialistas escolhidos e a confiança da escolha."""
+
+    def __init__(self, especialistas, confianca, pontuacoes):
+        self.especialistas = especialistas
+        self.confianca = confianca
+        self.pontuacoes = pontuacoes
+
+    def __repr__(self):
+        return f"ResultadoRoteamento(especialistas={self.especialistas}, confianca={self.confianca:.2f})"
+
+
+class RoteadorLocal:
+    """
+    Roteador local baseado em um índice léxico ponderado.
+
+    Cada especialista é indexado a partir do texto da sua personalidade e das suas
+    palavras-chave (os termos coloquiais do catálogo de especialistas): os radicais
+    recebem peso TF-IDF (termos comuns a todas as personalidades perdem relevância) e
+    os termos do nome do especialista recebem um reforço. A pontuação de uma mensagem
+    é a soma dos pesos dos seus termos, o que torna o roteamento uma consulta a
+    dicionário de custo proporcional ao tamanho da mensagem.
+
+    Quando mais de `max_confiantes` especialistas pontuam perto do melhor, a pergunta
+    abrange várias áreas e o léxico não distingue bem quais delas importam: a confiança
+    é reduzida na mesma proporção, para que o Agente Gerente consulte o modelo.
+    """
+
+    def __init__(self, margem_multiplos=0.5, max_especialistas=None, escala_confianca=1.5, peso_nome=3.0,
+                 max_confiantes=2):
+        """
+        Inicializa o roteador.
+
+        Args:
+            margem_multiplos: Fração da melhor pontuação a partir da qual outros especialistas também são escolhidos
+            max_especialistas: Número máximo de especialistas retornados (None para não limitar)
+            escala_confianca: Pontuação a partir da qual a evidência é considerada forte
+            peso_nome: Reforço aplicado aos termos do nome do especialista
+            max_confiantes: Quantidade de especialistas próximos do melhor acima da qual a
+                confiança é reduzida (None para não reduzir)
+        """
+        self.margem_multiplos = margem_multiplos
+        self.max_especialistas = max_especialistas
+        self.escala_confianca = escala_confianca
+        self.peso_nome = peso_nome
+        self.max_confiantes = max_confiantes
+        self._documentos = {}
+        self._pendentes = {}
+        self._indice = None
+        self._afinidades = None
+
+    def indexar(self, nome, texto, palavras_chave=""):
+        """
+        Adiciona (ou substitui) um especialista no índice.
+
+        Os pesos são recalculados uma única vez, na primeira consulta após as alterações,
+        de modo que registrar vários especialistas seguidos não reconstrói o índice a cada um.
+
+        Args:
+            nome: Nome do especialista
+            texto: Texto que descreve o especialista, ou uma função sem argumentos que o
+                retorna (chamada apenas quando o índice for construído)
+            palavras_chave: Termos coloquiais associados ao especialista que não aparecem no texto
+        """
+        self._pendentes[nome] = (texto, palavras_chave)
+        self._documentos.pop(nome, None)
+        self._indice = None
+
+    def remover(self, nome):
+        """Remove um especialista do índice."""
+        if self._documentos.pop(nome, None) is not None or self._pendentes.pop(nome, None) is not None:
+            self._indice = None
+
+    def _frequencias(self, nome, texto, palavras_chave):
+        """Conta os termos do texto de um especialista, reforçando os do seu nome."""
+        frequencias = {}
+        for termo in extrair_termos(f"{texto} {palavras_chave}"):
+            frequencias[termo] = frequencias.get(termo, 0) + 1
+        for termo in extrair_termos(nome):
+            frequencias[termo] = frequencias.get(termo, 0) + self.peso_nome
+        return frequencias
+
+    def _reconstruir_indice(self):
+        """Incorpora os especialistas pendentes e recalcula o índice invertido termo -> {especialista: peso}."""
+        for nome, (texto, palavras_chave) in self._pendentes.items():
+            if callable(texto):
+                texto = texto()
+            self._documentos[nome] = self._frequencias(nome, texto, palavras_chave)
+        self._pendentes.clear()
+
+        total = len(self._documentos)
+        documentos_por_termo = {}
+        for frequencias in self._documentos.values():
+            for termo in frequencias:
+                documentos_por_termo[termo] = documentos_por_termo.get(termo, 0) + 1
+
+        indice = {}
+        for nome, frequencias in self._documentos.items():
+            for termo, frequencia in frequencias.items():
+                idf = math.log((total + 1) / documentos_por_termo[termo])
+                peso = (1 + math.log(frequencia)) * idf
+                if peso > 0:
+                    indice.setdefault(termo, {})[nome] = peso
+        self._indice = indice
+        self._afinidades = None
+
+    def pontuar(self, mensagem):
+        """Retorna a pontuação de cada especialista para a mensagem."""
+        if self._indice is None:
+            self._reconstruir_indice()
+        pontuacoes = {}
+        for termo in set(extrair_termos(mensagem)):
+            for nome, peso in self._indice.get(termo, {}).items():
+                pontuacoes[nome] = pontuacoes.get(nome, 0.0) + peso
+        return pontuacoes
+
+    def afinidades(self, nome):
+        """
+        Retorna a semelhança do especialista `nome` com cada um dos demais.
+
+        A semelhança é o cosseno entre os vetores de pesos TF-IDF dos dois especialistas,
+        calculada para todos os pares na primeira consulta após uma alteração no índice.
+        """
+        if self._indice is None:
+            self._reconstruir_indice()
+        if self._afinidades is None:
+            vetores = {}
+            for termo, pesos in self._indice.items():
+                for especialista, peso in pesos.items():
+                    vetores.setdefault(especialista, {})[termo] = peso
+            normas = {especialista: math.sqrt(sum(peso * peso for peso in vetor.values()))
+                      for especialista, vetor in vetores.items()}
+            self._afinidades = {
+                especialista: {outro: sum(peso * vetores[outro].get(termo, 0.0) for termo, peso in vetor.items())
+                               / (normas[especialista] * normas[outro])
+                               for outro in vetores if outro != especialista}
+                for especialista, vetor in vetores.items()
+            }
+        return self._afinidades.get(nome, {})
+
+    def rotear(self, mensagem):
+        """
+        Escolhe os especialistas mais adequados para a mensagem.
+
+        Args:
+            mensagem: A pergunta ou solicitação do usuário
+
+        Returns:
+            Um ResultadoRoteamento com os especialistas ordenados por relevância e uma
+            confiança entre 0 e 1 que combina a força da evidência com a separação entre
+            os especialistas escolhidos e os demais.
+        """
+        pontuacoes = self.pontuar(mensagem)
+        if not pontuacoes:
+            return ResultadoRoteamento([], 0.0, pontuacoes)
+
+        ordenados = sorted(pontuacoes.items(), key=lambda item: item[1], reverse=True)
+        melhor = ordenados[0][1]
+        escolhidos = [nome for nome, pontuacao in ordenados if pontuacao >= melhor * self.margem_multiplos]
+        proximos = len(escolhidos)
+        if self.max_especialistas:
+            escolhidos = escolhidos[:self.max_especialistas]
+
+        total = sum(pontuacoes.values())
+        separacao = sum(pontuacoes[nome] for nome in escolhidos) / total
+        evidencia = 1 - math.exp(-melhor / self.escala_confianca)
+        confianca = separacao * evidencia
+        if self.max_confiantes and proximos > self.max_confiantes:
+            confianca *= self.max_confiantes / proximos
+        return ResultadoRoteamento(escolhidos, confianca, pontuacoes)
+
+
+# Termos que o modelo costuma acrescentar antes do nome de um especialista
+PREFIXOS_NOME = ("especialista em ", "especialista de ", "especialista ", "o ", "a ", "os ", "as ")
+
+
+def normalizar_nome(texto):
+    """Normaliza um nome de especialista: sem acentos, marcadores, pontuação e espaços repetidos."""
+    texto = normalizar_texto(texto)
+    texto = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", texto)
+    return " ".join(re.findall(r"[a-z0-9]+", texto))
+
+
+def trigramas(texto):
+    """Conjunto de trigramas de caracteres do texto normalizado (com as bordas das palavras)."""
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class CorrespondenciaNomes:
+    """
+    Reconhece os nomes dos especialistas registrados mesmo quando escritos de forma aproximada.
+
+    Cada especialista é conhecido pelo nome normalizado, pelas formas sem os prefixos
+    comuns ("Especialista em ...", artigos) e pelos apelidos informados no registro;
+    essas formas ficam em um dicionário, montado no registro. Uma consulta é primeiro
+    procurada no dicionário e, se não estiver lá, o seu núcleo (a forma sem nenhum dos
+    prefixos) é comparado (coeficiente de Dice sobre os trigramas) com os núcleos
+    registrados que têm algum trigrama em comum com ele, por um índice invertido. Como
+    os prefixos ficam de fora, "Especialista em Custos" não se parece com "Especialista
+    em Culturas" só por causa do começo comum. Um núcleo contido, em palavras inteiras,
+    no de um único especialista ("Solo" em "Análise de Solo") também é aceito. A
+    correspondência aproximada por trigramas precisa ainda superar a do segundo
+    especialista mais parecido por `margem`; sem isso, o nome é tratado como desconhecido.
+    """
+
+    def __init__(self, limiar_semelhanca=0.6, margem=0.15):
+        """
+        Args:
+            limiar_semelhanca: Semelhança mínima (0 a 1) para aceitar uma correspondência aproximada
+            margem: Vantagem mínima sobre o segundo especialista mais semelhante
+        """
+        self.limiar_semelhanca = limiar_semelhanca
+        self.margem = margem
+        self._formas = {}
+        self._nucleos = {}
+        self._trigramas = {}
+        self._indice = {}
+
+    def _variantes(self, texto):
+        forma = normalizar_nome(texto)
+        variantes = {forma}
+        for prefixo in PREFIXOS_NOME:
+            if forma.startswith(prefixo) and len(forma) > len(prefixo):
+                variantes.add(forma[len(prefixo):])
+        return variantes
+
+    @staticmethod
+    def _nucleo(forma):
+        """A forma normalizada sem nenhum dos prefixos comuns ("o especialista em culturas" -> "culturas")."""
+        reduzida = True
+        while reduzida:
+            reduzida = False
+            for prefixo in PREFIXOS_NOME:
+                if forma.startswith(prefixo) and len(forma) > len(prefixo):
+                    forma = forma[len(prefixo):]
+                    reduzida = True
+                    break
+        return forma
+
+    def adicionar(self, nome, apelidos=()):
+        """Registra (ou substitui) as formas pelas quais o especialista `nome` é reconhecido."""
+        self.remover(nome)
+        for texto in (nome, *apelidos):
+            for forma in self._variantes(texto):
+                if forma and forma not in self._formas:
+                    self._formas[forma] = nome
+            nucleo = self._nucleo(normalizar_nome(texto))
+            if nucleo and nucleo not in self._nucleos:
+                self._nucleos[nucleo] = nome
+                self._trigramas[nucleo] = trigramas(nucleo)
+                for trigrama in self._trigramas[nucleo]:
+                    self._indice.setdefault(trigrama, set()).add(nucleo)
+
+    def remover(self, nome):
+        """Esquece as formas do especialista `nome`."""
+        for forma in [forma for forma, dono in self._formas.items() if dono == nome]:
+            del self._formas[forma]
+        for nucleo in [nucleo for nucleo, dono in self._nucleos.items() if dono == nome]:
+            del self._nucleos[nucleo]
+            for trigrama in self._trigramas.pop(nucleo):
+                candidatas = self._indice[trigrama]
+                candidatas.discard(nucleo)
+                if not candidatas:
+                    del self._indice[trigrama]
+
+    def encontrar(self, texto):
+        """
+        Retorna o nome registrado correspondente a `texto`.
+
+        Returns:
+            Um par (nome, exata): `exata` indica que a forma foi encontrada no dicionário;
+            (None, False) quando nenhum especialista é semelhante o bastante, ou quando
+            dois deles são semelhantes quase na mesma medida
+        """
+        for forma in self._variantes(texto):
+            if forma in self._formas:
+                return self._formas[forma], True
+        nucleo = self._nucleo(normalizar_nome(texto))
+        if len(nucleo) >= 4:
+            contidos = {dono for registrado, dono in self._nucleos.items() if f" {nucleo} " in f" {registrado} "}
+            if len(contidos) == 1:
+                return contidos.pop(), False
+        consulta = trigramas(nucleo)
+        comuns = {}
+        for trigrama in consulta:
+            for candidata in self._indice.get(trigrama, ()):
+                comuns[candidata] = comuns.get(candidata, 0) + 1
+        # Melhor semelhança de cada especialista (um especialista pode ter vários núcleos)
+        semelhancas = {}
+        for candidata, quantidade in comuns.items():
+            valor = 2 * quantidade / (len(consulta) + len(self._trigramas[candidata]))
+            nome = self._nucleos[candidata]
+            if valor > semelhancas.get(nome, 0.0):
+                semelhancas[nome] = valor
+        ordenadas = sorted(semelhancas.items(), key=lambda item: item[1], reverse=True)
+        if not ordenadas or ordenadas[0][1] < self.limiar_semelhanca:
+            return None, False
+        if len(ordenadas) > 1 and ordenadas[0][1] - ordenadas[1][1] < self.margem:
+            return None, False
+        return ordenadas[0][0], False
+
+
+def extrair_nomes_roteamento(texto):
+    """
+    Extrai os nomes indicados na resposta de roteamento do modelo.
+
+    Aceita o formato pedido ({"especialistas": [...]}), uma lista JSON, o JSON dentro
+    de um bloco de código ou cercado de texto e, na falta de JSON, nomes separados por
+    vírgulas, ponto e vírgula ou linhas (com ou sem marcadores).
+
+    Returns:
+        Um par (nomes, estruturada): `estruturada` indica que a resposta era JSON válido
+    """
+    achado = re.search(r"\{.*\}|\[.*\]", texto, re.DOTALL)
+    if achado:
+        try:
+            dados = json.loads(achado.group(0))
+        except ValueError:
+            dados = None
+        if isinstance(dados, dict):
+            dados = dados.get("especialistas", next((valor for valor in dados.values() if isinstance(valor, list)), []))
+        if isinstance(dados, str):
+            dados = [dados]
+        if isinstance(dados, list):
+            return [str(nome).strip() for nome in dados if str(nome).strip()], True
+    texto = re.sub(r"```\w*|[\"'`]", "", texto)
+    return [parte.strip(" .:") for parte in re.split(r"[,;\n]", texto) if parte.strip(" .:")], False
+
+
+def interpretar_roteamento(texto, correspondencia):
+    """
+    Converte a resposta de roteamento do modelo nos nomes dos especialistas registrados.
+
+    Uma parte sem correspondência exata que contém " e " é dividida quando cada
+    pedaço corresponde a um especialista ("Culturas e Meteorologista"); nomes que
+    incluem " e " (como "Pragas e Doenças") são reconhecidos antes da divisão.
+
+    Args:
+        texto: Resposta do modelo
+        correspondencia: CorrespondenciaNomes com os especialistas registrados
+
+    Returns:
+        Um dicionário com os `especialistas` reconhecidos (sem repetição, na ordem
+        indicada), se a resposta era `estruturada`, quantos nomes foram reconhecidos
+        de forma `aproximada` e os `descartados` (partes não reconhecidas)
+    """
+    nomes, estruturada = extrair_nomes_roteamento(texto)
+    especialistas, descartados = [], []
+    aproximados = 0
+    pendentes = list(nomes)
+    while pendentes:
+        parte = pendentes.pop(0)
+        nome, exata = correspondencia.encontrar(parte)
+        if not exata:
+            pedacos = re.split(r"\s+e\s+", parte)
+            if len(pedacos) > 1 and all(correspondencia.encontrar(pedaco)[0] for pedaco in pedacos):
+                pendentes[:0] = pedacos
+                continue
+        if nome is None:
+            descartados.append(parte)
+            continue
+        aproximados += not exata
+        if nome not in especialistas:
+            especialistas.append(nome)
+    return {"especialistas": especialistas, "estruturada": estruturada, "aproximados": aproximados,
+            "descartados": descartados}
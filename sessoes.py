@@ -0,0 +1,247 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Sessões - Mantém o histórico de várias conversas em um único Agente Gerente
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+
+from historico import Historico
+from resumo import ResumoConversa
+
+# Sessão usada quando o chamador não informa um identificador
+SESSAO_PADRAO = "padrao"
+
+class Sessao:
+    """
+    Uma conversa: o seu histórico e os horários de criação e último acesso.
+
+    A `persistencia`, definida pelo GerenciadorSessoes, acompanha o histórico; atribuir
+    um novo histórico (como `gerente.historico = []`, para reiniciar a conversa) também
+    substitui a conversa gravada.
+    """
+
+    __slots__ = ("id", "_historico", "criada_em", "ultimo_acesso", "_trava", "persistencia")
+
+    def __init__(self, sessao_id, historico=None):
+        self.id = sessao_id
+        self.persistencia = None
+        self.historico = historico if historico is not None else Historico()
+        self.criada_em = time.time()
+        self.ultimo_acesso = self.criada_em
+        self._trava = None
+
+    @property
+    def historico(self):
+        """O Historico da conversa (uma lista de itens atribuída aqui é convertida)."""
+        return self._historico
+
+    @historico.setter
+    def historico(self, historico):
+        self._historico = historico if isinstance(historico, Historico) else Historico(historico)
+        if self.persistencia is not None:
+            self.persistencia.substituir(self.id, self._historico)
+
+    def tamanho_estimado(self):
+        """Estimativa, em bytes, da memória ocupada pelo histórico (mantida pelo próprio Historico)."""
+        return self._historico.tamanho_estimado()
+
+    @property
+    def perfil(self):
+        """O PerfilPropriedade da conversa (guardado no histórico, que o leva aos prompts)."""
+        return self._historico.perfil
+
+    @property
+    def ocupada(self):
+        """Indica se há um turno da conversa em andamento (a sessão não pode sair da memória)."""
+        return self._trava is not None and any(trava.locked() for trava in self._trava.values())
+
+    @property
+    def trava(self):
+        """
+        Trava assíncrona que serializa os turnos da mesma conversa no loop de eventos em execução.
+
+        Uma asyncio.Lock só pode ser usada no loop em que foi usada pela primeira vez; por
+        isso cada loop (o de fundo das chamadas síncronas, o do chamador) tem a sua.
+        """
+        loop = asyncio.get_running_loop()
+        if self._trava is None:
+            self._trava = {}
+        trava = self._trava.get(loop)
+        if trava is None:
+            self._trava = {outro: valor for outro, valor in self._trava.items() if not outro.is_closed()}
+            trava = self._trava[loop] = asyncio.Lock()
+        return trava
+
+
+class GerenciadorSessoes:
+    """
+    Guarda as sessões de conversa de um Agente Gerente.
+
+    As sessões ficam em um OrderedDict na ordem do último acesso, de modo que tanto o
+    descarte por ociosidade quanto o descarte por limite de memória começam pelas
+    mais antigas sem percorrer as demais. O limite de quantidade é verificado a cada
+    acesso; a ociosidade e o limite de memória, a cada `intervalo_limpeza` segundos.
+    Com `diretorio_descarte`, as sessões retiradas da memória são gravadas em disco
+    (JSON compactado) e restauradas no próximo acesso. Com uma `persistencia` (como a
+    PersistenciaSQLite), cada mensagem é gravada à medida que a conversa avança, e as
+    sessões que não estão em memória, inclusive após reiniciar o processo, são
+    retomadas a partir dela.
+    """
+
+    def __init__(self, tempo_ocioso=1800, max_sessoes=10_000, max_bytes=256 * 2**20,
+                 diretorio_descarte=None, intervalo_limpeza=30, persistencia=None):
+        """
+        Args:
+            tempo_ocioso: Segundos sem acesso após os quais uma sessão sai da memória
+            max_sessoes: Número máximo de sessões em memória
+            max_bytes: Memória máxima estimada para os históricos em memória
+            diretorio_descarte: Diretório onde gravar as sessões descartadas (None descarta de vez)
+            intervalo_limpeza: Intervalo mínimo, em segundos, entre verificações de ociosidade
+            persistencia: Armazenamento onde as conversas são gravadas e de onde são retomadas
+        """
+        self.tempo_ocioso = tempo_ocioso
+        self.max_sessoes = max_sessoes
+        self.max_bytes = max_bytes
+        self.diretorio_descarte = diretorio_descarte
+        self.intervalo_limpeza = intervalo_limpeza
+        self.persistencia = persistencia
+        self._sessoes = OrderedDict()
+        self._trava = threading.RLock()
+        self._ultima_limpeza = time.monotonic()
+        self.descartadas = 0
+        self.restauradas = 0
+        if diretorio_descarte:
+            os.makedirs(diretorio_descarte, exist_ok=True)
+
+    def __len__(self):
+        return len(self._sessoes)
+
+    def __contains__(self, sessao_id):
+        return sessao_id in self._sessoes
+
+    def obter(self, sessao_id=SESSAO_PADRAO):
+        """Retorna a sessão, restaurando-a do disco ou criando uma nova se necessário."""
+        with self._trava:
+            sessao = self._sessoes.get(sessao_id)
+            if sessao is None:
+                sessao = self._restaurar(sessao_id) or Sessao(sessao_id)
+                if self.persistencia is not None:
+                    self.persistencia.acompanhar(sessao_id, sessao.historico)
+                    sessao.persistencia = self.persistencia
+                self._sessoes[sessao_id] = sessao
+            else:
+                self._sessoes.move_to_end(sessao_id)
+            sessao.ultimo_acesso = time.time()
+
+            if len(self._sessoes) > self.max_sessoes:
+                excedentes = len(self._sessoes) - self.max_sessoes
+                # Sessões com turno em andamento e a própria sessão pedida nunca são descartadas;
+                # se todas estiverem ocupadas, o limite é excedido temporariamente
+                livres = (antiga for antiga in self._sessoes.values() if not antiga.ocupada and antiga is not sessao)
+                for antiga in list(islice(livres, excedentes)):
+                    self._descartar(antiga)
+            if time.monotonic() - self._ultima_limpeza >= self.intervalo_limpeza:
+                self.coletar_ociosas(preservar=sessao_id)
+            return sessao
+
+    def remover(self, sessao_id):
+        """Remove uma sessão da memória e do disco."""
+        with self._trava:
+            self._sessoes.pop(sessao_id, None)
+            caminho = self._caminho(sessao_id)
+            if caminho and os.path.exists(caminho):
+                os.remove(caminho)
+            if self.persistencia is not None:
+                self.persistencia.remover(sessao_id)
+
+    def coletar_ociosas(self, preservar=None):
+        """
+        Descarta (ou grava em disco) as sessões sem acesso há mais de `tempo_ocioso`
+        segundos e, em seguida, as menos usadas enquanto a memória estimada exceder `max_bytes`.
+        """
+        with self._trava:
+            self._ultima_limpeza = time.monotonic()
+            limite = time.time() - self.tempo_ocioso
+            for sessao in list(self._sessoes.values()):
+                if sessao.ultimo_acesso > limite:
+                    break
+                if not sessao.ocupada:
+                    self._descartar(sessao)
+
+            if self.max_bytes:
+                total = sum(sessao.tamanho_estimado() for sessao in self._sessoes.values())
+                for sessao in list(self._sessoes.values()):
+                    if total <= self.max_bytes:
+                        break
+                    if sessao.id != preservar and not sessao.ocupada:
+                        total -= sessao.tamanho_estimado()
+                        self._descartar(sessao)
+
+    def _descartar(self, sessao):
+        """Tira a sessão da memória, gravando-a em disco se houver diretório de descarte."""
+        self._sessoes.pop(sessao.id, None)
+        self.descartadas += 1
+        if self.persistencia is not None:
+            # As mensagens já foram (ou estão sendo) gravadas na persistência; o perfil e o
+            # resumo estruturado podem ter mudado depois da última delas
+            if sessao.historico:
+                self.persistencia.registrar_contexto(sessao.id, sessao.historico)
+            return
+        caminho = self._caminho(sessao.id)
+        if caminho and sessao.historico:
+            resumo = sessao.historico.resumo_estruturado
+            with gzip.open(caminho, "wt", encoding="utf-8") as arquivo:
+                json.dump({"id": sessao.id, "criada_em": sessao.criada_em, "historico": sessao.historico.como_lista(),
+                           "perfil": sessao.perfil.campos,
+                           "resumo": {"observacoes": resumo.observacoes, "ate": resumo.ate} if resumo else None},
+                          arquivo, ensure_ascii=False)
+
+    def _restaurar(self, sessao_id):
+        """Lê do disco uma sessão descartada anteriormente."""
+        if self.persistencia is not None:
+            historico, criada_em = self.persistencia.carregar(sessao_id)
+            if historico is None:
+                return None
+            sessao = Sessao(sessao_id, historico)
+            sessao.criada_em = criada_em
+            self.restauradas += 1
+            return sessao
+        caminho = self._caminho(sessao_id)
+        if not caminho or not os.path.exists(caminho):
+            return None
+        with gzip.open(caminho, "rt", encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        os.remove(caminho)
+        sessao = Sessao(sessao_id, dados["historico"])
+        sessao.criada_em = dados["criada_em"]
+        sessao.perfil.atualizar(dados.get("perfil") or {})
+        if dados.get("resumo"):
+            sessao.historico.resumo_estruturado = ResumoConversa(**dados["resumo"])
+        self.restauradas += 1
+        return sessao
+
+    def _caminho(self, sessao_id):
+        if not self.diretorio_descarte:
+            return None
+        nome = hashlib.sha1(str(sessao_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.diretorio_descarte, f"{nome}.json.gz")
+
+    def estatisticas(self):
+        """Retorna a quantidade de sessões em memória, a memória estimada e os descartes."""
+        with self._trava:
+            return {
+                "sessoes": len(self._sessoes),
+                "bytes_estimados": sum(sessao.tamanho_estimado() for sessao in self._sessoes.values()),
+                "descartadas": self.descartadas,
+                "restauradas": self.restauradas,
+            }
@@ -0,0 +1,50 @@
+"""
+AgriSmart - Sistema Multiagente para Agricultura Inteligente
+Testes do cache de respostas - Conversas com perfis diferentes não compartilham respostas
+
+Desenvolvido para a Imersão Lura (Alura + Google Gemini)
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agrismart
+from backend_modelo import BackendFalso
+from cache_respostas import CacheMemoria
+
+PERGUNTA = "Qual a melhor época para plantar mandioca?"
+
+
+class TestCachePorPerfil(unittest.TestCase):
+    def setUp(self):
+        self.backend = BackendFalso(latencia=0, tokens_por_segundo=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.gerente = agrismart.iniciar_agrismart(backend=self.backend)
+        # Sem itens do histórico na chave, só o perfil distingue as conversas
+        self.gerente.configurar_cache(CacheMemoria(), itens_contexto=0)
+        self.gerente.configurar_perfil()
+
+    def chamadas_da_pergunta(self, sessao_id, descricao):
+        self.gerente.processar_mensagem(descricao, sessao_id)
+        antes = self.backend.chamadas
+        self.gerente.processar_mensagem(PERGUNTA, sessao_id)
+        return self.backend.chamadas - antes
+
+    def test_perfis_diferentes_nao_compartilham_respostas(self):
+        self.assertGreater(self.chamadas_da_pergunta("a", "Tenho 10 hectares de café, solo argiloso com pH 5.2."), 0)
+        self.assertGreater(self.chamadas_da_pergunta("b", "Tenho 30 hectares de milho, solo arenoso com pH 6.5."), 0)
+        self.assertNotEqual(self.gerente.sessoes.obter("a").perfil.texto, self.gerente.sessoes.obter("b").perfil.texto)
+
+    def test_mesmo_perfil_aproveita_a_resposta(self):
+        descricao = "Tenho 10 hectares de café, solo argiloso com pH 5.2."
+        self.assertGreater(self.chamadas_da_pergunta("a", descricao), 0)
+        self.assertEqual(self.chamadas_da_pergunta("c", descricao), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()